@@ -0,0 +1,34 @@
+"""pending notification email unsent index
+
+Revision ID: 2f6a8c3e5d17
+Revises: 9d4b6e1f3a58
+Create Date: 2026-10-18 19:41:17.027385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6a8c3e5d17'
+down_revision: Union[str, Sequence[str], None] = '9d4b6e1f3a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_pending_notification_email_unsent_frequency_user_id', 'pending_notification_email',
+                        ['frequency', 'user_id', 'scheduled_for'], unique=False,
+                        postgresql_where=sa.text('NOT is_sent'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pending_notification_email_unsent_frequency_user_id', table_name='pending_notification_email')
@@ -0,0 +1,30 @@
+"""add user token_version
+
+Revision ID: 3e8c6b1d9f42
+Revises: b58e0f3a7c21
+Create Date: 2026-10-18 17:48:15.902364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8c6b1d9f42'
+down_revision: Union[str, Sequence[str], None] = 'b58e0f3a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'token_version')
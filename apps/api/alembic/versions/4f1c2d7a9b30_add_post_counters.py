@@ -0,0 +1,79 @@
+"""add post counters
+
+Revision ID: 4f1c2d7a9b30
+Revises: 2c9551fa3333
+Create Date: 2026-10-18 10:12:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2d7a9b30'
+down_revision: Union[str, Sequence[str], None] = '2c9551fa3333'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('post', sa.Column('reaction_count', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table('post_reaction_count',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('post_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('emoji', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('post_id', 'emoji')
+    )
+    op.create_index(op.f('ix_post_reaction_count_post_id'), 'post_reaction_count', ['post_id'], unique=False)
+
+    # Backfill from existing replies and reactions; bin/reconcile_post_counters.py repairs drift later
+    op.execute("""
+        WITH RECURSIVE closure AS (
+            SELECT parent_id AS ancestor_id, id AS post_id
+            FROM post
+            WHERE parent_id IS NOT NULL AND deleted_at IS NULL
+            UNION ALL
+            SELECT p.parent_id, c.post_id
+            FROM post p
+            JOIN closure c ON p.id = c.ancestor_id
+            WHERE p.parent_id IS NOT NULL
+        )
+        UPDATE post SET comment_count = counts.total
+        FROM (SELECT ancestor_id, COUNT(*) AS total FROM closure GROUP BY ancestor_id) counts
+        WHERE post.id = counts.ancestor_id
+    """)
+    op.execute("""
+        UPDATE post SET reaction_count = counts.total
+        FROM (
+            SELECT post_id, COUNT(*) AS total FROM reaction
+            WHERE deleted_at IS NULL GROUP BY post_id
+        ) counts
+        WHERE post.id = counts.post_id
+    """)
+    op.execute("""
+        INSERT INTO post_reaction_count (id, created_at, updated_at, post_id, emoji, count)
+        SELECT substr(md5(post_id || emoji), 1, 24), MIN(created_at), NOW(), post_id, emoji, COUNT(*)
+        FROM reaction
+        WHERE deleted_at IS NULL
+        GROUP BY post_id, emoji
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_post_reaction_count_post_id'), table_name='post_reaction_count')
+    op.drop_table('post_reaction_count')
+    op.drop_column('post', 'reaction_count')
+    op.drop_column('post', 'comment_count')
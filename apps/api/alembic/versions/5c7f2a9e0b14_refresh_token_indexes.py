@@ -0,0 +1,32 @@
+"""refresh token indexes
+
+Revision ID: 5c7f2a9e0b14
+Revises: 3e8c6b1d9f42
+Create Date: 2026-10-18 18:12:36.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7f2a9e0b14'
+down_revision: Union[str, Sequence[str], None] = '3e8c6b1d9f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_refresh_token_user_id_status', 'refresh_token', ['user_id', 'status'], unique=False)
+    op.create_index('ix_refresh_token_expires_at', 'refresh_token', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_token_expires_at', table_name='refresh_token')
+    op.drop_index('ix_refresh_token_user_id_status', table_name='refresh_token')
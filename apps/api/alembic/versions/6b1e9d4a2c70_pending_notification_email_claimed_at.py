@@ -0,0 +1,30 @@
+"""pending notification email claimed at
+
+Revision ID: 6b1e9d4a2c70
+Revises: 2f6a8c3e5d17
+Create Date: 2026-10-18 21:12:48.306514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1e9d4a2c70'
+down_revision: Union[str, Sequence[str], None] = '2f6a8c3e5d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pending_notification_email', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('pending_notification_email', 'claimed_at')
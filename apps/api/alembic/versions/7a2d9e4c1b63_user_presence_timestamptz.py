@@ -0,0 +1,51 @@
+"""user presence timestamptz
+
+Revision ID: 7a2d9e4c1b63
+Revises: e1a5f3c80d27
+Create Date: 2026-10-18 15:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2d9e4c1b63'
+down_revision: Union[str, Sequence[str], None] = 'e1a5f3c80d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ISO_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored values are ISO strings with an offset, so Postgres can cast them directly
+    op.alter_column('user_presence', 'connected_at',
+               existing_type=sa.VARCHAR(),
+               type_=sa.DateTime(timezone=True),
+               existing_nullable=False,
+               postgresql_using='connected_at::timestamptz')
+    op.alter_column('user_presence', 'disconnected_at',
+               existing_type=sa.VARCHAR(),
+               type_=sa.DateTime(timezone=True),
+               existing_nullable=True,
+               postgresql_using='disconnected_at::timestamptz')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('user_presence', 'disconnected_at',
+               existing_type=sa.DateTime(timezone=True),
+               type_=sqlmodel.sql.sqltypes.AutoString(),
+               existing_nullable=True,
+               postgresql_using=f"to_char(disconnected_at AT TIME ZONE 'UTC', '{ISO_FORMAT}')")
+    op.alter_column('user_presence', 'connected_at',
+               existing_type=sa.DateTime(timezone=True),
+               type_=sqlmodel.sql.sqltypes.AutoString(),
+               existing_nullable=False,
+               postgresql_using=f"to_char(connected_at AT TIME ZONE 'UTC', '{ISO_FORMAT}')")
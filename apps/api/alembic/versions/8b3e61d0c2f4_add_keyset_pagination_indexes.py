@@ -0,0 +1,40 @@
+"""add keyset pagination indexes
+
+Revision ID: 8b3e61d0c2f4
+Revises: 4f1c2d7a9b30
+Create Date: 2026-10-18 11:03:27.514096
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e61d0c2f4'
+down_revision: Union[str, Sequence[str], None] = '4f1c2d7a9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_post_type_is_pinned_created_at_id', 'post', ['type', 'is_pinned', 'created_at', 'id'], unique=False)
+    op.create_index('ix_notification_recipient_id_created_at_id', 'notification', ['recipient_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_broadcast_created_at_id', 'broadcast', ['created_at', 'id'], unique=False)
+    op.create_index('ix_user_created_at_id', 'user', ['created_at', 'id'], unique=False)
+    op.create_index('ix_invite_code_created_at_id', 'invite_code', ['created_at', 'id'], unique=False)
+    op.create_index('ix_enrolledcourse_created_at_id', 'enrolledcourse', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_enrolledcourse_created_at_id', table_name='enrolledcourse')
+    op.drop_index('ix_invite_code_created_at_id', table_name='invite_code')
+    op.drop_index('ix_user_created_at_id', table_name='user')
+    op.drop_index('ix_broadcast_created_at_id', table_name='broadcast')
+    op.drop_index('ix_notification_recipient_id_created_at_id', table_name='notification')
+    op.drop_index('ix_post_type_is_pinned_created_at_id', table_name='post')
@@ -0,0 +1,34 @@
+"""notification unread index
+
+Revision ID: 9d4b6e1f3a58
+Revises: 5c7f2a9e0b14
+Create Date: 2026-10-18 19:03:52.861093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b6e1f3a58'
+down_revision: Union[str, Sequence[str], None] = '5c7f2a9e0b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so notifications can still be written while it builds
+    with op.get_context().autocommit_block():
+        op.create_index('ix_notification_unread_recipient_id', 'notification', ['recipient_id'], unique=False,
+                        postgresql_where=sa.text('NOT is_read AND deleted_at IS NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notification_unread_recipient_id', table_name='notification')
@@ -0,0 +1,121 @@
+"""native timestamp columns
+
+Revision ID: b58e0f3a7c21
+Revises: 7a2d9e4c1b63
+Create Date: 2026-10-18 16:27:09.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58e0f3a7c21'
+down_revision: Union[str, Sequence[str], None] = '7a2d9e4c1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, nullable, index name)
+COLUMNS = [
+    ('refresh_token', 'expires_at', False, None),
+    ('refresh_token', 'last_used_at', True, None),
+    ('invite_code', 'expires_at', True, None),
+    ('password_reset', 'expires_at', False, None),
+    ('email_verification', 'expires_at', False, None),
+    ('pending_notification_email', 'scheduled_for', False, 'ix_pending_notification_email_scheduled_for'),
+    ('broadcast', 'sent_at', True, None),
+    ('broadcast_recipient', 'sent_at', True, None),
+    ('enrolledcourse', 'enrolled_at', True, None),
+    ('enrolledcourse', 'completed_at', True, None),
+]
+BATCH_SIZE = 5000
+ISO_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'
+
+
+# Session-scoped cast that yields NULL instead of aborting on values the old text columns
+# accepted but Postgres cannot parse; strings without an offset were always written as UTC,
+# so they are read as UTC rather than in the session TimeZone.
+PARSE_FUNCTION = r"""
+CREATE FUNCTION pg_temp.parse_utc_timestamp(value text) RETURNS timestamptz AS $$
+BEGIN
+    IF value IS NULL OR btrim(value) = '' THEN
+        RETURN NULL;
+    END IF;
+    IF value ~* '\d{2}:\d{2}(:\d{2}(\.\d+)?)?\s*(z|utc|[+-]\d{2}(:?\d{2})?)$' THEN
+        RETURN value::timestamptz;
+    END IF;
+    RETURN value::timestamp AT TIME ZONE 'UTC';
+EXCEPTION WHEN data_exception THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql STABLE
+"""
+
+
+def _parsed(column: str, nullable: bool) -> str:
+    parsed = f"pg_temp.parse_utc_timestamp({column})"
+    # Required expiries and schedules that cannot be read fall due now, as the app treated them
+    return parsed if nullable else f"COALESCE({parsed}, now())"
+
+
+def _backfill(table: str, column: str, nullable: bool) -> None:
+    """Copy one column into its timestamptz twin in short batches, each committed on its own."""
+    bind = op.get_bind()
+    after = ''
+    while True:
+        ids = bind.execute(
+            sa.text(f"SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :limit"),
+            {'after': after, 'limit': BATCH_SIZE},
+        ).scalars().all()
+        if not ids:
+            return
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {column}_tz = {_parsed(column, nullable)} WHERE id = ANY(:ids)"),
+            {'ids': list(ids)},
+        )
+        after = ids[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(PARSE_FUNCTION)
+    # validate_invite_code treated an unreadable expiry as expired; keep that once it becomes NULL
+    op.execute(
+        "UPDATE invite_code SET status = 'EXPIRED' "
+        "WHERE btrim(coalesce(expires_at, '')) <> '' "
+        "AND pg_temp.parse_utc_timestamp(expires_at) IS NULL"
+    )
+
+    # Backfill new columns outside the migration transaction so no table is locked for long
+    for table, column, _, _ in COLUMNS:
+        op.add_column(table, sa.Column(f'{column}_tz', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        for table, column, nullable, index in COLUMNS:
+            _backfill(table, column, nullable)
+            if index:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index}_tz ON {table} ({column}_tz)")
+
+    # Swap the columns in, catching up rows the running app wrote during the backfill
+    for table, column, nullable, index in COLUMNS:
+        op.execute(
+            f"UPDATE {table} SET {column}_tz = {_parsed(column, nullable)} "
+            f"WHERE {column}_tz IS DISTINCT FROM {_parsed(column, nullable)}"
+        )
+        op.drop_column(table, column)
+        op.alter_column(table, f'{column}_tz', new_column_name=column, nullable=nullable)
+        if index:
+            op.execute(f"ALTER INDEX {index}_tz RENAME TO {index}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, nullable, _ in reversed(COLUMNS):
+        op.alter_column(table, column,
+                   existing_type=sa.DateTime(timezone=True),
+                   type_=sqlmodel.sql.sqltypes.AutoString(),
+                   existing_nullable=nullable,
+                   postgresql_using=f"to_char({column} AT TIME ZONE 'UTC', '{ISO_FORMAT}')")
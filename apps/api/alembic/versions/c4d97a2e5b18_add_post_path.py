@@ -0,0 +1,48 @@
+"""add post path
+
+Revision ID: c4d97a2e5b18
+Revises: 8b3e61d0c2f4
+Create Date: 2026-10-18 12:41:09.337215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d97a2e5b18'
+down_revision: Union[str, Sequence[str], None] = '8b3e61d0c2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post', sa.Column('path', sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default=''))
+
+    # Materialize the root-to-post id path for every existing post
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, CAST(id AS TEXT) AS path
+            FROM post
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT p.id, t.path || '/' || p.id
+            FROM post p
+            JOIN tree t ON p.parent_id = t.id
+        )
+        UPDATE post SET path = tree.path
+        FROM tree
+        WHERE post.id = tree.id
+    """)
+    op.create_index('ix_post_path', 'post', ['path'], unique=False, postgresql_ops={'path': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_path', table_name='post')
+    op.drop_column('post', 'path')
@@ -0,0 +1,34 @@
+"""add post root_id
+
+Revision ID: e1a5f3c80d27
+Revises: c4d97a2e5b18
+Create Date: 2026-10-18 13:20:52.774160
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a5f3c80d27'
+down_revision: Union[str, Sequence[str], None] = 'c4d97a2e5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post', sa.Column('root_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    # The first segment of the materialized path is the thread root
+    op.execute("UPDATE post SET root_id = split_part(path, '/', 1) WHERE path <> ''")
+    op.create_index(op.f('ix_post_root_id'), 'post', ['root_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_post_root_id'), table_name='post')
+    op.drop_column('post', 'root_id')
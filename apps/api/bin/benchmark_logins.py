@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from sqlmodel import Session, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.settings import settings
+from src.database.engine import async_engine, engine
+from src.database.models import User
+from src.main import app
+from src.modules.auth.auth_methods import hash_password
+
+USERNAME = "benchmark-login"
+PASSWORD = "benchmark-password"
+
+
+def ensure_user():
+    """Create the benchmark user, or reset its password to the current cost factor."""
+    with Session(engine) as db:
+        user = db.exec(select(User).where(User.username == USERNAME)).first()
+        if user is None:
+            user = User(
+                username=USERNAME,
+                email=f"{USERNAME}@example.com",
+                is_active=True,
+                is_verified=True,
+            )
+            db.add(user)
+        user.password = hash_password(PASSWORD)
+        db.commit()
+
+
+async def run_load(logins: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def login():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/login", json={"username": USERNAME, "password": PASSWORD}
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[login() for _ in range(logins)])
+        elapsed = time.perf_counter() - started
+
+    await async_engine.dispose()
+
+    latencies.sort()
+    return {
+        "throughput": logins / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def benchmark(logins: int, concurrency_levels: list[int]):
+    ensure_user()
+    print(
+        f"bcrypt rounds {settings.BCRYPT_ROUNDS}, "
+        f"{settings.PASSWORD_HASH_WORKERS} password hash workers"
+    )
+    for concurrency in concurrency_levels:
+        result = asyncio.run(run_load(logins, concurrency))
+        print(
+            f"concurrency {concurrency:>4}: {result['throughput']:8.1f} logins/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure login throughput at several concurrency levels."
+    )
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    benchmark(args.logins, args.concurrency)
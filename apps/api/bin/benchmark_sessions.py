@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.database.engine import (
+    async_engine,
+    engine,
+    get_async_session,
+    get_session,
+)
+from src.database.models import Post
+
+# The same page of posts served from a def handler on a sync session, which
+# runs on the threadpool, and from an async handler on an async session
+sync_app = FastAPI()
+async_app = FastAPI()
+
+
+def page_statement(limit: int):
+    return (
+        select(Post)
+        .where(col(Post.deleted_at).is_(None))
+        .order_by(col(Post.created_at).desc())
+        .limit(limit)
+    )
+
+
+@sync_app.get("/api/posts/")
+def sync_feed(limit: int = 20, db: Session = Depends(get_session)):
+    return db.exec(page_statement(limit)).all()
+
+
+@async_app.get("/api/posts/")
+async def async_feed(limit: int = 20, db: AsyncSession = Depends(get_async_session)):
+    return (await db.exec(page_statement(limit))).all()
+
+
+async def run_load(target: FastAPI, requests: int, concurrency: int, limit: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=target)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/posts/", params={"limit": limit})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        # Warm up the pools before measuring
+        await asyncio.gather(*[fetch() for _ in range(concurrency)])
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[fetch() for _ in range(requests)])
+        elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    await async_engine.dispose()
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def benchmark(requests: int, concurrency: int, limit: int):
+    for name, target in (("sync session", sync_app), ("async session", async_app)):
+        result = asyncio.run(run_load(target, requests, concurrency, limit))
+        print(
+            f"{name:>14}: {result['throughput']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load a page of posts through the sync and async session paths."
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.requests, args.concurrency, args.limit)
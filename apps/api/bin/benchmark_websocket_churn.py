@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.api.websocket.connection_manager import ConnectionManager
+
+
+class IdleSocket:
+    """A connected socket that never receives anything during the benchmark"""
+
+    client_state = type("State", (), {"name": "CONNECTED"})()
+
+
+def full_scan_teardown(manager: ConnectionManager, connection_id: str):
+    """What disconnect cost before the reverse indexes: a pass over every subscription"""
+    for connections in manager.user_subscriptions.values():
+        if connection_id in connections:
+            pass
+    for connections in manager.event_subscriptions.values():
+        if connection_id in connections:
+            pass
+
+
+def full_scan_user_connections(manager: ConnectionManager, user_id: str):
+    """What get_user_connections cost before the reverse indexes"""
+    return [
+        connection_id
+        for connection_id, connection in manager.active_connections.items()
+        if connection.user_id == user_id
+    ]
+
+
+async def open_connection(manager: ConnectionManager, number: int, users: int):
+    connection_id = f"conn-{number}"
+    manager.register(IdleSocket(), connection_id, f"user-{number % users}")
+    for _ in range(3):
+        await manager.subscribe_to_user(
+            connection_id, f"user-{random.randrange(users)}"
+        )
+    for _ in range(2):
+        await manager.subscribe_to_event(
+            connection_id, f"event-{random.randrange(500)}"
+        )
+
+
+def per_op(started: float, operations: int) -> float:
+    return (time.perf_counter() - started) / operations * 1_000_000
+
+
+async def churn(connections: int, operations: int):
+    manager = ConnectionManager()
+    users = max(connections // 2, 1)
+    for number in range(connections):
+        await open_connection(manager, number, users)
+
+    live = list(manager.active_connections)
+    started = time.perf_counter()
+    for number in range(connections, connections + operations):
+        # Swap the victim out of the live list so picking one stays O(1)
+        index = random.randrange(len(live))
+        live[index], live[-1] = live[-1], live[index]
+        manager.unregister(live.pop())
+        await open_connection(manager, number, users)
+        live.append(f"conn-{number}")
+    churn_us = per_op(started, operations)
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        full_scan_teardown(manager, random.choice(live))
+    scan_us = per_op(started, operations)
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        manager.get_user_connections(f"user-{random.randrange(users)}")
+    lookup_us = per_op(started, operations)
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        full_scan_user_connections(manager, f"user-{random.randrange(users)}")
+    lookup_scan_us = per_op(started, operations)
+
+    print(
+        f"{connections:>7} connections: churn {churn_us:8.1f} us/op "
+        f"(full-scan teardown alone {scan_us:9.1f} us)  "
+        f"user lookups {lookup_us:8.1f} us/op (full scan {lookup_scan_us:9.1f} us)"
+    )
+
+    for connection_id in list(manager.active_connections):
+        manager.unregister(connection_id)
+
+
+def benchmark(sizes: list[int], operations: int):
+    for connections in sizes:
+        asyncio.run(churn(connections, operations))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Connect and disconnect WebSocket clients against a busy manager."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.operations)
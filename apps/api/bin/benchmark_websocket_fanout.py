@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.api.websocket.connection_manager import ConnectionManager
+
+MESSAGE = {
+    "type": "event_updated",
+    "data": {"event_id": "event-1", "title": "Community call", "attendees": 10000},
+}
+
+
+class SimulatedSocket:
+    """A client socket whose writes take a fixed amount of time"""
+
+    def __init__(self, latency: float, on_delivered=None):
+        self.latency = latency
+        self.on_delivered = on_delivered
+        self.client_state = type("State", (), {"name": "CONNECTED"})()
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.latency)
+        if self.on_delivered:
+            self.on_delivered()
+
+    async def send_json(self, message: dict):
+        await self.send_text(json.dumps(message))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def build_sockets(subscribers: int, slow: int, latency: float, slow_latency: float):
+    delivered = []
+    sockets = [
+        SimulatedSocket(latency, lambda: delivered.append(time.perf_counter()))
+        for _ in range(subscribers - slow)
+    ]
+    sockets += [SimulatedSocket(slow_latency) for _ in range(slow)]
+    return sockets, delivered
+
+
+def report(name: str, started: float, delivered: list[float]):
+    latencies = sorted((at - started) * 1000 for at in delivered)
+    print(
+        f"{name:>10}: {len(latencies)} fast subscribers reached in {latencies[-1]:9.1f} ms  "
+        f"p50 {latencies[len(latencies) // 2]:9.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:9.1f} ms"
+    )
+
+
+async def sequential(subscribers: int, slow: int, latency: float, slow_latency: float):
+    """The old broadcast: encode and await every socket one after another"""
+    sockets, delivered = build_sockets(subscribers, slow, latency, slow_latency)
+    # Slow sockets sit in the middle of the subscriber set, as they would in practice
+    sockets = (
+        sockets[: len(sockets) // 2]
+        + sockets[-slow:]
+        + sockets[len(sockets) // 2 : -slow]
+    )
+    started = time.perf_counter()
+    for websocket in sockets:
+        await websocket.send_json(MESSAGE)
+    report("sequential", started, delivered)
+
+
+async def fan_out(subscribers: int, slow: int, latency: float, slow_latency: float):
+    """The manager's broadcast: encode once and let each socket's sender drain its queue"""
+    sockets, delivered = build_sockets(subscribers, slow, latency, slow_latency)
+    manager = ConnectionManager()
+    for i, websocket in enumerate(sockets):
+        manager.register(websocket, f"conn-{i}", f"user-{i}")
+        await manager.subscribe_to_event(f"conn-{i}", "event-1")
+
+    started = time.perf_counter()
+    await manager.deliver_to_event_subscribers("event-1", MESSAGE)
+    while len(delivered) < subscribers - slow:
+        await asyncio.sleep(0.001)
+    report("fan-out", started, delivered)
+
+
+def benchmark(subscribers: int, slow: int, latency_ms: float, slow_latency_ms: float):
+    args = (subscribers, slow, latency_ms / 1000, slow_latency_ms / 1000)
+    print(
+        f"{subscribers} subscribers on one event, {slow} of them taking {slow_latency_ms:.0f} ms per write"
+    )
+    asyncio.run(fan_out(*args))
+    asyncio.run(sequential(*args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Broadcast one event to many WebSocket subscribers."
+    )
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--slow", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+    benchmark(args.subscribers, args.slow, args.latency_ms, args.slow_latency_ms)
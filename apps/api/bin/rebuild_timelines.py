@@ -0,0 +1,22 @@
+import os
+import sys
+
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.redis_client import get_redis
+from src.database.engine import engine
+from src.modules.post.post_timeline_methods import rebuild_timelines
+
+
+def rebuild():
+    if not get_redis():
+        print("REDIS_URL is not configured, nothing to rebuild.")
+        return
+    with Session(engine) as session:
+        rebuilt = rebuild_timelines(session)
+        print(f"Rebuilt {rebuilt} timelines.")
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,18 @@
+import os
+import sys
+
+from sqlmodel import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.database.engine import engine
+from src.modules.post.post_counter_methods import reconcile_post_counters
+
+
+def reconcile():
+    with Session(engine) as session:
+        fixed = reconcile_post_counters(session)
+        print(f"Reconciled counters for {fixed} posts.")
+
+
+if __name__ == "__main__":
+    reconcile()
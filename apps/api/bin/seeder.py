@@ -5,8 +5,18 @@ from sqlmodel import Session
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.database.engine import engine
-from src.database.models import Media, Post, PostType, Reaction, Role, User
+from src.database.models import (
+    Media,
+    Post,
+    PostReactionCount,
+    PostType,
+    Reaction,
+    Role,
+    User,
+)
 from src.modules.auth.auth_methods import hash_password
+from src.modules.post.post_counter_methods import reconcile_post_counters
+from src.modules.post.post_timeline_methods import rebuild_timelines
 
 
 def create_users_and_posts():
@@ -15,6 +25,10 @@ def create_users_and_posts():
         # Delete all existing data in reverse order of dependencies
         from sqlmodel import select
 
+        reaction_counts = session.exec(select(PostReactionCount)).all()
+        for reaction_count in reaction_counts:
+            session.delete(reaction_count)
+
         reactions = session.exec(select(Reaction)).all()
         for reaction in reactions:
             session.delete(reaction)
@@ -449,6 +463,8 @@ def create_users_and_posts():
             session.add(reaction)
 
         session.commit()
+        reconcile_post_counters(session)
+        rebuild_timelines(session)
         print("Seeded users, posts, comments, and reactions from dummy data.")
 
 
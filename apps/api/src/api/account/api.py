@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -16,52 +16,71 @@ from src.core.settings import settings
 from src.database.engine import get_session as get_db
 from src.database.models import Role, User, UserSettings, UserSocial
 from src.modules.auth.auth_methods import get_user_sessions, revoke_session_by_id
+from src.modules.auth.principal_methods import Principal, get_principal
 from src.modules.user.user_methods import get_user_by_username
 
 from .serializer import UserResponse
 
 router = APIRouter()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current user from JWT token."""
+def authenticate_token(token: str, db: Session) -> Optional[Principal]:
+    """Resolve an access token to the caller's principal, or None if it is not valid."""
     try:
         payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
     except jwt.PyJWTError:
+        return None
+    if payload.get("type") != "access":
+        return None
+
+    user_id = payload.get("uid")
+    if user_id is None:
+        # Tokens issued before the uid claim only carry the username
+        user = get_user_by_username(db, payload.get("sub") or "")
+        if user is None:
+            return None
+        user_id = user.id
+
+    principal = get_principal(db, user_id)
+    if principal is None or not principal.is_active:
+        return None
+    if payload.get("ver", 0) != principal.token_version:
+        return None
+    return principal
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Get the authenticated caller from the JWT without loading their User row."""
+    principal = authenticate_token(credentials.credentials, db)
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return principal
 
-    user = get_user_by_username(db, username)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return user
+
+def get_current_user_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db),
+) -> Optional[Principal]:
+    """Get the authenticated caller if a valid token was sent, otherwise None."""
+    if not credentials:
+        return None
+    return authenticate_token(credentials.credentials, db)
 
 
 def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current user and verify they are an admin."""
     if current_user.role != Role.ADMIN:
         raise HTTPException(
@@ -73,7 +92,7 @@ def get_current_admin(
 
 @router.get("/account", response_model=UserResponse)
 def get_account(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)
 ):
     """Get current user account information."""
     # Load user with user_settings and user_social relationships
@@ -141,7 +160,7 @@ def get_account(
 
 @router.get("/account/sessions", response_model=List[SessionResponse])
 def get_sessions(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)
 ):
     """Get all active sessions for the current user."""
     sessions = get_user_sessions(db, current_user.id)
@@ -165,7 +184,7 @@ def get_sessions(
 @router.post("/account/sessions/revoke", response_model=RevokeSessionResponse)
 def revoke_session(
     request: RevokeSessionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Revoke a specific session by ID."""
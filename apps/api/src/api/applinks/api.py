@@ -5,7 +5,7 @@ from sqlmodel import Session
 
 from src.api.account.api import get_current_user
 from src.database.engine import get_session as get_db
-from src.database.models import User
+from src.modules.auth.principal_methods import Principal
 
 from .serializer import AppLinkCreate, AppLinkResponse, AppLinkUpdate
 
@@ -16,7 +16,7 @@ router = APIRouter()
 def create_app_link_endpoint(
     app_link: AppLinkCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new app link (admin only)."""
     if current_user.role != "admin":
@@ -61,7 +61,7 @@ def update_app_link_endpoint(
     app_link_id: str,
     app_link: AppLinkUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update an app link (admin only)."""
     if current_user.role != "admin":
@@ -84,7 +84,7 @@ def update_app_link_endpoint(
 def delete_app_link_endpoint(
     app_link_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete an app link (admin only)."""
     if current_user.role != "admin":
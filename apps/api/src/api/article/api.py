@@ -6,7 +6,6 @@ from sqlmodel import Session
 from src.api.account.api import get_current_user
 from src.api.article.serializer import ArticleCreate, ArticleResponse, ArticleUpdate
 from src.database.engine import get_session
-from src.database.models import User
 from src.modules.article.article_methods import (
     create_article,
     delete_article,
@@ -15,15 +14,27 @@ from src.modules.article.article_methods import (
     get_articles_by_user,
     update_article,
 )
-from src.modules.post.post_methods import get_comment_summary, get_reactions_summary
+from src.modules.auth.principal_methods import Principal
+from src.modules.post.post_methods import (
+    get_comment_summary,
+    get_post_summaries,
+    get_reactions_summary,
+)
 
 router = APIRouter()
 
 
 def build_article_response_data(
-    article, current_user_id: Optional[str], db: Session
+    article, current_user_id: Optional[str], db: Session, summary: Optional[dict] = None
 ) -> dict:
     """Helper function to build article response data with relationships and reactions."""
+    if summary is None:
+        summary = {
+            "comment_count": article.comment_count,
+            "reaction_count": article.reaction_count,
+            "reactions": get_reactions_summary(db, article.id, current_user_id),
+            "comment_summary": get_comment_summary(db, article.id, current_user_id),
+        }
     return {
         "id": article.id,
         "title": article.title,
@@ -37,10 +48,10 @@ def build_article_response_data(
         "medias": article.medias,
         "created_at": article.created_at,
         "updated_at": article.updated_at,
-        "comment_count": article.comment_count,
-        "reaction_count": article.reaction_count,
-        "reactions": get_reactions_summary(db, article.id, current_user_id),
-        "comment_summary": get_comment_summary(db, article.id, current_user_id),
+        "comment_count": summary["comment_count"],
+        "reaction_count": summary["reaction_count"],
+        "reactions": summary["reactions"],
+        "comment_summary": summary["comment_summary"],
     }
 
 
@@ -48,7 +59,7 @@ def build_article_response_data(
 def create_article_endpoint(
     article: ArticleCreate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new article."""
     article_data = article.model_dump()
@@ -89,9 +100,12 @@ def get_all_articles_endpoint(
     else:
         articles = get_all_articles(db, skip, limit)
 
+    summaries = get_post_summaries(db, [article.id for article in articles])
     response_articles = []
     for article in articles:
-        article_response_data = build_article_response_data(article, None, db)
+        article_response_data = build_article_response_data(
+            article, None, db, summaries[article.id]
+        )
         response_articles.append(ArticleResponse(**article_response_data))
     return response_articles
 
@@ -101,7 +115,7 @@ def update_article_endpoint(
     article_id: str,
     article: ArticleUpdate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update an article."""
     update_data = {k: v for k, v in article.model_dump().items() if v is not None}
@@ -122,7 +136,7 @@ def update_article_endpoint(
 def delete_article_endpoint(
     article_id: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete an article."""
     if not delete_article(db, article_id):
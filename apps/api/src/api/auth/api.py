@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from loguru import logger
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
 from src.core.settings import settings
 from src.database.engine import get_session as get_db
@@ -25,6 +26,7 @@ from src.modules.auth.github_methods import (
     handle_github_callback,
 )
 from src.modules.auth.password_reset_methods import reset_user_password
+from src.modules.auth.principal_methods import access_token_claims
 from src.modules.user.user_methods import get_admin_count, promote_user_to_admin
 
 from .serializer import (
@@ -118,9 +120,13 @@ def get_device_info(request: Request) -> DeviceInfo:
 router = APIRouter()
 
 
+# The password endpoints are async so they wait for bcrypt on the password pool
+# without holding a threadpool thread; their database work runs on the threadpool
 @router.post("/register")
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
-    app_settings = appsettings_methods.get_active_app_settings(db)
+async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+    app_settings = await run_in_threadpool(
+        appsettings_methods.get_active_app_settings, db
+    )
     if app_settings and not app_settings.enable_sign_up:
         raise HTTPException(
             status_code=403,
@@ -128,7 +134,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         )
 
     try:
-        user = register_user(
+        user = await register_user(
             db,
             request.username,
             request.email,
@@ -140,7 +146,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except IntegrityError as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         error_msg = str(e.orig)
         if "email" in error_msg.lower():
             raise HTTPException(status_code=409, detail="Email already registered")
@@ -152,10 +158,10 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/register-admin")
-def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
     """Register a new admin user - only allowed if no admin exists (admin_count == 0)."""
 
-    admin_count = get_admin_count(db)
+    admin_count = await run_in_threadpool(get_admin_count, db)
     if admin_count > 0:
         raise HTTPException(
             status_code=403,
@@ -163,7 +169,7 @@ def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
         )
 
     try:
-        user = register_user(
+        user = await register_user(
             db,
             request.username,
             request.email,
@@ -172,7 +178,7 @@ def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
             request.invite_code,
         )
 
-        promoted_user = promote_user_to_admin(db, user.id)
+        promoted_user = await run_in_threadpool(promote_user_to_admin, db, user.id)
         if not promoted_user:
             raise HTTPException(
                 status_code=500, detail="Failed to promote user to admin"
@@ -182,7 +188,7 @@ def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except IntegrityError as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         error_msg = str(e.orig)
         if "email" in error_msg.lower():
             raise HTTPException(status_code=409, detail="Email already registered")
@@ -194,10 +200,12 @@ def register_admin(request: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(request: LoginRequest, http_request: Request, db: Session = Depends(get_db)):
+async def login(
+    request: LoginRequest, http_request: Request, db: Session = Depends(get_db)
+):
     from src.modules.user.user_methods import get_user_by_username
 
-    user = get_user_by_username(db, request.username)
+    user = await run_in_threadpool(get_user_by_username, db, request.username)
     if user and not user.is_active:
         raise HTTPException(
             status_code=403,
@@ -205,7 +213,7 @@ def login(request: LoginRequest, http_request: Request, db: Session = Depends(ge
         )
 
     device_info = get_device_info(http_request)
-    result = login_user(db, request.username, request.password, device_info)
+    result = await login_user(db, request.username, request.password, device_info)
     if not result:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return result
@@ -220,7 +228,7 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
     return RefreshTokenResponse(access_token=access_token, token_type="bearer")
 
@@ -273,7 +281,7 @@ async def github_callback(
         device_info = get_device_info(http_request)
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data=access_token_claims(user), expires_delta=access_token_expires
         )
         refresh_token = create_refresh_token(db, user.id, device_info)
 
@@ -345,7 +353,7 @@ async def google_callback(
         device_info = get_device_info(http_request)
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data=access_token_claims(user), expires_delta=access_token_expires
         )
         refresh_token = create_refresh_token(db, user.id, device_info)
 
@@ -385,12 +393,12 @@ def reset_password_endpoint(
 
 
 @router.post("/confirm-reset-password", response_model=ConfirmResetPasswordResponse)
-def confirm_reset_password_endpoint(
+async def confirm_reset_password_endpoint(
     request: ConfirmResetPasswordRequest, db: Session = Depends(get_db)
 ):
     """Reset user password using a reset code."""
     try:
-        success = reset_user_password(db, request.code, request.new_password)
+        success = await reset_user_password(db, request.code, request.new_password)
         if not success:
             raise HTTPException(status_code=400, detail="Invalid or expired reset code")
         return {"message": "Password reset successfully"}
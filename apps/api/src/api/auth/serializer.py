@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel
@@ -112,7 +113,7 @@ class SessionResponse(BaseModel):
     os: Optional[str] = None
     ip_address: Optional[str] = None
     created_at: str
-    last_used_at: Optional[str] = None
+    last_used_at: Optional[datetime] = None
 
 
 class RevokeSessionRequest(BaseModel):
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session
 
 from src.api.account.api import get_current_user
@@ -10,8 +10,10 @@ from src.api.broadcast.serializer import (
     BroadcastSendTest,
     BroadcastUpdate,
 )
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from src.database.engine import get_session
-from src.database.models import BroadcastRecipientType, BroadcastStatus, Role, User
+from src.database.models import BroadcastRecipientType, BroadcastStatus, Role
+from src.modules.auth.principal_methods import Principal
 from src.modules.broadcast.broadcast_methods import (
     create_broadcast,
     create_broadcast_recipients,
@@ -28,7 +30,7 @@ from src.modules.broadcast.broadcast_tasks import send_broadcast_task
 router = APIRouter()
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Require admin role for access."""
     if current_user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -60,7 +62,7 @@ def build_broadcast_response(broadcast) -> dict:
 def create_broadcast_endpoint(
     broadcast: BroadcastCreate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Create a new broadcast."""
     broadcast_data = broadcast.model_dump()
@@ -78,13 +80,20 @@ def create_broadcast_endpoint(
 
 @router.get("/broadcasts/", response_model=List[BroadcastResponse])
 def get_all_broadcasts_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
-    """Get all broadcasts."""
-    broadcasts = get_all_broadcasts(db, skip, limit)
+    """Get a page of broadcasts."""
+    try:
+        broadcasts, next_cursor = get_all_broadcasts(db, skip, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [BroadcastResponse(**build_broadcast_response(b)) for b in broadcasts]
 
 
@@ -92,7 +101,7 @@ def get_all_broadcasts_endpoint(
 def get_broadcast_endpoint(
     broadcast_id: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Get a broadcast by ID."""
     broadcast = get_broadcast(db, broadcast_id)
@@ -106,7 +115,7 @@ def update_broadcast_endpoint(
     broadcast_id: str,
     broadcast: BroadcastUpdate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Update a broadcast."""
     existing = get_broadcast(db, broadcast_id)
@@ -132,7 +141,7 @@ def update_broadcast_endpoint(
 def delete_broadcast_endpoint(
     broadcast_id: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Delete a broadcast."""
     if not delete_broadcast(db, broadcast_id):
@@ -145,7 +154,7 @@ def send_test_broadcast_endpoint(
     broadcast_id: str,
     test_data: BroadcastSendTest,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Send a test broadcast to a specific email."""
     broadcast = get_broadcast(db, broadcast_id)
@@ -165,7 +174,7 @@ def send_test_broadcast_endpoint(
 def send_broadcast_endpoint(
     broadcast_id: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Send broadcast to users based on recipient type."""
     broadcast = get_broadcast(db, broadcast_id)
@@ -36,7 +36,7 @@ class BroadcastResponse(BaseModel):
     channel_id: Optional[str] = None
     channel: Optional[ChannelResponse] = None
     status: str
-    sent_at: Optional[str] = None
+    sent_at: Optional[datetime] = None
     sent_count: int = 0
     failed_count: int = 0
     created_by: str
@@ -1,13 +1,14 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security import HTTPBearer
 from sqlmodel import Session
 
-from src.api.account.api import get_current_user
+from src.api.account.api import get_current_user, get_current_user_optional
 from src.api.resources.serializer import ResourceResponse
 from src.database.engine import get_session as get_db
-from src.database.models import Role, User
+from src.database.models import Role
+from src.modules.auth.principal_methods import Principal
 from src.modules.channels.channels_methods import (
     create_channel,
     delete_channel,
@@ -26,40 +27,11 @@ router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
-    """Get current user from JWT token if provided, otherwise return None."""
-    if not credentials:
-        return None
-
-    try:
-        import jwt
-
-        from src.core.settings import settings
-        from src.modules.user.user_methods import get_user_by_username
-
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-
-        user = get_user_by_username(db, username)
-        return user
-    except Exception:
-        return None
-
-
 @router.post("/channels/", response_model=ChannelResponse)
 def create_channel_endpoint(
     channel: ChannelCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     channel_data = channel.model_dump()
     return create_channel(db, channel_data)
@@ -69,7 +41,7 @@ def create_channel_endpoint(
 def get_channel_endpoint(
     channel_id: str,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     channel = get_channel(db, channel_id)
     if not channel:
@@ -97,7 +69,7 @@ def get_all_channels_endpoint(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     user_id = current_user.id if current_user else None
     return get_all_channels(db, skip, limit, user_id)
@@ -108,7 +80,7 @@ def update_channel_endpoint(
     channel_id: str,
     channel: ChannelUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Check if user has access to this channel before updating
     existing_channel = get_channel(db, channel_id)
@@ -135,7 +107,7 @@ def update_channel_endpoint(
 def delete_channel_endpoint(
     channel_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Check if user has access to this channel before deleting
     existing_channel = get_channel(db, channel_id)
@@ -162,7 +134,7 @@ def delete_channel_endpoint(
 def get_resources_by_channel_endpoint(
     channel_slug: str,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     from src.modules.channels.channels_methods import get_channel_by_slug
 
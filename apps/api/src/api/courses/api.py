@@ -1,11 +1,13 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session
 
-from src.api.channels.api import get_current_user_optional
+from src.api.account.api import get_current_user_optional
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from src.database.engine import get_read_session
 from src.database.engine import get_session as get_db
-from src.database.models import User
+from src.modules.auth.principal_methods import Principal
 from src.modules.courses.courses_methods import (
     # Course methods
     create_course,
@@ -66,7 +68,7 @@ def create_course_endpoint(course: CourseCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/courses/{course_id}", response_model=CourseResponse)
-def get_course_endpoint(course_id: str, db: Session = Depends(get_db)):
+def get_course_endpoint(course_id: str, db: Session = Depends(get_read_session)):
     course = get_course(db, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -80,8 +82,8 @@ def get_all_courses_endpoint(
     limit: int = 100,
     instructor_id: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_session),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     return get_all_courses(db, skip, limit, instructor_id, status, current_user)
 
@@ -90,7 +92,7 @@ def get_all_courses_endpoint(
 def get_featured_courses_endpoint(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_session),
 ):
     return get_featured_courses(db, skip, limit)
 
@@ -121,7 +123,7 @@ def create_section_endpoint(section: SectionCreate, db: Session = Depends(get_db
 
 
 @router.get("/sections/{section_id}", response_model=SectionResponse)
-def get_section_endpoint(section_id: str, db: Session = Depends(get_db)):
+def get_section_endpoint(section_id: str, db: Session = Depends(get_read_session)):
     section = get_section(db, section_id)
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
@@ -133,7 +135,7 @@ def get_all_sections_endpoint(
     skip: int = 0,
     limit: int = 100,
     course_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_session),
 ):
     return get_all_sections(db, skip, limit, course_id)
 
@@ -164,7 +166,7 @@ def create_lesson_endpoint(lesson: LessonCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/lessons/{lesson_id}", response_model=LessonWithSectionCourseResponse)
-def get_lesson_endpoint(lesson_id: str, db: Session = Depends(get_db)):
+def get_lesson_endpoint(lesson_id: str, db: Session = Depends(get_read_session)):
     lesson = get_lesson(db, lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
@@ -177,7 +179,7 @@ def get_all_lessons_endpoint(
     limit: int = 100,
     section_id: Optional[str] = None,
     type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_session),
 ):
     return get_all_lessons(db, skip, limit, section_id, type)
 
@@ -219,14 +221,24 @@ def get_enrollment_endpoint(enrollment_id: str, db: Session = Depends(get_db)):
 
 @router.get("/enrollments/", response_model=List[EnrolledCourseResponse])
 def get_all_enrollments_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[str] = None,
     course_id: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    return get_all_enrollments(db, skip, limit, user_id, course_id, status)
+    try:
+        enrollments, next_cursor = get_all_enrollments(
+            db, skip, limit, user_id, course_id, status, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return enrollments
 
 
 @router.put("/enrollments/{enrollment_id}", response_model=EnrolledCourseResponse)
@@ -164,16 +164,16 @@ class EnrolledCourseCreate(BaseModel):
     user_id: str
     course_id: str
     status: EnrollmentStatus = EnrollmentStatus.ACTIVE
-    enrolled_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
 
 
 class EnrolledCourseUpdate(BaseModel):
     user_id: Optional[str] = None
     course_id: Optional[str] = None
     status: Optional[EnrollmentStatus] = None
-    enrolled_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
 
 
 class CourseEnrollmentResponse(BaseModel):
@@ -182,8 +182,8 @@ class CourseEnrollmentResponse(BaseModel):
     id: str
     user_id: str
     status: EnrollmentStatus
-    enrolled_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -198,8 +198,8 @@ class EnrolledCourseCreateResponse(BaseModel):
     user_id: str
     course_id: str
     status: EnrollmentStatus
-    enrolled_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -212,8 +212,8 @@ class EnrolledCourseResponse(BaseModel):
     user_id: str
     course_id: str
     status: EnrollmentStatus
-    enrolled_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     user: Optional[UserResponse] = None
     created_at: datetime
     updated_at: datetime
@@ -1,8 +1,9 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session
 
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from src.database.engine import get_session as get_db
 from src.database.models import InviteCodeStatus
 from src.modules.invite_code.invite_code_methods import (
@@ -60,14 +61,24 @@ def get_invite_code_endpoint(invite_code_id: str, db: Session = Depends(get_db))
 
 @router.get("/invite-codes/", response_model=List[InviteCodeResponse])
 def get_all_invite_codes_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[InviteCodeStatus] = None,
     created_by: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    """Get all invite codes with optional filtering."""
-    return get_all_invite_codes(db, skip, limit, status, created_by)
+    """Get a page of invite codes with optional filtering."""
+    try:
+        invite_codes, next_cursor = get_all_invite_codes(
+            db, skip, limit, status, created_by, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return invite_codes
 
 
 @router.get(
@@ -13,7 +13,9 @@ class InviteCodeCreate(BaseModel):
     max_uses: int = Field(
         1, ge=1, description="Maximum number of times this code can be used"
     )
-    expires_at: Optional[str] = Field(None, description="Expiration date in ISO format")
+    expires_at: Optional[datetime] = Field(
+        None, description="Expiration date in ISO format"
+    )
     auto_join_channel_id: Optional[str] = Field(
         None, description="Channel ID users will auto-join when using this code"
     )
@@ -24,7 +26,9 @@ class InviteCodeUpdate(BaseModel):
     max_uses: Optional[int] = Field(
         None, ge=1, description="Maximum number of times this code can be used"
     )
-    expires_at: Optional[str] = Field(None, description="Expiration date in ISO format")
+    expires_at: Optional[datetime] = Field(
+        None, description="Expiration date in ISO format"
+    )
     auto_join_channel_id: Optional[str] = Field(
         None, description="Channel ID users will auto-join when using this code"
     )
@@ -36,7 +40,7 @@ class InviteCodeResponse(BaseModel):
     code: str
     max_uses: int
     used_count: int
-    expires_at: Optional[str] = None
+    expires_at: Optional[datetime] = None
     status: InviteCodeStatus
     created_by: str
     auto_join_channel_id: Optional[str] = None
@@ -53,7 +57,7 @@ class InviteCodeUsageStats(BaseModel):
     used_count: int
     remaining_uses: int
     status: InviteCodeStatus
-    expires_at: Optional[str] = None
+    expires_at: Optional[datetime] = None
     used_by_users: list[dict] = []
 
     class Config:
@@ -1,21 +1,26 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session
 
 from src.api.account.api import get_current_user
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from src.database.engine import get_session
-from src.database.models import User
+from src.modules.auth.principal_methods import Principal
 from src.modules.notifications.notification_preferences_methods import (
-    get_or_create_notification_preferences,
+    get_notification_preferences_or_default,
     update_notification_preferences,
 )
 from src.modules.notifications.notifications_methods import (
     get_notifications_by_user,
+    get_unread_notification_count,
+    mark_all_notifications_as_read,
     mark_notification_as_read,
+    publish_unread_count,
 )
 
 from .serializer import (
+    NotificationCountResponse,
     NotificationPreferencesResponse,
     NotificationPreferencesUpdate,
     NotificationResponse,
@@ -26,13 +31,44 @@ router = APIRouter()
 
 @router.get("/notifications", response_model=List[NotificationResponse])
 def get_notifications_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Get all notifications for the current user."""
-    return get_notifications_by_user(db, current_user.id, skip, limit)
+    """Get a page of notifications for the current user."""
+    try:
+        notifications, next_cursor = get_notifications_by_user(
+            db, current_user.id, skip, limit, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return notifications
+
+
+@router.get("/notifications/unread-count", response_model=NotificationCountResponse)
+def get_unread_notification_count_endpoint(
+    db: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Get the number of unread notifications for the current user."""
+    return {"count": get_unread_notification_count(db, current_user.id)}
+
+
+@router.post("/notifications/read-all", response_model=NotificationCountResponse)
+def mark_all_notifications_as_read_endpoint(
+    db: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Mark every unread notification of the current user as read."""
+    count = mark_all_notifications_as_read(db, current_user.id)
+    if count:
+        publish_unread_count(db, current_user.id)
+    return {"count": count}
 
 
 @router.post(
@@ -41,7 +77,7 @@ def get_notifications_endpoint(
 def mark_notification_as_read_endpoint(
     notification_id: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Mark a notification as read."""
     notification = mark_notification_as_read(db, notification_id)
@@ -54,6 +90,7 @@ def mark_notification_as_read_endpoint(
             status_code=403, detail="Not authorized to mark this notification as read"
         )
 
+    publish_unread_count(db, current_user.id)
     return notification
 
 
@@ -62,10 +99,10 @@ def mark_notification_as_read_endpoint(
 )
 def get_notification_preferences_endpoint(
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get notification preferences for the current user."""
-    return get_or_create_notification_preferences(db, current_user.id)
+    return get_notification_preferences_or_default(db, current_user.id)
 
 
 @router.put(
@@ -74,7 +111,7 @@ def get_notification_preferences_endpoint(
 def update_notification_preferences_endpoint(
     preferences: NotificationPreferencesUpdate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update notification preferences for the current user."""
     return update_notification_preferences(
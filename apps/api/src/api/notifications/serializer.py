@@ -23,6 +23,10 @@ class NotificationResponse(BaseModel):
         from_attributes = True
 
 
+class NotificationCountResponse(BaseModel):
+    count: int
+
+
 class NotificationPreferencesResponse(BaseModel):
     id: str
     user_id: str
@@ -1,30 +1,31 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from loguru import logger
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
+from fastapi.security import HTTPBearer
 from sqlmodel import Session
 
-from src.api.account.api import get_current_user
+from src.api.account.api import get_current_user, get_current_user_optional
 from src.api.post.serializer import PostResponse
-from src.database.engine import get_session
-from src.database.models import User
-from src.modules.notifications.notification_tasks import create_notification_task
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from src.database.engine import get_read_session, get_session
+from src.modules.auth.principal_methods import Principal
+from src.modules.notifications.notification_tasks import (
+    create_post_notifications_task,
+)
 from src.modules.post.post_methods import (
     create_post,
     delete_post,
     get_all_nested_posts_by_parent_id,
     get_all_posts,
-    get_comment_summary,
     get_post,
+    get_post_replies,
+    get_post_summaries,
     get_posts_by_channel_slug,
     get_posts_by_type,
     get_posts_by_user,
-    get_reactions_summary,
     update_post,
 )
 from src.modules.post.post_utils import extract_mention
-from src.modules.user.user_methods import get_user_by_username
 
 from .serializer import PostCreate, PostUpdate
 
@@ -32,37 +33,12 @@ router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_session),
-) -> Optional[User]:
-    """Get current user from JWT token if provided, otherwise return None."""
-    if not credentials:
-        return None
-
-    try:
-        import jwt
-
-        from src.core.settings import settings
-        from src.modules.user.user_methods import get_user_by_username
-
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-
-        user = get_user_by_username(db, username)
-        return user
-    except Exception:
-        return None
-
-
-def build_post_response_data(post, current_user_id: Optional[str], db: Session) -> dict:
+def build_post_response_data(
+    post, current_user_id: Optional[str], db: Session, summary: Optional[dict] = None
+) -> dict:
     """Helper function to build post response data with relationships and reactions."""
+    if summary is None:
+        summary = get_post_summaries(db, [post.id], current_user_id)[post.id]
     return {
         "id": post.id,
         "content": post.content,
@@ -76,18 +52,41 @@ def build_post_response_data(post, current_user_id: Optional[str], db: Session)
         "medias": post.medias,
         "created_at": post.created_at,
         "updated_at": post.updated_at,
-        "comment_count": post.comment_count,
-        "reaction_count": post.reaction_count,
-        "reactions": get_reactions_summary(db, post.id, current_user_id),
-        "comment_summary": get_comment_summary(db, post.id, current_user_id),
+        "comment_count": summary["comment_count"],
+        "reaction_count": summary["reaction_count"],
+        "reactions": summary["reactions"],
+        "comment_summary": summary["comment_summary"],
     }
 
 
+def notify_post(
+    post_id: str,
+    post_data: dict,
+    parent_post,
+    original_post_id: Optional[str],
+    current_user: Principal,
+) -> None:
+    """Queue a single task that notifies the replied-to author and every mention."""
+    mentions = extract_mention(post_data.get("content") or "")
+    parent_user_id = parent_post.user_id if parent_post else None
+    if not mentions and parent_user_id in (None, current_user.id):
+        return
+
+    create_post_notifications_task.delay(  # type: ignore
+        post_id=post_id,
+        sender_id=current_user.id,
+        content=post_data.get("content") or "",
+        mentions=mentions,
+        parent_user_id=parent_user_id,
+        original_post_id=original_post_id,
+    )
+
+
 @router.post("/posts/", response_model=PostResponse)
 def create_post_endpoint(
     post: PostCreate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     post_data = post.model_dump()
 
@@ -110,44 +109,9 @@ def create_post_endpoint(
     parent_post = None
     if post_data.get("parent_id"):
         parent_post = get_post(db, post_data["parent_id"])
-        current_parent = parent_post
-        while current_parent and current_parent.parent_id:
-            current_parent = get_post(db, current_parent.parent_id)
-        original_post_id = (
-            current_parent.id if current_parent else post_data["parent_id"]
-        )
+        original_post_id = created_post.root_id or post_data["parent_id"]
 
-    if parent_post and parent_post.user_id != current_user.id:
-        create_notification_task.delay(  # type: ignore
-            recipient_id=parent_post.user_id,
-            sender_id=current_user.id,
-            notification_type="reply",
-            data={
-                "post_id": created_post.id,
-                "content": post_data.get("content", ""),
-                "original_post_id": original_post_id,
-            },
-        )
-
-    if post_data.get("content"):
-        mentions = extract_mention(post_data["content"])
-        logger.info(mentions)
-        if mentions:
-            for username in mentions:
-                mentioned_user = get_user_by_username(db, username)
-                if mentioned_user and mentioned_user.id != current_user.id:
-                    if parent_post and mentioned_user.id == parent_post.user_id:
-                        continue
-                    create_notification_task.delay(  # type: ignore
-                        recipient_id=mentioned_user.id,
-                        sender_id=current_user.id,
-                        notification_type="mention",
-                        data={
-                            "post_id": created_post.id,
-                            "content": post_data["content"],
-                            "original_post_id": original_post_id,
-                        },
-                    )
+    notify_post(created_post.id, post_data, parent_post, original_post_id, current_user)
 
     full_post = get_post(db, created_post.id)
     post_response_data = build_post_response_data(full_post, current_user.id, db)
@@ -159,7 +123,7 @@ def create_post_with_files_endpoint(
     post: str = Form(...),
     files: Optional[List[UploadFile]] = File(None),
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     import json
 
@@ -184,43 +148,9 @@ def create_post_with_files_endpoint(
     parent_post = None
     if post_data.get("parent_id"):
         parent_post = get_post(db, post_data["parent_id"])
-        current_parent = parent_post
-        while current_parent and current_parent.parent_id:
-            current_parent = get_post(db, current_parent.parent_id)
-        original_post_id = (
-            current_parent.id if current_parent else post_data["parent_id"]
-        )
-
-    if parent_post and parent_post.user_id != current_user.id:
-        create_notification_task.delay(  # type: ignore
-            recipient_id=parent_post.user_id,
-            sender_id=current_user.id,
-            notification_type="reply",
-            data={
-                "post_id": created_post.id,
-                "content": post_data.get("content", ""),
-                "original_post_id": original_post_id,
-            },
-        )
+        original_post_id = created_post.root_id or post_data["parent_id"]
 
-    if post_data.get("content"):
-        mentions = extract_mention(post_data["content"])
-        if mentions:
-            for username in mentions:
-                mentioned_user = get_user_by_username(db, username)
-                if mentioned_user and mentioned_user.id != current_user.id:
-                    if parent_post and mentioned_user.id == parent_post.user_id:
-                        continue
-                    create_notification_task.delay(  # type: ignore
-                        recipient_id=mentioned_user.id,
-                        sender_id=current_user.id,
-                        notification_type="mention",
-                        data={
-                            "post_id": created_post.id,
-                            "content": post_data["content"],
-                            "original_post_id": original_post_id,
-                        },
-                    )
+    notify_post(created_post.id, post_data, parent_post, original_post_id, current_user)
 
     full_post = get_post(db, created_post.id)
     post_response_data = build_post_response_data(full_post, current_user.id, db)
@@ -230,8 +160,8 @@ def create_post_with_files_endpoint(
 @router.get("/posts/{post_id}", response_model=PostResponse)
 def get_post_endpoint(
     post_id: str,
-    db: Session = Depends(get_session),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_session),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     post = get_post(db, post_id)
     if not post:
@@ -252,17 +182,65 @@ def get_post_endpoint(
     return PostResponse(**post_response_data)
 
 
-@router.get("/posts/", response_model=List[PostResponse])
-def get_all_posts_endpoint(
+def list_post_replies(
+    db: Session,
+    post_id: str,
+    current_user_id: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+) -> tuple[list[PostResponse], Optional[str]]:
+    """Build one page of the reply thread under a post."""
+    post = get_post(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    try:
+        replies, next_cursor = get_post_replies(
+            db, post_id, current_user_id, limit, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    summaries = get_post_summaries(db, [reply.id for reply in replies], current_user_id)
+    return [
+        PostResponse(
+            **build_post_response_data(reply, current_user_id, db, summaries[reply.id])
+        )
+        for reply in replies
+    ], next_cursor
+
+
+@router.get("/posts/{post_id}/replies", response_model=List[PostResponse])
+def get_post_replies_endpoint(
+    post_id: str,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
+):
+    """Get the next page of the reply thread under a post."""
+    current_user_id = current_user.id if current_user else None
+    replies, next_cursor = list_post_replies(
+        db, post_id, current_user_id, limit, cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return replies
+
+
+def list_posts(
+    db: Session,
+    current_user_id: Optional[str],
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: Optional[str] = None,
     post_type: Optional[str] = None,
     parent_id: Optional[str] = None,
     channel_slug: Optional[str] = None,
-    db: Session = Depends(get_session),
-    current_user: Optional[User] = Depends(get_current_user_optional),
-):
+) -> tuple[list[PostResponse], Optional[str]]:
+    """Build the post feed for the given filters."""
     if channel_slug:
         from src.modules.channels.channels_methods import get_channel_by_slug, is_member
 
@@ -271,13 +249,12 @@ def get_all_posts_endpoint(
             raise HTTPException(status_code=404, detail="Channel not found")
 
         if channel.type == "private":
-            if not current_user or not is_member(db, channel.id, current_user.id):
+            if not current_user_id or not is_member(db, channel.id, current_user_id):
                 raise HTTPException(
                     status_code=403, detail="Access denied to private channel"
                 )
 
-    current_user_id = current_user.id if current_user else None
-
+    next_cursor = None
     if user_id:
         posts = get_posts_by_user(db, user_id, current_user_id)
     elif post_type:
@@ -287,12 +264,51 @@ def get_all_posts_endpoint(
     elif channel_slug:
         posts = get_posts_by_channel_slug(db, channel_slug)
     else:
-        posts = get_all_posts(db, skip, limit, current_user_id)
+        try:
+            posts, next_cursor = get_all_posts(db, skip, limit, current_user_id, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    summaries = get_post_summaries(db, [post.id for post in posts], current_user_id)
     response_posts = []
     for post in posts:
-        post_response_data = build_post_response_data(post, current_user_id, db)
+        post_response_data = build_post_response_data(
+            post, current_user_id, db, summaries[post.id]
+        )
         response_posts.append(PostResponse(**post_response_data))
-    return response_posts
+    return response_posts, next_cursor
+
+
+@router.get("/posts/", response_model=List[PostResponse])
+def get_all_posts_endpoint(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    post_type: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    channel_slug: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
+):
+    # The feed reads Redis timelines and memberships synchronously, so it stays
+    # a def handler and runs on the threadpool instead of the event loop
+    current_user_id = current_user.id if current_user else None
+    posts, next_cursor = list_posts(
+        db,
+        current_user_id,
+        skip,
+        limit,
+        cursor,
+        user_id,
+        post_type,
+        parent_id,
+        channel_slug,
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return posts
 
 
 @router.put("/posts/{post_id}", response_model=PostResponse)
@@ -300,7 +316,7 @@ def update_post_endpoint(
     post_id: str,
     post: PostUpdate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     existing_post = get_post(db, post_id)
     if not existing_post:
@@ -330,7 +346,7 @@ def update_post_endpoint(
 def delete_post_endpoint(
     post_id: str,
     db: Session = Depends(get_session),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     post = get_post(db, post_id)
     if not post:
@@ -1,9 +1,12 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, col, desc, func, select
+from sqlmodel import col, desc, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.database.engine import get_session
+from src.api.websocket.connection_manager import manager
+from src.core.time_buckets import TIME_BUCKET_INTERVALS, time_bucket
+from src.database.engine import get_async_read_session
 from src.database.models import User, UserPresence
 
 router = APIRouter()
@@ -11,35 +14,31 @@ router = APIRouter()
 
 @router.get("/stats")
 async def get_presence_stats(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
-    Get overall presence statistics (filters out stale connections)
+    Get overall presence statistics
     """
-    # Filter for recent activity to avoid counting stale connections
-    stale_cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)
-
     # Total sessions
-    total_sessions = session.exec(select(func.count(col(UserPresence.id)))).one()
-
-    # Active sessions (not disconnected yet and not stale)
-    active_sessions = session.exec(
-        select(func.count(col(UserPresence.id))).where(
-            col(UserPresence.disconnected_at).is_(None),
-            col(UserPresence.updated_at) >= stale_cutoff,
-        )
+    total_sessions = (
+        await session.exec(select(func.count(col(UserPresence.id))))
     ).one()
 
+    # Active sessions (connections that are still heartbeating)
+    active_sessions = len(await manager.get_live_connections())
+
     # Average session duration
-    avg_duration = session.exec(
-        select(func.avg(col(UserPresence.duration_seconds))).where(
-            col(UserPresence.duration_seconds).is_not(None),
+    avg_duration = (
+        await session.exec(
+            select(func.avg(col(UserPresence.duration_seconds))).where(
+                col(UserPresence.duration_seconds).is_not(None),
+            )
         )
     ).one()
 
     # Total unique users
-    unique_users = session.exec(
-        select(func.count(func.distinct(col(UserPresence.user_id))))
+    unique_users = (
+        await session.exec(select(func.count(func.distinct(col(UserPresence.user_id)))))
     ).one()
 
     return {
@@ -54,7 +53,7 @@ async def get_presence_stats(
 async def get_user_presence(
     user_id: str,
     limit: int = Query(default=100, le=1000),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     Get presence history for a specific user
@@ -65,7 +64,7 @@ async def get_user_presence(
         .order_by(desc(col(UserPresence.connected_at)))
         .limit(limit)
     )
-    presences = session.exec(statement).all()
+    presences = (await session.exec(statement)).all()
 
     return {
         "user_id": user_id,
@@ -90,7 +89,7 @@ async def get_presence_timeseries(
     interval: str = Query(
         default="hour", description="Aggregation interval: hour, day, week"
     ),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     Get presence data aggregated by time intervals for visualization
@@ -98,66 +97,42 @@ async def get_presence_timeseries(
     # Parse dates
     start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
     end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-
-    # Query all presence records in the date range
-    statement = select(UserPresence).where(
-        col(UserPresence.connected_at) >= start.isoformat(),
-        col(UserPresence.connected_at) <= end.isoformat(),
-    )
-    presences = session.exec(statement).all()
-
-    # Aggregate by interval
-    timeseries_data = {}
-
-    for presence in presences:
-        connected_at = datetime.fromisoformat(
-            presence.connected_at.replace("Z", "+00:00")
+    # Dates without an offset are taken as UTC
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+
+    # Aggregate by interval in the database instead of loading every session
+    bucket = time_bucket(
+        interval if interval in TIME_BUCKET_INTERVALS else "hour",
+        col(UserPresence.connected_at),
+    ).label("bucket")
+    statement = (
+        select(
+            bucket,
+            func.count(col(UserPresence.id)),
+            func.count(func.distinct(col(UserPresence.user_id))),
+            func.coalesce(func.sum(col(UserPresence.duration_seconds)), 0),
         )
+        .where(
+            col(UserPresence.connected_at) >= start,
+            col(UserPresence.connected_at) <= end,
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    rows = (await session.exec(statement)).all()
 
-        # Determine bucket based on interval
-        if interval == "hour":
-            bucket = connected_at.replace(minute=0, second=0, microsecond=0)
-        elif interval == "day":
-            bucket = connected_at.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif interval == "week":
-            # Start of week (Monday)
-            days_since_monday = connected_at.weekday()
-            bucket = (connected_at - timedelta(days=days_since_monday)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-        else:
-            bucket = connected_at.replace(minute=0, second=0, microsecond=0)
-
-        bucket_key = bucket.isoformat()
-
-        if bucket_key not in timeseries_data:
-            timeseries_data[bucket_key] = {
-                "timestamp": bucket_key,
-                "session_count": 0,
-                "unique_users": set(),
-                "total_duration": 0,
-            }
-
-        timeseries_data[bucket_key]["session_count"] += 1
-        timeseries_data[bucket_key]["unique_users"].add(presence.user_id)
-        if presence.duration_seconds:
-            timeseries_data[bucket_key]["total_duration"] += presence.duration_seconds
-
-    # Convert to list and format
     result = []
-    for bucket_key in sorted(timeseries_data.keys()):
-        data = timeseries_data[bucket_key]
+    for bucket_start, session_count, unique_users, total_duration in rows:
+        if bucket_start.tzinfo is None:
+            bucket_start = bucket_start.replace(tzinfo=timezone.utc)
         result.append(
             {
-                "timestamp": data["timestamp"],
-                "session_count": data["session_count"],
-                "unique_users": len(data["unique_users"]),
-                "total_duration_seconds": round(data["total_duration"], 2),
-                "average_duration_seconds": (
-                    round(data["total_duration"] / data["session_count"], 2)
-                    if data["session_count"] > 0
-                    else 0
-                ),
+                "timestamp": bucket_start.isoformat(),
+                "session_count": session_count,
+                "unique_users": unique_users,
+                "total_duration_seconds": round(total_duration, 2),
+                "average_duration_seconds": round(total_duration / session_count, 2),
             }
         )
 
@@ -169,79 +144,39 @@ async def get_presence_timeseries(
     }
 
 
-@router.post("/cleanup")
-async def cleanup_stale_presence(
-    session: Session = Depends(get_session),
-):
-    """
-    Clean up stale presence records (connections older than 1 hour without disconnect)
-    """
-    stale_cutoff = datetime.now(timezone.utc) - timedelta(hours=1)
-
-    # Find stale connections (no disconnect time and older than 1 hour)
-    stale_statement = select(UserPresence).where(
-        col(UserPresence.disconnected_at).is_(None),
-        col(UserPresence.updated_at) < stale_cutoff,
-    )
-    stale_records = session.exec(stale_statement).all()
-
-    # Mark them as disconnected
-    for record in stale_records:
-        record.disconnected_at = stale_cutoff.isoformat()
-        record.duration_seconds = (
-            datetime.fromisoformat(record.disconnected_at.replace("Z", "+00:00"))
-            - datetime.fromisoformat(record.connected_at.replace("Z", "+00:00"))
-        ).total_seconds()
-        session.add(record)
-
-    session.commit()
-
-    return {
-        "cleaned_up": len(stale_records),
-        "message": f"Cleaned up {len(stale_records)} stale presence records",
-    }
-
-
 @router.get("/active-now")
 async def get_active_users_now(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
-    Get currently active users (connections without disconnect time, filtered for recent activity)
+    Get currently active users (connections that heartbeated within the presence TTL)
     """
-    # Filter for connections that are either very recent (within last 5 minutes)
-    # or have been updated recently (within last 30 minutes)
-    cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=30)
-
-    statement = (
-        select(UserPresence, User)
-        .join(User, col(UserPresence.user_id) == col(User.id))
-        .where(
-            col(UserPresence.disconnected_at).is_(None),
-            col(UserPresence.updated_at) >= cutoff_time,
-        )
-    )
-    results = session.exec(statement).all()
-
-    return {
-        "active_count": len(results),
-        "active_users": [
+    connections = await manager.get_live_connections()
+    user_ids = {connection["user_id"] for connection in connections}
+    users = {}
+    if user_ids:
+        statement = select(User).where(col(User.id).in_(user_ids))
+        users = {user.id: user for user in (await session.exec(statement)).all()}
+
+    now = datetime.now(timezone.utc)
+    active_users = []
+    for connection in connections:
+        user = users.get(connection["user_id"])
+        if user is None:
+            continue
+        connected_at = datetime.fromisoformat(connection["connected_at"])
+        active_users.append(
             {
-                "user_id": presence.user_id,
+                "user_id": user.id,
                 "username": user.username,
                 "name": user.name,
-                "connection_id": presence.connection_id,
-                "connected_at": presence.connected_at,
-                "duration_seconds": max(
-                    0,
-                    (
-                        datetime.now(timezone.utc)
-                        - datetime.fromisoformat(
-                            presence.connected_at.replace("Z", "+00:00")
-                        )
-                    ).total_seconds(),
-                ),
+                "connection_id": connection["connection_id"],
+                "connected_at": connection["connected_at"],
+                "duration_seconds": max(0, (now - connected_at).total_seconds()),
             }
-            for presence, user in results
-        ],
+        )
+
+    return {
+        "active_count": len(active_users),
+        "active_users": active_users,
     }
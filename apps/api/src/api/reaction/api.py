@@ -3,7 +3,7 @@ from sqlmodel import Session
 
 from src.api.account.api import get_current_user
 from src.database.engine import get_session
-from src.database.models import User
+from src.modules.auth.principal_methods import Principal
 from src.modules.notifications.notification_tasks import create_notification_task
 from src.modules.post.post_methods import get_post
 from src.modules.reaction.reaction_methods import create_reaction, get_reactions_by_post
@@ -22,7 +22,7 @@ router = APIRouter()
 def create_reaction_endpoint(
     reaction: ReactionCreate,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     reaction_data = reaction.model_dump()
     reaction_data["user_id"] = current_user.id
@@ -67,7 +67,7 @@ def delete_reaction_endpoint(
     post_id: str,
     emoji: str,
     db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     from src.modules.reaction.reaction_methods import delete_reaction
 
@@ -1,17 +1,16 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security import HTTPBearer
 from sqlmodel import Session
 
-from src.api.account.api import get_current_user
+from src.api.account.api import get_current_user, get_current_user_optional
 from src.database.engine import get_session as get_db
-from src.database.models import User
+from src.modules.auth.principal_methods import Principal
 from src.modules.channels.channels_methods import is_member
 from src.modules.resources.resources_methods import (
     create_resource,
     delete_resource,
-    filter_private_channel_resources,
     get_all_resources,
     get_resource,
     get_resources_by_user,
@@ -24,40 +23,11 @@ router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
-    """Get current user from JWT token if provided, otherwise return None."""
-    if not credentials:
-        return None
-
-    try:
-        import jwt
-
-        from src.core.settings import settings
-        from src.modules.user.user_methods import get_user_by_username
-
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-
-        user = get_user_by_username(db, username)
-        return user
-    except Exception:
-        return None
-
-
 @router.post("/resources/", response_model=ResourceResponse)
 def create_resource_endpoint(
     resource: ResourceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Verify channel exists and user has access
     from src.modules.channels.channels_methods import get_channel
@@ -87,7 +57,7 @@ def create_resource_endpoint(
 def get_resource_endpoint(
     resource_id: str,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
     resource = get_resource(db, resource_id)
     if not resource:
@@ -110,24 +80,20 @@ def get_all_resources_endpoint(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
-    all_resources = get_all_resources(db, skip, limit)
-    return filter_private_channel_resources(
-        all_resources, current_user_id=current_user.id if current_user else None, db=db
-    )
+    current_user_id = current_user.id if current_user else None
+    return get_all_resources(db, skip, limit, current_user_id)
 
 
 @router.get("/users/{user_id}/resources/", response_model=List[ResourceResponse])
 def get_resources_by_user_endpoint(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_user_optional),
 ):
-    resources = get_resources_by_user(db, user_id)
-    return filter_private_channel_resources(
-        resources, current_user_id=current_user.id if current_user else None, db=db
-    )
+    current_user_id = current_user.id if current_user else None
+    return get_resources_by_user(db, user_id, current_user_id)
 
 
 @router.put("/resources/{resource_id}", response_model=ResourceResponse)
@@ -135,7 +101,7 @@ def update_resource_endpoint(
     resource_id: str,
     resource: ResourceUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     existing_resource = get_resource(db, resource_id)
     if not existing_resource:
@@ -158,7 +124,7 @@ def update_resource_endpoint(
 def delete_resource_endpoint(
     resource_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     existing_resource = get_resource(db, resource_id)
     if not existing_resource:
@@ -66,7 +66,8 @@ def get_user_endpoint(user_id: str, db: Session = Depends(get_db)):
 def get_all_users_endpoint(
     skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 ):
-    return get_all_users(db, skip, limit)
+    users, _ = get_all_users(db, skip, limit)
+    return users
 
 
 @router.put("/users/{user_id}", response_model=User)
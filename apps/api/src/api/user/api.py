@@ -1,12 +1,15 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
 from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
 
 from src.api.account.api import get_current_admin
+from src.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from src.database.engine import get_read_session
 from src.database.engine import get_session as get_db
 from src.database.models import User, UserSocial
+from src.modules.auth.principal_methods import Principal
 from src.modules.media.media_methods import create_media
 from src.modules.storages.storage_methods import upload_file
 from src.modules.user.user_methods import (
@@ -29,7 +32,7 @@ def create_user_endpoint(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def get_user_endpoint(user_id: str, db: Session = Depends(get_db)):
+def get_user_endpoint(user_id: str, db: Session = Depends(get_read_session)):
     statement = (
         select(User)
         .options(joinedload(User.user_settings), joinedload(User.user_social))
@@ -42,7 +45,9 @@ def get_user_endpoint(user_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/users/username/{username}", response_model=UserResponse)
-def get_user_by_username_endpoint(username: str, db: Session = Depends(get_db)):
+def get_user_by_username_endpoint(
+    username: str, db: Session = Depends(get_read_session)
+):
     statement = (
         select(User)
         .options(joinedload(User.user_settings), joinedload(User.user_social))
@@ -56,12 +61,20 @@ def get_user_by_username_endpoint(username: str, db: Session = Depends(get_db)):
 
 @router.get("/users/", response_model=List[UserResponse])
 def get_all_users_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     query: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    return get_all_users(db, skip, limit, query)
+    try:
+        users, next_cursor = get_all_users(db, skip, limit, query, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return users
 
 
 @router.put("/users/{user_id}", response_model=UserResponse)
@@ -156,7 +169,7 @@ def update_user_with_file_endpoint(
 def delete_user_endpoint(
     user_id: str,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin),
+    current_admin: Principal = Depends(get_current_admin),
 ):
     if not delete_user(db, user_id):
         raise HTTPException(status_code=404, detail="User not found")
@@ -167,7 +180,7 @@ def delete_user_endpoint(
 def ban_user_endpoint(
     user_id: str,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin),
+    current_admin: Principal = Depends(get_current_admin),
 ):
     user = ban_user(db, user_id)
     if not user:
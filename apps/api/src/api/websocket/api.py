@@ -1,23 +1,35 @@
 import json
 import uuid
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 from loguru import logger
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
-from src.database.engine import get_session
+from src.api.account.api import authenticate_token
+from src.database.engine import engine
 
 from .connection_manager import manager
 
 router = APIRouter()
 
 
+def token_owner(token: str) -> Optional[str]:
+    """Get the ID of the user an access token belongs to, or None if it is not valid"""
+    with Session(engine) as db:
+        principal = authenticate_token(token, db)
+    return principal.id if principal else None
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
     user_id: str = Query(..., description="User ID for the connection"),
-    session: Session = Depends(get_session),
+    token: Optional[str] = Query(
+        None, description="Access token of user_id, required to receive notifications"
+    ),
 ):
     """
     WebSocket endpoint for real-time communication.
@@ -27,9 +39,11 @@ async def websocket_endpoint(
     - Subscribe to event updates by event_id
     - Send heartbeat messages to track presence
     - Receive real-time updates
+    - Receive their own notifications and unread count, when connected with a token
 
     Query Parameters:
     - user_id: The ID of the user establishing the connection
+    - token: Optional access token proving the connection belongs to user_id
 
     Message Format:
     {
@@ -43,10 +57,14 @@ async def websocket_endpoint(
     """
     connection_id = str(uuid.uuid4())
 
-    manager.db_session = session
-
     try:
         await manager.connect(websocket, connection_id, user_id)
+        # Notifications are private, so only a socket that proved who it is gets them
+        receives_notifications = bool(token) and (
+            await run_in_threadpool(token_owner, token) == user_id
+        )
+        if receives_notifications:
+            await manager.open_inbox(connection_id)
 
         await manager.send_personal_message(
             {
@@ -54,6 +72,7 @@ async def websocket_endpoint(
                 "data": {
                     "connection_id": connection_id,
                     "user_id": user_id,
+                    "notifications": receives_notifications,
                     "timestamp": datetime.utcnow().isoformat(),
                 },
             },
@@ -78,7 +97,7 @@ async def websocket_endpoint(
                     target_id = message_data.get("target_id")
 
                     if subscription_type == "user":
-                        manager.subscribe_to_user(connection_id, target_id)
+                        await manager.subscribe_to_user(connection_id, target_id)
                         await manager.send_personal_message(
                             {
                                 "type": "subscribed",
@@ -90,7 +109,7 @@ async def websocket_endpoint(
                             connection_id,
                         )
                     elif subscription_type == "event":
-                        manager.subscribe_to_event(connection_id, target_id)
+                        await manager.subscribe_to_event(connection_id, target_id)
                         await manager.send_personal_message(
                             {
                                 "type": "subscribed",
@@ -107,9 +126,9 @@ async def websocket_endpoint(
                     target_id = message_data.get("target_id")
 
                     if subscription_type == "user":
-                        manager.unsubscribe_from_user(connection_id, target_id)
+                        await manager.unsubscribe_from_user(connection_id, target_id)
                     elif subscription_type == "event":
-                        manager.unsubscribe_from_event(connection_id, target_id)
+                        await manager.unsubscribe_from_event(connection_id, target_id)
 
                     await manager.send_personal_message(
                         {
@@ -123,7 +142,7 @@ async def websocket_endpoint(
                     )
 
                 elif message_type == "heartbeat":
-                    manager.update_heartbeat(connection_id)
+                    await manager.update_heartbeat(connection_id)
 
                     duration = manager.get_connection_duration(connection_id)
                     await manager.send_personal_message(
@@ -185,11 +204,11 @@ async def websocket_endpoint(
         logger.info(
             f"User {user_id} disconnected after {duration:.2f} seconds (connection: {connection_id})"
         )
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
 
     except Exception as e:
         logger.error(f"WebSocket error for connection {connection_id}: {e}")
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
 
 
 @router.get("/ws/stats")
@@ -197,9 +216,10 @@ async def get_websocket_stats():
     """Get current WebSocket connection statistics"""
     return {
         "active_connections": len(manager.active_connections),
-        "active_users": len(manager.get_active_users()),
+        "active_users": len(manager.user_connections),
         "user_subscriptions": len(manager.user_subscriptions),
         "event_subscriptions": len(manager.event_subscriptions),
+        "inboxes": len(manager.inboxes),
     }
 
 
@@ -210,13 +230,13 @@ async def get_user_connections(user_id: str):
     connection_details = []
 
     for conn_id in connections:
-        if conn_id in manager.connection_metadata:
-            metadata = manager.connection_metadata[conn_id]
+        if conn_id in manager.active_connections:
+            connection = manager.active_connections[conn_id]
             connection_details.append(
                 {
                     "connection_id": conn_id,
-                    "connected_at": metadata["connected_at"].isoformat(),
-                    "last_heartbeat": metadata["last_heartbeat"].isoformat(),
+                    "connected_at": connection.connected_at.isoformat(),
+                    "last_heartbeat": connection.last_heartbeat.isoformat(),
                     "duration_seconds": manager.get_connection_duration(conn_id),
                 }
             )
@@ -1,19 +1,73 @@
+import asyncio
+import json
 from datetime import datetime, timezone
 from typing import Dict, Set
 
+import redis.asyncio as aioredis
 from fastapi import WebSocket
 from loguru import logger
-from sqlmodel import Session, select
-
-from src.database.models import UserPresence
+from redis.exceptions import RedisError
+
+from src.api.websocket.live_presence import LivePresence, presence_member
+from src.api.websocket.presence_writer import PresenceWriter
+from src.core.pubsub import EVENT_CHANNEL, INBOX_CHANNEL, USER_CHANNEL
+from src.core.settings import settings
+
+# Messages waiting for a socket before it counts as a slow consumer and is dropped
+SEND_QUEUE_SIZE = 100
+SEND_TIMEOUT_SECONDS = 5
+# Socket writes in flight at once across the whole worker
+SEND_CONCURRENCY = 1000
+# Try-again-later close code sent to dropped slow consumers
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode_message(message: dict) -> str:
+    """Serialize a message once, the same way WebSocket.send_json would"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class Connection:
+    """State of one live WebSocket connection"""
+
+    __slots__ = (
+        "websocket",
+        "user_id",
+        "connected_at",
+        "last_heartbeat",
+        "presence_id",
+        "queue",
+        "sender",
+        "user_subscriptions",
+        "event_subscriptions",
+        "has_inbox",
+    )
+
+    def __init__(self, websocket: WebSocket, user_id: str, connected_at: datetime):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.connected_at = connected_at
+        self.last_heartbeat = connected_at
+        self.presence_id: str | None = None
+        # Outbound messages, drained by the sender task; None once the connection is closing
+        self.queue: asyncio.Queue | None = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.sender: asyncio.Task | None = None
+        # Reverse indexes so teardown only touches this connection's subscriptions
+        self.user_subscriptions: Set[str] = set()
+        self.event_subscriptions: Set[str] = set()
+        # Whether the owner's private notifications are delivered here
+        self.has_inbox = False
 
 
 class ConnectionManager:
     """Manages WebSocket connections and subscriptions"""
 
     def __init__(self):
-        # Active connections: {connection_id: WebSocket}
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Active connections: {connection_id: Connection}
+        self.active_connections: Dict[str, Connection] = {}
+
+        # Connections owned by each user: {user_id: Set[connection_id]}
+        self.user_connections: Dict[str, Set[str]] = {}
 
         # User subscriptions: {user_id: Set[connection_id]}
         self.user_subscriptions: Dict[str, Set[str]] = {}
@@ -21,194 +75,395 @@ class ConnectionManager:
         # Event subscriptions: {event_id: Set[connection_id]}
         self.event_subscriptions: Dict[str, Set[str]] = {}
 
-        # Connection metadata: {connection_id: {user_id, connected_at, last_heartbeat}}
-        self.connection_metadata: Dict[str, dict] = {}
-
-        # Database session (will be set from API endpoint)
-        self.db_session: Session | None = None
+        # Signed-in connections receiving their owner's notifications: {user_id: Set[connection_id]}
+        self.inboxes: Dict[str, Set[str]] = {}
+
+        # Socket writes in flight, shared by every connection's sender task
+        self.send_slots = asyncio.Semaphore(SEND_CONCURRENCY)
+        self.closing_tasks: Set[asyncio.Task] = set()
+
+        # Presence history, written to the database in batches off the socket path
+        self.presence_writer = PresenceWriter()
+        # Who is online right now, shared by every worker through Redis
+        self.live_presence = LivePresence()
+
+        # Redis pub/sub backplane shared by every worker (set up on startup)
+        self.redis: aioredis.Redis | None = None
+        self.pubsub: aioredis.client.PubSub | None = None
+        self.listener: asyncio.Task | None = None
+
+    async def start_backplane(self, redis_url: str | None = None):
+        """Relay broadcasts between workers through Redis pub/sub"""
+        redis_url = redis_url or settings.REDIS_URL
+        if not redis_url or self.redis:
+            return
+        self.redis = aioredis.Redis.from_url(redis_url, decode_responses=True)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.live_presence.redis = self.redis
+
+        # Pick up subscriptions made before the backplane started
+        channels = [USER_CHANNEL.format(user_id) for user_id in self.user_subscriptions]
+        channels += [
+            EVENT_CHANNEL.format(event_id) for event_id in self.event_subscriptions
+        ]
+        channels += [INBOX_CHANNEL.format(user_id) for user_id in self.inboxes]
+        if channels:
+            await self.pubsub.subscribe(*channels)
+        self.listener = asyncio.create_task(self._listen())
+        logger.info("WebSocket backplane started")
+
+    async def stop_backplane(self):
+        """Stop relaying broadcasts between workers"""
+        if self.listener:
+            self.listener.cancel()
+            try:
+                await self.listener
+            except asyncio.CancelledError:
+                pass
+        if self.pubsub:
+            await self.pubsub.aclose()
+        if self.redis:
+            await self.redis.aclose()
+        self.redis = self.pubsub = self.listener = None
+        self.live_presence.redis = None
+
+    async def _listen(self):
+        """Deliver messages published by any worker to the local subscribers"""
+        while True:
+            try:
+                # The pub/sub connection only exists once something is subscribed
+                if not self.pubsub.subscribed:
+                    await asyncio.sleep(0.5)
+                    continue
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except RedisError as e:
+                logger.error(f"WebSocket backplane error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not message:
+                continue
+
+            kind, _, target_id = message["channel"].partition(":")
+            try:
+                payload = json.loads(message["data"])
+                if kind == "user":
+                    await self.deliver_to_user_subscribers(target_id, payload)
+                elif kind == "event":
+                    await self.deliver_to_event_subscribers(target_id, payload)
+                elif kind == "inbox":
+                    await self.deliver_to_inbox(target_id, payload)
+            except Exception as e:
+                logger.error(f"Error relaying message on {message['channel']}: {e}")
+
+    async def _publish(self, channel: str, message: dict) -> bool:
+        """Publish to every worker, returning False when delivery must stay local"""
+        if not self.redis:
+            return False
+        try:
+            await self.redis.publish(channel, json.dumps(message, default=str))
+        except RedisError as e:
+            logger.error(f"Error publishing to {channel}: {e}")
+            return False
+        return True
+
+    async def _subscribe_channel(self, channel: str):
+        """Start receiving a channel from the backplane"""
+        if not self.pubsub:
+            return
+        try:
+            await self.pubsub.subscribe(channel)
+        except RedisError as e:
+            logger.error(f"Error subscribing to {channel}: {e}")
+
+    async def _unsubscribe_channel(self, channel: str):
+        """Stop receiving a channel from the backplane"""
+        if not self.pubsub:
+            return
+        try:
+            await self.pubsub.unsubscribe(channel)
+        except RedisError as e:
+            logger.error(f"Error unsubscribing from {channel}: {e}")
 
     async def connect(self, websocket: WebSocket, connection_id: str, user_id: str):
         """Accept a new WebSocket connection"""
         await websocket.accept()
-        connected_at = datetime.now(timezone.utc)
-        self.active_connections[connection_id] = websocket
-        self.connection_metadata[connection_id] = {
-            "user_id": user_id,
-            "connected_at": connected_at,
-            "last_heartbeat": connected_at,
-        }
+        connected_at = self.register(websocket, connection_id, user_id)
+        connection = self.active_connections[connection_id]
+        connection.presence_id = self.presence_writer.record_connect(
+            user_id, connection_id, connected_at
+        )
+        await self.live_presence.touch(
+            presence_member(connection_id, user_id, connected_at), connected_at
+        )
         logger.info(f"WebSocket connected: {connection_id} (user: {user_id})")
         logger.info(
             f"User {user_id} is now active - Total active connections: {len(self.active_connections)}"
         )
 
-        # Save presence record to database
-        if self.db_session:
-            try:
-                presence = UserPresence(
-                    user_id=user_id,
-                    connection_id=connection_id,
-                    connected_at=connected_at.isoformat(),
-                )
-                self.db_session.add(presence)
-                self.db_session.commit()
-                logger.info(f"Saved presence record for connection {connection_id}")
-            except Exception as e:
-                logger.error(f"Error saving presence record: {e}")
-                self.db_session.rollback()
+    def register(
+        self, websocket: WebSocket, connection_id: str, user_id: str
+    ) -> datetime:
+        """Start tracking an accepted connection and its outbound queue"""
+        connection = Connection(websocket, user_id, datetime.now(timezone.utc))
+        connection.sender = asyncio.create_task(
+            self._send_loop(connection_id, websocket, connection.queue)
+        )
+        self.active_connections[connection_id] = connection
+        self.user_connections.setdefault(user_id, set()).add(connection_id)
+        return connection.connected_at
+
+    def unregister(self, connection_id: str) -> tuple[Connection | None, list[str]]:
+        """Stop tracking a connection, returning it and the channels no local socket needs anymore"""
+        connection = self.active_connections.pop(connection_id, None)
+        if connection is None:
+            return None, []
+
+        connection.queue = None
+        if connection.sender and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+
+        owned = self.user_connections.get(connection.user_id)
+        if owned is not None:
+            owned.discard(connection_id)
+            if not owned:
+                del self.user_connections[connection.user_id]
+
+        released = []
+        for user_id in connection.user_subscriptions:
+            if self._discard(self.user_subscriptions, user_id, connection_id):
+                released.append(USER_CHANNEL.format(user_id))
+        for event_id in connection.event_subscriptions:
+            if self._discard(self.event_subscriptions, event_id, connection_id):
+                released.append(EVENT_CHANNEL.format(event_id))
+        if connection.has_inbox and self._discard(
+            self.inboxes, connection.user_id, connection_id
+        ):
+            released.append(INBOX_CHANNEL.format(connection.user_id))
+        return connection, released
+
+    @staticmethod
+    def _discard(subscriptions: Dict[str, Set[str]], key: str, connection_id: str):
+        """Remove a connection from a subscription set, returning True if the set emptied"""
+        connections = subscriptions.get(key)
+        if connections is None:
+            return False
+        connections.discard(connection_id)
+        if connections:
+            return False
+        del subscriptions[key]
+        return True
+
+    async def _send_loop(
+        self, connection_id: str, websocket: WebSocket, queue: asyncio.Queue
+    ):
+        """Write queued messages to one socket, giving up on it when a write stalls"""
+        try:
+            while True:
+                text = await queue.get()
+                if websocket.client_state.name != "CONNECTED":
+                    raise RuntimeError("socket is not in CONNECTED state")
+                async with self.send_slots:
+                    await asyncio.wait_for(
+                        websocket.send_text(text), SEND_TIMEOUT_SECONDS
+                    )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to {connection_id}: {e}")
+            self._drop(connection_id)
+
+    def _enqueue(self, connection_id: str, text: str):
+        """Queue a serialized message, dropping the connection if it cannot keep up"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None or connection.queue is None:
+            return
+        try:
+            connection.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping slow consumer {connection_id}")
+            self._drop(connection_id, SLOW_CONSUMER_CLOSE_CODE)
+
+    def _drop(self, connection_id: str, close_code: int | None = None):
+        """Disconnect a connection in the background, closing its socket first if asked"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None or connection.queue is None:
+            return
+        # Stop queueing right away; the rest of the teardown happens in the task
+        connection.queue = None
+        websocket = connection.websocket
+
+        async def close():
+            if close_code is not None:
+                try:
+                    await asyncio.wait_for(
+                        websocket.close(code=close_code), SEND_TIMEOUT_SECONDS
+                    )
+                except Exception as e:
+                    logger.warning(f"Error closing {connection_id}: {e}")
+            await self.disconnect(connection_id)
 
-    def disconnect(self, connection_id: str):
+        task = asyncio.create_task(close())
+        self.closing_tasks.add(task)
+        task.add_done_callback(self.closing_tasks.discard)
+
+    async def disconnect(self, connection_id: str):
         """Remove a WebSocket connection and clean up subscriptions"""
-        duration = self.get_connection_duration(connection_id)
-
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
-
-        # Remove from user subscriptions
-        for user_id, connections in list(self.user_subscriptions.items()):
-            if connection_id in connections:
-                connections.remove(connection_id)
-                if not connections:
-                    del self.user_subscriptions[user_id]
-
-        # Remove from event subscriptions
-        for event_id, connections in list(self.event_subscriptions.items()):
-            if connection_id in connections:
-                connections.remove(connection_id)
-                if not connections:
-                    del self.event_subscriptions[event_id]
-
-        # Update presence record in database
-        if self.db_session and duration is not None:
-            try:
-                statement = select(UserPresence).where(
-                    UserPresence.connection_id == connection_id
+        connection, released = self.unregister(connection_id)
+        for channel in released:
+            await self._unsubscribe_channel(channel)
+
+        if connection is not None:
+            await self.live_presence.remove(
+                presence_member(
+                    connection_id, connection.user_id, connection.connected_at
                 )
-                presence = self.db_session.exec(statement).first()
-                if presence:
-                    presence.disconnected_at = datetime.now(timezone.utc).isoformat()
-                    presence.duration_seconds = duration
-                    self.db_session.add(presence)
-                    self.db_session.commit()
-                    logger.info(
-                        f"Updated presence record for connection {connection_id} - Duration: {duration:.2f}s"
-                    )
-            except Exception as e:
-                logger.error(f"Error updating presence record: {e}")
-                self.db_session.rollback()
-
-        if connection_id in self.connection_metadata:
-            del self.connection_metadata[connection_id]
+            )
+        if connection is not None and connection.presence_id:
+            disconnected_at = datetime.now(timezone.utc)
+            self.presence_writer.record_disconnect(
+                connection.presence_id,
+                disconnected_at,
+                (disconnected_at - connection.connected_at).total_seconds(),
+            )
 
         logger.info(f"WebSocket disconnected: {connection_id}")
 
-    def subscribe_to_user(self, connection_id: str, user_id: str):
+    async def subscribe_to_user(self, connection_id: str, user_id: str):
         """Subscribe a connection to user events"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return
         if user_id not in self.user_subscriptions:
             self.user_subscriptions[user_id] = set()
+            await self._subscribe_channel(USER_CHANNEL.format(user_id))
         self.user_subscriptions[user_id].add(connection_id)
+        connection.user_subscriptions.add(user_id)
         logger.info(f"Connection {connection_id} subscribed to user {user_id}")
 
-    def unsubscribe_from_user(self, connection_id: str, user_id: str):
+    async def unsubscribe_from_user(self, connection_id: str, user_id: str):
         """Unsubscribe a connection from user events"""
-        if user_id in self.user_subscriptions:
-            self.user_subscriptions[user_id].discard(connection_id)
-            if not self.user_subscriptions[user_id]:
-                del self.user_subscriptions[user_id]
+        connection = self.active_connections.get(connection_id)
+        if connection is not None:
+            connection.user_subscriptions.discard(user_id)
+        if self._discard(self.user_subscriptions, user_id, connection_id):
+            await self._unsubscribe_channel(USER_CHANNEL.format(user_id))
         logger.info(f"Connection {connection_id} unsubscribed from user {user_id}")
 
-    def subscribe_to_event(self, connection_id: str, event_id: str):
+    async def subscribe_to_event(self, connection_id: str, event_id: str):
         """Subscribe a connection to event updates"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return
         if event_id not in self.event_subscriptions:
             self.event_subscriptions[event_id] = set()
+            await self._subscribe_channel(EVENT_CHANNEL.format(event_id))
         self.event_subscriptions[event_id].add(connection_id)
+        connection.event_subscriptions.add(event_id)
         logger.info(f"Connection {connection_id} subscribed to event {event_id}")
 
-    def unsubscribe_from_event(self, connection_id: str, event_id: str):
+    async def unsubscribe_from_event(self, connection_id: str, event_id: str):
         """Unsubscribe a connection from event updates"""
-        if event_id in self.event_subscriptions:
-            self.event_subscriptions[event_id].discard(connection_id)
-            if not self.event_subscriptions[event_id]:
-                del self.event_subscriptions[event_id]
+        connection = self.active_connections.get(connection_id)
+        if connection is not None:
+            connection.event_subscriptions.discard(event_id)
+        if self._discard(self.event_subscriptions, event_id, connection_id):
+            await self._unsubscribe_channel(EVENT_CHANNEL.format(event_id))
         logger.info(f"Connection {connection_id} unsubscribed from event {event_id}")
 
+    async def open_inbox(self, connection_id: str):
+        """Deliver the private notifications of a signed-in connection's owner to it"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None or connection.has_inbox:
+            return
+        if connection.user_id not in self.inboxes:
+            self.inboxes[connection.user_id] = set()
+            await self._subscribe_channel(INBOX_CHANNEL.format(connection.user_id))
+        self.inboxes[connection.user_id].add(connection_id)
+        connection.has_inbox = True
+
     async def send_personal_message(self, message: dict, connection_id: str):
         """Send a message to a specific connection"""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            try:
-                # Check if connection is still open
-                if websocket.client_state.name == "CONNECTED":
-                    await websocket.send_json(message)
-                else:
-                    logger.warning(
-                        f"Connection {connection_id} is not in CONNECTED state"
-                    )
-                    self.disconnect(connection_id)
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                self.disconnect(connection_id)
+        self._enqueue(connection_id, encode_message(message))
 
     async def broadcast_to_user_subscribers(self, user_id: str, message: dict):
-        """Broadcast a message to all connections subscribed to a user"""
-        if user_id in self.user_subscriptions:
-            disconnected = []
-            for connection_id in self.user_subscriptions[user_id]:
-                try:
-                    await self.send_personal_message(message, connection_id)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {connection_id}: {e}")
-                    disconnected.append(connection_id)
-
-            # Clean up disconnected connections
-            for connection_id in disconnected:
-                self.disconnect(connection_id)
+        """Broadcast a message to all connections subscribed to a user, on every worker"""
+        if not await self._publish(USER_CHANNEL.format(user_id), message):
+            await self.deliver_to_user_subscribers(user_id, message)
 
     async def broadcast_to_event_subscribers(self, event_id: str, message: dict):
-        """Broadcast a message to all connections subscribed to an event"""
-        if event_id in self.event_subscriptions:
-            disconnected = []
-            for connection_id in self.event_subscriptions[event_id]:
-                try:
-                    await self.send_personal_message(message, connection_id)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {connection_id}: {e}")
-                    disconnected.append(connection_id)
-
-            # Clean up disconnected connections
-            for connection_id in disconnected:
-                self.disconnect(connection_id)
-
-    def update_heartbeat(self, connection_id: str):
+        """Broadcast a message to all connections subscribed to an event, on every worker"""
+        if not await self._publish(EVENT_CHANNEL.format(event_id), message):
+            await self.deliver_to_event_subscribers(event_id, message)
+
+    async def deliver_to_inbox(self, user_id: str, message: dict):
+        """Send a private message to a user's signed-in connections on this worker"""
+        self._fan_out(self.inboxes.get(user_id, ()), message)
+
+    async def deliver_to_user_subscribers(self, user_id: str, message: dict):
+        """Send a message to the connections on this worker subscribed to a user"""
+        self._fan_out(self.user_subscriptions.get(user_id, ()), message)
+
+    async def deliver_to_event_subscribers(self, event_id: str, message: dict):
+        """Send a message to the connections on this worker subscribed to an event"""
+        self._fan_out(self.event_subscriptions.get(event_id, ()), message)
+
+    def _fan_out(self, connection_ids, message: dict):
+        """Queue one serialized copy of a message on every connection's sender"""
+        if not connection_ids:
+            return
+        text = encode_message(message)
+        for connection_id in list(connection_ids):
+            self._enqueue(connection_id, text)
+
+    async def update_heartbeat(self, connection_id: str):
         """Update the last heartbeat timestamp for a connection"""
-        if connection_id in self.connection_metadata:
-            self.connection_metadata[connection_id]["last_heartbeat"] = datetime.now(
-                timezone.utc
+        connection = self.active_connections.get(connection_id)
+        if connection is not None:
+            connection.last_heartbeat = datetime.now(timezone.utc)
+            await self.live_presence.touch(
+                presence_member(
+                    connection_id, connection.user_id, connection.connected_at
+                ),
+                connection.last_heartbeat,
             )
-            user_id = self.connection_metadata[connection_id]["user_id"]
             duration = self.get_connection_duration(connection_id)
             logger.info(
-                f"User {user_id} active - Connection duration: {duration:.2f}s (connection: {connection_id})"
+                f"User {connection.user_id} active - Connection duration: {duration:.2f}s (connection: {connection_id})"
             )
 
     def get_connection_duration(self, connection_id: str) -> float | None:
         """Get the duration (in seconds) a connection has been active"""
-        if connection_id in self.connection_metadata:
-            connected_at = self.connection_metadata[connection_id]["connected_at"]
-            return (datetime.now(timezone.utc) - connected_at).total_seconds()
+        connection = self.active_connections.get(connection_id)
+        if connection is not None:
+            return (
+                datetime.now(timezone.utc) - connection.connected_at
+            ).total_seconds()
         return None
 
     def get_user_connections(self, user_id: str) -> list[str]:
         """Get all active connection IDs for a user"""
-        return [
-            conn_id
-            for conn_id, metadata in self.connection_metadata.items()
-            if metadata["user_id"] == user_id
-        ]
+        return list(self.user_connections.get(user_id, ()))
 
     def get_active_users(self) -> Set[str]:
         """Get all currently active user IDs"""
-        return {metadata["user_id"] for metadata in self.connection_metadata.values()}
+        return set(self.user_connections)
+
+    async def get_live_connections(self) -> list[dict]:
+        """Get the connections online on any worker, or on this one when Redis is not configured"""
+        online = await self.live_presence.online()
+        if online is not None:
+            return online
+        return [
+            {
+                "connection_id": connection_id,
+                "user_id": connection.user_id,
+                "connected_at": connection.connected_at.isoformat(),
+                "last_heartbeat": connection.last_heartbeat,
+            }
+            for connection_id, connection in self.active_connections.items()
+        ]
 
 
 # Global connection manager instance
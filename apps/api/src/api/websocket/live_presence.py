@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timezone
+
+import redis.asyncio as aioredis
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.core.settings import settings
+
+# Sorted set of live connections on every worker, scored by their last heartbeat
+LIVE_PRESENCE_KEY = "presence:live"
+
+
+def presence_member(connection_id: str, user_id: str, connected_at: datetime) -> str:
+    """The sorted set member of a connection; it never changes while the connection lives"""
+    return json.dumps(
+        {
+            "connection_id": connection_id,
+            "user_id": user_id,
+            "connected_at": connected_at.isoformat(),
+        },
+        separators=(",", ":"),
+    )
+
+
+class LivePresence:
+    """Tracks who is online across workers in Redis, expiring connections that stop heartbeating"""
+
+    def __init__(self, ttl: int | None = None):
+        self.ttl = ttl or settings.PRESENCE_TTL_SECONDS
+        self.redis: aioredis.Redis | None = None
+
+    async def touch(self, member: str, at: datetime):
+        """Mark a connection as alive as of a connect or heartbeat"""
+        if not self.redis:
+            return
+        try:
+            await self.redis.zadd(LIVE_PRESENCE_KEY, {member: at.timestamp()})
+        except RedisError as e:
+            logger.error(f"Error updating live presence: {e}")
+
+    async def remove(self, member: str):
+        """Forget a connection that closed cleanly"""
+        if not self.redis:
+            return
+        try:
+            await self.redis.zrem(LIVE_PRESENCE_KEY, member)
+        except RedisError as e:
+            logger.error(f"Error removing live presence: {e}")
+
+    async def online(self) -> list[dict] | None:
+        """Connections that heartbeated within the TTL, or None when Redis cannot answer"""
+        if not self.redis:
+            return None
+        cutoff = datetime.now(timezone.utc).timestamp() - self.ttl
+        try:
+            pipeline = self.redis.pipeline()
+            # Connections of crashed workers never disconnect; they just age out here
+            pipeline.zremrangebyscore(LIVE_PRESENCE_KEY, "-inf", f"({cutoff}")
+            pipeline.zrange(LIVE_PRESENCE_KEY, 0, -1, withscores=True)
+            _, entries = await pipeline.execute()
+        except RedisError as e:
+            logger.error(f"Error reading live presence: {e}")
+            return None
+        return [
+            {
+                **json.loads(member),
+                "last_heartbeat": datetime.fromtimestamp(score, timezone.utc),
+            }
+            for member, score in entries
+        ]
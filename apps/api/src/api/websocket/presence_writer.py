@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from loguru import logger
+from sqlalchemy import bindparam, insert, update
+
+from src.core.common import generate_id
+from src.core.settings import settings
+from src.database.engine import async_session_maker
+from src.database.models import UserPresence
+
+
+class PresenceWriter:
+    """Buffers presence connect/disconnect events and writes them to the database in batches"""
+
+    def __init__(
+        self,
+        flush_interval: float | None = None,
+        batch_size: int | None = None,
+    ):
+        self.flush_interval = flush_interval or settings.PRESENCE_FLUSH_INTERVAL_SECONDS
+        self.batch_size = batch_size or settings.PRESENCE_FLUSH_BATCH_SIZE
+
+        # Presence rows not inserted yet: {presence_id: row}
+        self.pending_inserts: Dict[str, dict] = {}
+        # Disconnects of rows that were already inserted
+        self.pending_updates: List[dict] = []
+
+        self.flush_requested: asyncio.Event | None = None
+        self.flusher: asyncio.Task | None = None
+
+    def pending(self) -> int:
+        """Number of buffered presence changes"""
+        return len(self.pending_inserts) + len(self.pending_updates)
+
+    def record_connect(
+        self, user_id: str, connection_id: str, connected_at: datetime
+    ) -> str:
+        """Queue a presence row for a new connection and return its ID"""
+        presence_id = generate_id()
+        now = datetime.now(timezone.utc)
+        self.pending_inserts[presence_id] = {
+            "id": presence_id,
+            "created_at": now,
+            "updated_at": now,
+            "user_id": user_id,
+            "connection_id": connection_id,
+            "connected_at": connected_at,
+            "disconnected_at": None,
+            "duration_seconds": None,
+        }
+        self._request_flush_if_full()
+        return presence_id
+
+    def record_disconnect(
+        self, presence_id: str, disconnected_at: datetime, duration: float
+    ):
+        """Queue the end of a connection's presence row"""
+        changes = {
+            "disconnected_at": disconnected_at,
+            "duration_seconds": duration,
+        }
+        # A connection that came and went within one batch is written in a single insert
+        row = self.pending_inserts.get(presence_id)
+        if row is not None:
+            row.update(changes)
+        else:
+            self.pending_updates.append(
+                {"presence_id": presence_id, "updated_at": disconnected_at, **changes}
+            )
+        self._request_flush_if_full()
+
+    def _request_flush_if_full(self):
+        self.start()
+        if self.pending() >= self.batch_size:
+            self.flush_requested.set()
+
+    def start(self):
+        """Start flushing in the background on the running event loop"""
+        if self.flusher is None or self.flusher.done():
+            self.flush_requested = asyncio.Event()
+            self.flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write whatever is still buffered"""
+        if self.flusher and not self.flusher.done():
+            self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+            self.flusher = None
+        await self.flush()
+
+    async def _run(self):
+        """Flush on every interval, or sooner once a batch fills up"""
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered presence changes in one transaction and return how many were written"""
+        if not self.pending():
+            return 0
+        inserts = list(self.pending_inserts.values())
+        updates = self.pending_updates
+        self.pending_inserts = {}
+        self.pending_updates = []
+
+        try:
+            async with async_session_maker() as session:
+                if inserts:
+                    await session.exec(insert(UserPresence), params=inserts)
+                if updates:
+                    # Core executemany, so a row lost with an earlier batch does not fail this one
+                    table = UserPresence.__table__
+                    statement = update(table).where(
+                        table.c.id == bindparam("presence_id")
+                    )
+                    await session.exec(statement, params=updates)
+                await session.commit()
+        except Exception as e:
+            # Presence is history, not state: drop the batch rather than let it pile up
+            logger.error(
+                f"Error writing {len(inserts) + len(updates)} presence records: {e}"
+            )
+            return 0
+        logger.info(
+            f"Wrote presence records: {len(inserts)} inserted, {len(updates)} updated"
+        )
+        return len(inserts) + len(updates)
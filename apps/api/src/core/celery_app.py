@@ -10,6 +10,7 @@ celery_app = Celery(
     include=[
         "src.modules.notifications.notification_tasks",
         "src.modules.broadcast.broadcast_tasks",
+        "src.modules.auth.auth_tasks",
     ],
 )
 
@@ -35,5 +36,9 @@ celery_app.conf.update(
             "schedule": crontab(hour=8, minute=0, day_of_week=1),
             "args": ("weekly",),
         },
+        "purge-refresh-tokens": {
+            "task": "src.modules.auth.auth_tasks.purge_expired_refresh_tokens",
+            "schedule": crontab(hour=3, minute=0),
+        },
     },
 )
@@ -1,5 +1,12 @@
+from datetime import datetime, timezone
+
 import bson
 
 
 def generate_id() -> str:
     return str(bson.ObjectId())
+
+
+def as_utc(value: datetime) -> datetime:
+    """Attach UTC to a naive datetime, as SQLite returns timestamptz columns without an offset."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import DateTime, desc, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor."""
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> list[Any]:
+    """Decode a cursor back into values for the given sort key columns."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursorError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise InvalidCursorError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def paginate(
+    statement,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    skip: int = 0,
+):
+    """Order a statement newest first by the sort key and seek past the cursor.
+
+    skip is kept for clients that still page by offset and is ignored once a cursor is given.
+    """
+    statement = statement.order_by(*[desc(column) for column in columns])
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        statement = statement.where(tuple_(*columns) < tuple_(*values))
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+
+def next_cursor(
+    rows: Sequence[Any], fields: Sequence[str], limit: int
+) -> Optional[str]:
+    """Build the cursor for the page after rows, or None when rows was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor([getattr(rows[-1], field) for field in fields])
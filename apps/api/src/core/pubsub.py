@@ -0,0 +1,55 @@
+import json
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.core.redis_client import get_redis
+
+USER_CHANNEL = "user:{}"
+EVENT_CHANNEL = "event:{}"
+# Private to the sockets a user signed in with, unlike the subscribable user channel
+INBOX_CHANNEL = "inbox:{}"
+
+
+def publish(channel: str, message: dict) -> bool:
+    """Publish a WebSocket message to every API worker, returning False when Redis is unavailable."""
+    client = get_redis()
+    if not client:
+        return False
+    try:
+        client.publish(channel, json.dumps(message, default=str))
+    except RedisError as e:
+        logger.warning(f"Could not publish to {channel}: {e}")
+        return False
+    return True
+
+
+def publish_many(messages: list[tuple[str, dict]]) -> bool:
+    """Publish several WebSocket messages in one round trip to Redis."""
+    client = get_redis()
+    if not client:
+        return False
+    try:
+        pipeline = client.pipeline(transaction=False)
+        for channel, message in messages:
+            pipeline.publish(channel, json.dumps(message, default=str))
+        pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not publish {len(messages)} messages: {e}")
+        return False
+    return True
+
+
+def publish_to_user(user_id: str, message: dict) -> bool:
+    """Publish a message to the subscribers of a user on every API worker."""
+    return publish(USER_CHANNEL.format(user_id), message)
+
+
+def publish_to_event(event_id: str, message: dict) -> bool:
+    """Publish a message to the subscribers of an event on every API worker."""
+    return publish(EVENT_CHANNEL.format(event_id), message)
+
+
+def publish_to_inbox(user_id: str, message: dict) -> bool:
+    """Publish a private message to the signed-in sockets of a user on every API worker."""
+    return publish(INBOX_CHANNEL.format(user_id), message)
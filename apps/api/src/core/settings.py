@@ -3,17 +3,43 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DB_URL: str = ""
+    # Database Pool Settings (per process, for both the sync and async engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Read Replica Settings (reads stay on DB_URL when unset)
+    DB_READ_URL: str = ""
+    DB_READ_AFTER_WRITE_SECONDS: int = 5
     SECRET_KEY: str = "your-secret-key"
     REFRESH_TOKEN_SECRET_KEY: str = "your-refresh-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # last_used_at is written at most this often per refresh token
+    REFRESH_TOKEN_TOUCH_INTERVAL_MINUTES: int = 15
+    # Expired and revoked refresh tokens are purged after this many days
+    REFRESH_TOKEN_RETENTION_DAYS: int = 7
+    # bcrypt cost factor; existing hashes below it are upgraded on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Threads dedicated to password hashing, i.e. concurrent logins/registrations per process
+    PASSWORD_HASH_WORKERS: int = 4
     # R2 Cloudflare Settings
     R2_ENDPOINT_URL: str = ""
     R2_ACCESS_KEY_ID: str = ""
     R2_SECRET_ACCESS_KEY: str = ""
     R2_BUCKET_NAME: str = ""
     R2_PUBLIC_URL: str = ""
+    # Presence history is written in batches: every interval, or sooner once a batch fills
+    PRESENCE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    PRESENCE_FLUSH_BATCH_SIZE: int = 500
+    # Connections count as online until this long after their last heartbeat
+    PRESENCE_TTL_SECONDS: int = 90
+    # Recipients per notification digest subtask; chunks are sent in parallel
+    NOTIFICATION_DIGEST_CHUNK_SIZE: int = 500
+    # A recipient's claimed digest rows are taken over by a later run after this long
+    NOTIFICATION_DIGEST_CLAIM_LEASE_SECONDS: int = 15 * 60
     # Redis Settings
     REDIS_URL: str = ""
     # Celery Settings
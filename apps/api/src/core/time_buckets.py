@@ -0,0 +1,42 @@
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+TIME_BUCKET_INTERVALS = ("hour", "day", "week")
+
+# SQLite has no date_trunc; these produce the same UTC bucket starts (weeks start on Monday)
+_SQLITE_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {})",
+    "day": "datetime({}, 'start of day')",
+    "week": "datetime({}, 'start of day', '-6 days', 'weekday 1')",
+}
+
+
+class time_bucket(FunctionElement):
+    """Start of the UTC hour, day or week a timestamp falls in, computed by the database."""
+
+    type = DateTime(timezone=True)
+    # The interval is compiled into the SQL, so it has to be part of the cache key
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("interval", InternalTraversal.dp_string)
+    ]
+    inherit_cache = True
+
+    def __init__(self, interval: str, column):
+        if interval not in TIME_BUCKET_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        self.interval = interval
+        super().__init__(column)
+
+
+@compiles(time_bucket)
+def _compile_time_bucket(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return f"date_trunc('{element.interval}', {column}, 'UTC')"
+
+
+@compiles(time_bucket, "sqlite")
+def _compile_time_bucket_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return _SQLITE_BUCKETS[element.interval].format(column)
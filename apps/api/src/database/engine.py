@@ -1,10 +1,149 @@
+import hashlib
+
+from fastapi import Depends, Request
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from src.core.redis_client import get_redis
 from src.core.settings import settings
 
-engine = create_engine(settings.DB_URL)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PRIMARY_PIN_KEY = "db_primary_pin:{}"
+
+
+def pool_options(url: str) -> dict:
+    """Pool settings for an engine, left to SQLAlchemy's defaults for SQLite."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def async_pool_options(url: str) -> dict:
+    """Pool settings for an async engine; aiosqlite connections are not pooled so their threads exit."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"poolclass": NullPool}
+    return pool_options(url)
+
+
+def to_async_url(url: str) -> URL:
+    """Swap the driver of a database URL for its asyncio counterpart."""
+    async_url = make_url(url)
+    backend = async_url.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg takes ssl instead of libpq's sslmode and has no channel_binding
+        query = dict(async_url.query)
+        query.pop("channel_binding", None)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return async_url.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return async_url.set(drivername="sqlite+aiosqlite")
+    return async_url
+
+
+engine = create_engine(settings.DB_URL, **pool_options(settings.DB_URL))
+async_engine = create_async_engine(
+    to_async_url(settings.DB_URL), **async_pool_options(settings.DB_URL)
+)
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Without a replica the read engines are the primary ones
+read_engine = engine
+async_read_engine = async_engine
+if settings.DB_READ_URL:
+    read_engine = create_engine(
+        settings.DB_READ_URL, **pool_options(settings.DB_READ_URL)
+    )
+    async_read_engine = create_async_engine(
+        to_async_url(settings.DB_READ_URL), **async_pool_options(settings.DB_READ_URL)
+    )
+async_read_session_maker = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+def _primary_pin_key(request: Request) -> str | None:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return PRIMARY_PIN_KEY.format(hashlib.sha256(authorization.encode()).hexdigest())
+
+
+def has_read_replica() -> bool:
+    """Check whether reads are served by a replica separate from the primary."""
+    return read_engine is not engine
+
+
+def pin_to_primary(request: Request) -> None:
+    """Keep a client's reads on the primary for a while after it writes."""
+    key = _primary_pin_key(request)
+    client = get_redis()
+    if read_engine is engine or not key or not client:
+        return
+    try:
+        client.set(key, 1, ex=settings.DB_READ_AFTER_WRITE_SECONDS)
+    except RedisError as e:
+        logger.warning(f"Could not pin client to primary: {e}")
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Check whether a read must go to the primary to see the client's own writes."""
+    if read_engine is engine:
+        return True
+    key = _primary_pin_key(request)
+    if not key:
+        return False
+    client = get_redis()
+    if not client:
+        # Without Redis there is no record of recent writes, so stay consistent
+        return True
+    try:
+        return bool(client.exists(key))
+    except RedisError as e:
+        logger.warning(f"Could not check primary pin: {e}")
+        return True
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+
+def get_read_session(request: Request, session: Session = Depends(get_session)):
+    """Session for read-only handlers, served by the replica when one is configured."""
+    if reads_from_primary(request):
+        yield session
+        return
+    with Session(read_engine) as read_session:
+        yield read_session
+
+
+async def get_async_read_session(
+    request: Request, session: AsyncSession = Depends(get_async_session)
+):
+    """Async session for read-only handlers, served by the replica when one is configured."""
+    # The pin lookup is a blocking Redis call, so it stays off the event loop
+    if not has_read_replica() or await run_in_threadpool(reads_from_primary, request):
+        yield session
+        return
+    async with async_read_session_maker() as read_session:
+        yield read_session
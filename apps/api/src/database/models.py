@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Index,
+    UniqueConstraint,
+    event,
+    select,
+    text,
+)
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.orm import Mapped, object_session, relationship
 from sqlmodel import Field, Relationship
 
 from src.core.base_models import BaseModel
@@ -69,11 +78,12 @@ class PostType(str, Enum):
 
 class InviteCode(BaseModel, table=True):
     __tablename__ = "invite_code"  # type: ignore
+    __table_args__ = (Index("ix_invite_code_created_at_id", "created_at", "id"),)
 
     code: str = Field(index=True, unique=True)
     max_uses: int = Field(default=1)
     used_count: int = Field(default=0)
-    expires_at: str | None = Field(default=None)
+    expires_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
     status: InviteCodeStatus = Field(default=InviteCodeStatus.ACTIVE)
     created_by: str = Field(foreign_key="user.id")
     auto_join_channel_id: str | None = Field(foreign_key="channel.id", default=None)
@@ -98,7 +108,7 @@ class PasswordReset(BaseModel, table=True):
     code: str = Field(index=True, unique=True)  # 6-letter code
     email: str = Field(index=True)
     status: PasswordResetStatus = Field(default=PasswordResetStatus.ACTIVE)
-    expires_at: str  # ISO datetime string
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True))
     user_id: str = Field(foreign_key="user.id")
     user: Mapped["User"] = Relationship(sa_relationship=relationship("User"))
 
@@ -109,25 +119,29 @@ class EmailVerification(BaseModel, table=True):
     code: str = Field(index=True, unique=True)  # 6-letter code
     email: str = Field(index=True)
     status: EmailVerificationStatus = Field(default=EmailVerificationStatus.ACTIVE)
-    expires_at: str  # ISO datetime string
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True))
     user_id: str = Field(foreign_key="user.id")
     user: Mapped["User"] = Relationship(sa_relationship=relationship("User"))
 
 
 class RefreshToken(BaseModel, table=True):
     __tablename__ = "refresh_token"  # type: ignore
+    __table_args__ = (
+        Index("ix_refresh_token_user_id_status", "user_id", "status"),
+        Index("ix_refresh_token_expires_at", "expires_at"),
+    )
 
     token_hash: str = Field(index=True, unique=True)
     user_id: str = Field(foreign_key="user.id")
     status: RefreshTokenStatus = Field(default=RefreshTokenStatus.ACTIVE)
-    expires_at: str  # ISO datetime string
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True))
     # Device/session info
     device_name: str | None = Field(default=None)  # e.g., "Chrome on macOS"
     device_type: str | None = Field(default=None)  # e.g., "desktop", "mobile", "tablet"
     browser: str | None = Field(default=None)  # e.g., "Chrome 120"
     os: str | None = Field(default=None)  # e.g., "macOS 14.0"
     ip_address: str | None = Field(default=None)
-    last_used_at: str | None = Field(default=None)  # ISO datetime string
+    last_used_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
     user: Mapped["User"] = Relationship(
         sa_relationship=relationship("User", back_populates="refresh_tokens")
     )
@@ -135,6 +149,7 @@ class RefreshToken(BaseModel, table=True):
 
 class User(BaseModel, table=True):
     __tablename__ = "user"  # type: ignore
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
 
     name: str | None = Field(default=None)
     bio: str | None = Field(default=None)
@@ -145,6 +160,8 @@ class User(BaseModel, table=True):
     is_verified: bool = Field(default=False)
     avatar_url: str | None = Field(default=None)
     role: Role = Field(default=Role.USER)
+    # Bumped to reject every access token issued before, e.g. on a ban
+    token_version: int = Field(default=0)
     posts: Mapped[List["Post"]] = Relationship(
         sa_relationship=relationship("Post", back_populates="user")
     )
@@ -225,13 +242,30 @@ class UserSocial(BaseModel, table=True):
 
 
 class Post(BaseModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_post_type_is_pinned_created_at_id",
+            "type",
+            "is_pinned",
+            "created_at",
+            "id",
+        ),
+        Index("ix_post_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
     title: str | None = Field(default=None)
     content: str
     type: PostType = Field(default=PostType.POST)
     user_id: str = Field(foreign_key="user.id")
     channel_id: str | None = Field(foreign_key="channel.id", default=None)
     parent_id: str | None = Field(foreign_key="post.id", default=None)
+    # Slash separated ids from the thread root down to this post, set on insert
+    path: str = Field(default="")
+    root_id: str | None = Field(
+        default=None, index=True
+    )  # Thread root, itself for roots
     is_pinned: bool = Field(default=False)
+    comment_count: int = Field(default=0)  # Non-deleted replies in the whole subtree
+    reaction_count: int = Field(default=0)  # Non-deleted reactions on this post
     user: Mapped["User"] = Relationship(
         sa_relationship=relationship("User", back_populates="posts")
     )
@@ -253,29 +287,46 @@ class Post(BaseModel, table=True):
     reactions: Mapped[List["Reaction"]] = Relationship(
         sa_relationship=relationship("Reaction", back_populates="post")
     )
+    reaction_counts: Mapped[List["PostReactionCount"]] = Relationship(
+        sa_relationship=relationship("PostReactionCount", back_populates="post")
+    )
 
-    @hybrid_property
-    def comment_count(self) -> int:
-        from sqlalchemy import inspect, text
 
-        sql = text("""
-        WITH RECURSIVE rt AS (
-            SELECT id FROM post WHERE parent_id = :post_id
-            UNION ALL
-            SELECT p.id FROM post p INNER JOIN rt ON p.parent_id = rt.id
-        )
-        SELECT COUNT(*) FROM rt
-        """)
-        insp = inspect(self)
-        if insp is not None and hasattr(insp, "session") and insp.session is not None:
-            return insp.session.scalar(sql.bindparams(post_id=self.id))
-        return 0
+def build_post_path(post: Post, connection) -> str:
+    """Build the materialized path of a post from its parent's path."""
+    if post.path:
+        return post.path
+    if not post.parent_id:
+        return post.id
+
+    # The parent may be pending in the same flush and not inserted yet
+    session = object_session(post)
+    for pending in session.new if session else []:
+        if isinstance(pending, Post) and pending.id == post.parent_id:
+            return f"{build_post_path(pending, connection)}/{post.id}"
+
+    parent_path = connection.execute(
+        select(Post.path).where(Post.id == post.parent_id)  # type: ignore
+    ).scalar()
+    return f"{parent_path or post.parent_id}/{post.id}"
+
+
+@event.listens_for(Post, "before_insert")
+def set_post_path(mapper, connection, target):
+    target.path = build_post_path(target, connection)
+    target.root_id = target.path.split("/", 1)[0]
+
 
-    @hybrid_property
-    def reaction_count(self) -> int:
-        return len(self.reactions)
+class PostReactionCount(BaseModel, table=True):
+    __tablename__ = "post_reaction_count"  # type: ignore
+    __table_args__ = (UniqueConstraint("post_id", "emoji"),)
 
-    model_config = {"ignored_types": (hybrid_property,)}  # type: ignore
+    post_id: str = Field(foreign_key="post.id", index=True)
+    emoji: str
+    count: int = Field(default=0)
+    post: Mapped["Post"] = Relationship(
+        sa_relationship=relationship("Post", back_populates="reaction_counts")
+    )
 
 
 class Media(BaseModel, table=True):
@@ -370,6 +421,21 @@ class Activity(BaseModel, table=True):
 
 
 class Notification(BaseModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_notification_recipient_id_created_at_id",
+            "recipient_id",
+            "created_at",
+            "id",
+        ),
+        # Only unread notifications are indexed, so counting them stays cheap
+        Index(
+            "ix_notification_unread_recipient_id",
+            "recipient_id",
+            postgresql_where=text("NOT is_read AND deleted_at IS NULL"),
+            sqlite_where=text("is_read = 0 AND deleted_at IS NULL"),
+        ),
+    )
     recipient_id: str = Field(foreign_key="user.id")
     sender_id: str = Field(foreign_key="user.id")
     type: NotificationType
@@ -438,11 +504,12 @@ class Lesson(BaseModel, table=True):
 
 
 class EnrolledCourse(BaseModel, table=True):
+    __table_args__ = (Index("ix_enrolledcourse_created_at_id", "created_at", "id"),)
     user_id: str = Field(foreign_key="user.id")
     course_id: str = Field(foreign_key="course.id")
     status: EnrollmentStatus = Field(default=EnrollmentStatus.ACTIVE)
-    enrolled_at: str | None = Field(default=None)
-    completed_at: str | None = Field(default=None)
+    enrolled_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+    completed_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
     user: Mapped["User"] = Relationship(sa_relationship=relationship("User"))
     course: Mapped["Course"] = Relationship(
         sa_relationship=relationship("Course", back_populates="enrollments")
@@ -492,10 +559,10 @@ class UserPresence(BaseModel, table=True):
 
     user_id: str = Field(foreign_key="user.id", index=True)
     connection_id: str = Field(index=True)  # WebSocket connection ID
-    connected_at: str = Field(index=True)  # ISO datetime when connected
-    disconnected_at: str | None = Field(
-        default=None, index=True
-    )  # ISO datetime when disconnected
+    connected_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    disconnected_at: datetime | None = Field(
+        default=None, sa_type=DateTime(timezone=True), index=True
+    )
     duration_seconds: float | None = Field(default=None)  # Total connection duration
     user: Mapped["User"] = Relationship(sa_relationship=relationship("User"))
 
@@ -516,13 +583,28 @@ class NotificationPreferences(BaseModel, table=True):
 
 class PendingNotificationEmail(BaseModel, table=True):
     __tablename__ = "pending_notification_email"  # type: ignore
+    # Due rows are walked by recipient, and only unsent rows are ever looked up
+    __table_args__ = (
+        Index(
+            "ix_pending_notification_email_unsent_frequency_user_id",
+            "frequency",
+            "user_id",
+            "scheduled_for",
+            postgresql_where=text("NOT is_sent"),
+            sqlite_where=text("is_sent = 0"),
+        ),
+    )
 
     user_id: str = Field(foreign_key="user.id", index=True)
     notification_id: str = Field(foreign_key="notification.id", index=True)
     notification_type: NotificationType
     frequency: NotificationFrequency
-    scheduled_for: str = Field(index=True)  # ISO datetime for when to send
+    scheduled_for: datetime = Field(sa_type=DateTime(timezone=True), index=True)
     is_sent: bool = Field(default=False, index=True)
+    # Set while a digest run is emailing the row; a stale claim is free to take over
+    claimed_at: Optional[datetime] = Field(
+        default=None, sa_type=DateTime(timezone=True)
+    )
     user: Mapped["User"] = Relationship(sa_relationship=relationship("User"))
     notification: Mapped["Notification"] = Relationship(
         sa_relationship=relationship("Notification")
@@ -544,6 +626,7 @@ class BroadcastRecipientType(str, Enum):
 
 class Broadcast(BaseModel, table=True):
     __tablename__ = "broadcast"  # type: ignore
+    __table_args__ = (Index("ix_broadcast_created_at_id", "created_at", "id"),)
 
     subject: str = Field(index=True)
     content: str  # Markdown/HTML content from WYSIWYG
@@ -565,7 +648,7 @@ class Broadcast(BaseModel, table=True):
             default=BroadcastStatus.DRAFT,
         ),
     )
-    sent_at: str | None = Field(default=None)  # ISO datetime string
+    sent_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
     sent_count: int = Field(default=0)
     failed_count: int = Field(default=0)
     created_by: str = Field(foreign_key="user.id")
@@ -601,7 +684,7 @@ class BroadcastRecipient(BaseModel, table=True):
             default=BroadcastRecipientStatus.PENDING,
         ),
     )
-    sent_at: str | None = Field(default=None)  # ISO datetime string
+    sent_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
     error_message: str | None = Field(default=None)
     broadcast: Mapped["Broadcast"] = Relationship(
         sa_relationship=relationship("Broadcast", back_populates="recipients")
@@ -1,9 +1,10 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from scalar_fastapi import get_scalar_api_reference
+from starlette.concurrency import run_in_threadpool
 
 from src.api.account.api import router as account_router
 from src.api.applinks.api import router as applinks_router
@@ -24,7 +25,16 @@ from src.api.reaction.api import router as reaction_router
 from src.api.resources.api import router as resources_router
 from src.api.user.api import router as user_router
 from src.api.websocket.api import router as websocket_router
-from src.database.engine import get_session
+from src.api.websocket.connection_manager import manager as websocket_manager
+from src.core.pagination import NEXT_CURSOR_HEADER
+from src.database.engine import (
+    SAFE_METHODS,
+    async_engine,
+    async_read_engine,
+    get_session,
+    has_read_replica,
+    pin_to_primary,
+)
 from src.modules.appsettings import appsettings_methods
 
 
@@ -51,10 +61,17 @@ async def lifespan(app: FastAPI):
         if session is not None:
             session.close()
 
+    await websocket_manager.start_backplane()
+
     yield
 
     # Shutdown: Cleanup if needed
     logger.info("Application shutting down...")
+    await websocket_manager.stop_backplane()
+    await websocket_manager.presence_writer.stop()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -69,8 +86,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    """Route a client's reads to the primary right after it writes."""
+    response = await call_next(request)
+    if (
+        request.method not in SAFE_METHODS
+        and response.status_code < 400
+        and has_read_replica()
+    ):
+        # Pinning is a blocking Redis write, so it runs on the threadpool
+        await run_in_threadpool(pin_to_primary, request)
+    return response
+
+
 app.include_router(account_router, prefix="/api", tags=["account"])
 app.include_router(user_router, prefix="/api", tags=["users"])
 app.include_router(media_router, prefix="/api", tags=["medias"])
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import List, Optional
 
 from sqlalchemy import column, desc
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
 
 from src.database.models import Post, PostType
@@ -41,12 +42,15 @@ def get_all_articles(db: Session, skip: int = 0, limit: int = 100) -> List[Post]
     """Get all articles with pagination."""
     statement = (
         select(Post)
+        .options(
+            joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
+        )
         .where(Post.type == PostType.ARTICLE, Post.deleted_at.is_(None))
         .order_by(desc(column("created_at")))
         .offset(skip)
         .limit(limit)
     )
-    result = db.exec(statement).all()
+    result = db.exec(statement).unique().all()
     return list(result)
 
 
@@ -56,6 +60,9 @@ def get_articles_by_user(
     """Get all articles by a specific user."""
     statement = (
         select(Post)
+        .options(
+            joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
+        )
         .where(
             Post.type == PostType.ARTICLE,
             Post.user_id == user_id,
@@ -65,7 +72,7 @@ def get_articles_by_user(
         .offset(skip)
         .limit(limit)
     )
-    result = db.exec(statement).all()
+    result = db.exec(statement).unique().all()
     return list(result)
 
 
@@ -1,13 +1,19 @@
+import asyncio
 import hashlib
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, TypedDict
+from functools import partial
+from typing import Callable, Optional, TypedDict, TypeVar
 
 import jwt
 from passlib.context import CryptContext
+from sqlalchemy import and_, delete, or_, update
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
+from starlette.concurrency import run_in_threadpool
 
+from src.core.common import as_utc
 from src.core.settings import settings
 from src.database.models import (
     InviteCodeStatus,
@@ -18,6 +24,7 @@ from src.database.models import (
 )
 from src.modules.auth.email_verification_methods import create_email_verification
 from src.modules.auth.password_reset_methods import create_password_reset
+from src.modules.auth.principal_methods import access_token_claims
 from src.modules.email.email_service import email_service
 from src.modules.invite_code.invite_code_methods import (
     auto_join_user_to_channel,
@@ -29,7 +36,22 @@ from src.modules.user.user_methods import (
     get_user_by_username,
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below the configured cost are flagged by needs_update and rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt is CPU-bound, so hashing and verification run on this bounded pool. Callers
+# await it from the event loop, so a login burst queues here without holding any of
+# the threads that serve the other sync endpoints.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+T = TypeVar("T")
 
 
 def hash_password(password: str) -> str:
@@ -42,6 +64,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def run_password_work(func: Callable[..., T], *args) -> T:
+    """Run a bcrypt call on the password pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, partial(func, *args))
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -88,13 +116,13 @@ def create_refresh_token(
         token_hash=token_hash,
         user_id=user_id,
         status=RefreshTokenStatus.ACTIVE,
-        expires_at=expires_at.isoformat(),
+        expires_at=expires_at,
         device_name=device_info.get("device_name") if device_info else None,
         device_type=device_info.get("device_type") if device_info else None,
         browser=device_info.get("browser") if device_info else None,
         os=device_info.get("os") if device_info else None,
         ip_address=device_info.get("ip_address") if device_info else None,
-        last_used_at=datetime.now(timezone.utc).isoformat(),
+        last_used_at=datetime.now(timezone.utc),
     )
     db.add(refresh_token)
     db.commit()
@@ -104,62 +132,89 @@ def create_refresh_token(
 
 def verify_refresh_token(db: Session, token: str) -> Optional[User]:
     """Verify a refresh token and return the associated user."""
-    token_hash = hash_token(token)
+    now = datetime.now(timezone.utc)
     statement = select(RefreshToken).where(
-        RefreshToken.token_hash == token_hash,
+        RefreshToken.token_hash == hash_token(token),
         RefreshToken.status == RefreshTokenStatus.ACTIVE,
+        RefreshToken.expires_at > now,
     )
     refresh_token = db.exec(statement).first()
 
     if not refresh_token:
         return None
 
-    # Check expiration
-    expires_at = datetime.fromisoformat(refresh_token.expires_at.replace("Z", "+00:00"))
-    if datetime.now(timezone.utc) > expires_at:
-        refresh_token.status = RefreshTokenStatus.EXPIRED
-        db.commit()
-        return None
-
     # Get user
     user = db.get(User, refresh_token.user_id)
     if not user or not user.is_active:
         return None
 
-    # Update last_used_at
-    refresh_token.last_used_at = datetime.now(timezone.utc).isoformat()
-    db.commit()
+    # Record use at most once per interval so refreshing stays read-only
+    touch_interval = timedelta(minutes=settings.REFRESH_TOKEN_TOUCH_INTERVAL_MINUTES)
+    if (
+        refresh_token.last_used_at is None
+        or as_utc(refresh_token.last_used_at) <= now - touch_interval
+    ):
+        refresh_token.last_used_at = now
+        db.commit()
 
     return user
 
 
-def revoke_refresh_token(db: Session, token: str) -> bool:
-    """Revoke a refresh token."""
-    token_hash = hash_token(token)
-    statement = select(RefreshToken).where(RefreshToken.token_hash == token_hash)
-    refresh_token = db.exec(statement).first()
+def _revoke_refresh_tokens(db: Session, *criteria) -> int:
+    """Revoke the refresh tokens matching the criteria in one UPDATE."""
+    statement = (
+        update(RefreshToken)
+        .where(*criteria)
+        .values(
+            status=RefreshTokenStatus.REVOKED, updated_at=datetime.now(timezone.utc)
+        )
+    )
+    result = db.exec(statement)
+    db.commit()
+    return result.rowcount
 
-    if not refresh_token:
-        return False
 
-    refresh_token.status = RefreshTokenStatus.REVOKED
-    db.commit()
-    return True
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Revoke a refresh token."""
+    return _revoke_refresh_tokens(db, RefreshToken.token_hash == hash_token(token)) > 0
 
 
 def revoke_all_user_refresh_tokens(db: Session, user_id: str) -> int:
     """Revoke all refresh tokens for a user."""
-    statement = select(RefreshToken).where(
+    return _revoke_refresh_tokens(
+        db,
         RefreshToken.user_id == user_id,
         RefreshToken.status == RefreshTokenStatus.ACTIVE,
     )
-    tokens = db.exec(statement).all()
-    count = 0
-    for token in tokens:
-        token.status = RefreshTokenStatus.REVOKED
-        count += 1
-    db.commit()
-    return count
+
+
+def purge_refresh_tokens(db: Session, batch_size: int = 1000) -> int:
+    """Delete expired and revoked refresh tokens in batches and return how many were removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.REFRESH_TOKEN_RETENTION_DAYS
+    )
+    purged = 0
+    while True:
+        # Inactive tokens are kept for a while so revoked sessions stay visible in audits
+        statement = (
+            select(RefreshToken.id)
+            .where(
+                or_(
+                    RefreshToken.expires_at < cutoff,
+                    and_(
+                        RefreshToken.status != RefreshTokenStatus.ACTIVE,
+                        RefreshToken.updated_at < cutoff,
+                    ),
+                )
+            )
+            .limit(batch_size)
+        )
+        token_ids = list(db.exec(statement).all())
+        if not token_ids:
+            return purged
+        db.exec(delete(RefreshToken).where(col(RefreshToken.id).in_(token_ids)))
+        db.commit()
+        purged += len(token_ids)
 
 
 def get_user_sessions(db: Session, user_id: str) -> list[RefreshToken]:
@@ -167,28 +222,25 @@ def get_user_sessions(db: Session, user_id: str) -> list[RefreshToken]:
     statement = select(RefreshToken).where(
         RefreshToken.user_id == user_id,
         RefreshToken.status == RefreshTokenStatus.ACTIVE,
+        RefreshToken.expires_at > datetime.now(timezone.utc),
     )
     return list(db.exec(statement).all())
 
 
 def revoke_session_by_id(db: Session, session_id: str, user_id: str) -> bool:
     """Revoke a specific session by ID (only if it belongs to the user)."""
-    statement = select(RefreshToken).where(
-        RefreshToken.id == session_id,
-        RefreshToken.user_id == user_id,
-        RefreshToken.status == RefreshTokenStatus.ACTIVE,
+    return (
+        _revoke_refresh_tokens(
+            db,
+            RefreshToken.id == session_id,
+            RefreshToken.user_id == user_id,
+            RefreshToken.status == RefreshTokenStatus.ACTIVE,
+        )
+        > 0
     )
-    refresh_token = db.exec(statement).first()
-
-    if not refresh_token:
-        return False
-
-    refresh_token.status = RefreshTokenStatus.REVOKED
-    db.commit()
-    return True
 
 
-def register_user(
+async def register_user(
     db: Session,
     username: str,
     email: str,
@@ -197,6 +249,15 @@ def register_user(
     invite_code: Optional[str] = None,
 ) -> User:
     """Register a new user."""
+    await run_in_threadpool(_check_registration, db, username, invite_code)
+    hashed_password = await run_password_work(pwd_context.hash, password)
+    return await run_in_threadpool(
+        _create_registered_user, db, username, email, hashed_password, name, invite_code
+    )
+
+
+def _check_registration(db: Session, username: str, invite_code: Optional[str]) -> None:
+    """Reject a registration before its password is hashed."""
     existing_user = get_user_by_username(db, username)
     if existing_user:
         raise ValueError("Username already registered")
@@ -212,22 +273,25 @@ def register_user(
             raise ValueError(f"Invite code is {invite_code_obj.status}")
 
         # Check if code has expired
-        if invite_code_obj.expires_at:
-            try:
-                expires_at = datetime.fromisoformat(
-                    invite_code_obj.expires_at.replace("Z", "+00:00")
-                )
-                if datetime.now(timezone.utc) > expires_at:
-                    raise ValueError("Invite code has expired")
-            except ValueError:
-                raise ValueError("Invite code has expired")
+        if invite_code_obj.expires_at and datetime.now(timezone.utc) > as_utc(
+            invite_code_obj.expires_at
+        ):
+            raise ValueError("Invite code has expired")
 
         # Check if code has reached max uses
         if invite_code_obj.used_count >= invite_code_obj.max_uses:
             raise ValueError("Invite code has been fully used")
 
-    hashed_password = hash_password(password)
 
+def _create_registered_user(
+    db: Session,
+    username: str,
+    email: str,
+    hashed_password: str,
+    name: Optional[str],
+    invite_code: Optional[str],
+) -> User:
+    """Create a checked registration with its settings, verification email and invite."""
     user_data = {
         "username": username,
         "email": email,
@@ -273,33 +337,50 @@ def register_user(
                 db, user.id, validated_invite_code.auto_join_channel_id
             )
 
+    # Loaded here so the caller does not lazy-load it on the event loop
+    db.refresh(user)
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(
+    db: Session, username: str, password: str
+) -> Optional[User]:
     """Authenticate a user."""
-    user = get_user_by_username(db, username)
+    user = await run_in_threadpool(get_user_by_username, db, username)
     if not user or not user.password:
         return None
-    if not verify_password(password, user.password):
+    is_valid, new_hash = await run_password_work(
+        pwd_context.verify_and_update, password, user.password
+    )
+    if not is_valid:
         return None
+    # Upgrade hashes made with an older cost factor while we have the plain password
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
     return user
 
 
+def _store_password_hash(db: Session, user: User, password_hash: str) -> None:
+    """Save a rehashed password and reload the user it expired."""
+    user.password = password_hash
+    db.commit()
+    db.refresh(user)
+
+
 class Token(TypedDict):
     access_token: str
     refresh_token: str
     token_type: str
 
 
-def login_user(
+async def login_user(
     db: Session,
     username: str,
     password: str,
     device_info: Optional[DeviceInfo] = None,
 ) -> Optional[Token]:
     """Login a user and return access and refresh tokens."""
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user(db, username, password)
     if not user:
         return None
 
@@ -309,9 +390,11 @@ def login_user(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
+    )
+    refresh_token = await run_in_threadpool(
+        create_refresh_token, db, user.id, device_info
     )
-    refresh_token = create_refresh_token(db, user.id, device_info)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -0,0 +1,26 @@
+from loguru import logger
+from sqlmodel import Session
+
+from src.core.celery_app import celery_app
+from src.database.engine import engine
+from src.modules.auth.auth_methods import purge_refresh_tokens
+
+
+@celery_app.task
+def purge_expired_refresh_tokens():
+    """Delete expired and revoked refresh tokens past their retention period."""
+    with Session(engine) as db:
+        try:
+            purged_count = purge_refresh_tokens(db)
+            return {
+                "success": True,
+                "purged_count": purged_count,
+                "message": f"Purged {purged_count} refresh tokens",
+            }
+        except Exception as e:
+            logger.error(f"Failed to purge refresh tokens: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to purge refresh tokens",
+            }
@@ -5,6 +5,7 @@ from typing import Optional
 
 from sqlmodel import Session, select
 
+from src.core.common import as_utc
 from src.database.models import EmailVerification, EmailVerificationStatus
 
 
@@ -35,7 +36,7 @@ def create_email_verification(
         code=code,
         email=email,
         user_id=user_id,
-        expires_at=expires_at.isoformat(),
+        expires_at=expires_at,
         status=EmailVerificationStatus.ACTIVE,
     )
 
@@ -64,16 +65,10 @@ def is_verification_code_valid(db: Session, code: str) -> bool:
         return False
 
     # Check expiration
-    try:
-        expires_at = datetime.fromisoformat(
-            verification.expires_at.replace("Z", "+00:00")
-        )
-        if datetime.now(timezone.utc) > expires_at:
-            # Mark as expired
-            verification.status = EmailVerificationStatus.EXPIRED
-            db.commit()
-            return False
-    except ValueError:
+    if datetime.now(timezone.utc) > as_utc(verification.expires_at):
+        # Mark as expired
+        verification.status = EmailVerificationStatus.EXPIRED
+        db.commit()
         return False
 
     return True
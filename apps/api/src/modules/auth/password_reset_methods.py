@@ -4,7 +4,9 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 
+from src.core.common import as_utc
 from src.database.models import PasswordReset, PasswordResetStatus
 from src.modules.user.user_methods import get_user_by_email
 
@@ -38,7 +40,7 @@ def create_password_reset(db: Session, email: str) -> Optional[PasswordReset]:
         code=code,
         email=email,
         user_id=user.id,
-        expires_at=expires_at.isoformat(),
+        expires_at=expires_at,
         status=PasswordResetStatus.ACTIVE,
     )
 
@@ -65,14 +67,10 @@ def is_reset_code_valid(db: Session, code: str) -> bool:
         return False
 
     # Check expiration
-    try:
-        expires_at = datetime.fromisoformat(reset.expires_at.replace("Z", "+00:00"))
-        if datetime.now(timezone.utc) > expires_at:
-            # Mark as expired
-            reset.status = PasswordResetStatus.EXPIRED
-            db.commit()
-            return False
-    except ValueError:
+    if datetime.now(timezone.utc) > as_utc(reset.expires_at):
+        # Mark as expired
+        reset.status = PasswordResetStatus.EXPIRED
+        db.commit()
         return False
 
     return True
@@ -89,17 +87,19 @@ def use_reset_code(db: Session, code: str) -> Optional[PasswordReset]:
     return reset
 
 
-def reset_user_password(db: Session, code: str, new_password: str) -> bool:
+async def reset_user_password(db: Session, code: str, new_password: str) -> bool:
     """Reset user password using a valid reset code."""
-    reset = use_reset_code(db, code)
+    reset = await run_in_threadpool(use_reset_code, db, code)
     if not reset:
         return False
 
     # Update user password
-    from src.modules.auth.auth_methods import hash_password
+    from src.modules.auth.auth_methods import pwd_context, run_password_work
     from src.modules.user.user_methods import update_user
 
-    hashed_password = hash_password(new_password)
-    updated_user = update_user(db, reset.user_id, {"password": hashed_password})
+    hashed_password = await run_password_work(pwd_context.hash, new_password)
+    updated_user = await run_in_threadpool(
+        lambda: update_user(db, reset.user_id, {"password": hashed_password})
+    )
 
     return updated_user is not None
@@ -0,0 +1,92 @@
+import json
+from typing import Optional
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlmodel import Session
+
+from src.core.redis_client import get_redis
+from src.database.models import Role, User
+
+PRINCIPAL_CACHE_TTL_SECONDS = 300
+
+
+class Principal:
+    """The authenticated caller: just enough of a User to authorize a request"""
+
+    __slots__ = ("id", "username", "role", "is_active", "token_version")
+
+    def __init__(
+        self,
+        id: str,
+        username: str,
+        role: Role,
+        is_active: bool,
+        token_version: int,
+    ):
+        self.id = id
+        self.username = username
+        self.role = Role(role)
+        self.is_active = is_active
+        self.token_version = token_version
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            user.id, user.username, user.role, user.is_active, user.token_version
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({name: getattr(self, name) for name in self.__slots__})
+
+
+def _principal_cache_key(user_id: str) -> str:
+    return f"principal:{user_id}"
+
+
+def access_token_claims(user: User) -> dict:
+    """Claims an access token carries so requests can be authorized without loading the user."""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "role": user.role.value,
+        "ver": user.token_version,
+    }
+
+
+def get_principal(db: Session, user_id: str) -> Optional[Principal]:
+    """Get the principal of a user, cached in Redis and loaded by primary key on a miss."""
+    client = get_redis()
+    if client:
+        try:
+            cached = client.get(_principal_cache_key(user_id))
+            if cached is not None:
+                return Principal(**json.loads(cached))
+        except RedisError as e:
+            logger.warning(f"Failed to read principal cache: {e}")
+
+    user = db.get(User, user_id)
+    if user is None or user.deleted_at is not None:
+        return None
+    principal = Principal.from_user(user)
+    if client:
+        try:
+            client.setex(
+                _principal_cache_key(user_id),
+                PRINCIPAL_CACHE_TTL_SECONDS,
+                principal.to_json(),
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to write principal cache: {e}")
+    return principal
+
+
+def invalidate_principal(user_id: str) -> None:
+    """Drop the cached principal of a user after their role, status or tokens change."""
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(_principal_cache_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Failed to invalidate principal cache: {e}")
@@ -1,9 +1,9 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from sqlalchemy import column, desc
 from sqlmodel import Session, select
 
+from src.core.pagination import next_cursor, paginate
 from src.database.models import (
     Broadcast,
     BroadcastRecipient,
@@ -43,17 +43,16 @@ def get_broadcast(db: Session, broadcast_id: str) -> Optional[Broadcast]:
     return result
 
 
-def get_all_broadcasts(db: Session, skip: int = 0, limit: int = 100) -> List[Broadcast]:
-    """Get all broadcasts with pagination."""
-    statement = (
-        select(Broadcast)
-        .where(Broadcast.deleted_at.is_(None))
-        .order_by(desc(column("created_at")))
-        .offset(skip)
-        .limit(limit)
+def get_all_broadcasts(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> tuple[List[Broadcast], Optional[str]]:
+    """Get a page of broadcasts and the cursor of the next page."""
+    statement = select(Broadcast).where(Broadcast.deleted_at.is_(None))
+    statement = paginate(
+        statement, [Broadcast.created_at, Broadcast.id], cursor, limit, skip
     )
-    result = db.exec(statement).all()
-    return list(result)
+    broadcasts = list(db.exec(statement).all())
+    return broadcasts, next_cursor(broadcasts, ["created_at", "id"], limit)
 
 
 def update_broadcast(
@@ -143,7 +142,7 @@ def update_broadcast_recipient_status(
 
     recipient.status = status
     if status == BroadcastRecipientStatus.SENT:
-        recipient.sent_at = datetime.now(timezone.utc).isoformat()
+        recipient.sent_at = datetime.now(timezone.utc)
     if error_message:
         recipient.error_message = error_message
 
@@ -168,7 +167,7 @@ def update_broadcast_status(
     broadcast.sent_count = sent_count
     broadcast.failed_count = failed_count
     if status == BroadcastStatus.SENT:
-        broadcast.sent_at = datetime.now(timezone.utc).isoformat()
+        broadcast.sent_at = datetime.now(timezone.utc)
 
     db.commit()
     db.refresh(broadcast)
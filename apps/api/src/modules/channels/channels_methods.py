@@ -1,9 +1,16 @@
+import json
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from sqlmodel import Session, asc, select
+from loguru import logger
+from redis import RedisError
+from sqlalchemy import exists, or_
+from sqlmodel import Session, asc, col, select
 
-from src.database.models import Channel, ChannelMember
+from src.core.redis_client import get_redis
+from src.database.models import Channel, ChannelMember, ChannelType, Role, User
+
+MEMBERSHIP_CACHE_TTL_SECONDS = 60
 
 
 def soft_delete(db: Session, record) -> None:
@@ -12,6 +19,30 @@ def soft_delete(db: Session, record) -> None:
     db.add(record)
 
 
+def _request_cache(db: Session) -> dict:
+    """Get the channel access memo that lives as long as the request's session."""
+    info = getattr(db, "info", None)
+    if not isinstance(info, dict):
+        return {}
+    return info.setdefault("channel_access", {"channels": {}, "member_channel_ids": {}})
+
+
+def _membership_cache_key(user_id: str) -> str:
+    return f"channel_members:{user_id}"
+
+
+def invalidate_membership_cache(db: Session, user_id: str) -> None:
+    """Drop the cached membership set of a user after it changes."""
+    _request_cache(db).get("member_channel_ids", {}).pop(user_id, None)
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(_membership_cache_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Failed to invalidate channel membership cache: {e}")
+
+
 def create_channel(db: Session, channel_data: dict) -> Channel:
     """Create a new channel."""
     channel = Channel(**channel_data)
@@ -22,11 +53,18 @@ def create_channel(db: Session, channel_data: dict) -> Channel:
 
 
 def get_channel(db: Session, channel_id: str) -> Optional[Channel]:
-    """Get a channel by ID."""
+    """Get a channel by ID, memoized for the rest of the request."""
+    channels = _request_cache(db).get("channels", {})
+    if channel_id in channels:
+        return channels[channel_id]
+
     statement = select(Channel).where(
         Channel.id == channel_id, Channel.deleted_at.is_(None)
     )
-    return db.exec(statement).first()
+    channel = db.exec(statement).first()
+    if channel:
+        channels[channel_id] = channel
+    return channel
 
 
 def get_channel_by_slug(db: Session, slug: str) -> Optional[Channel]:
@@ -48,6 +86,7 @@ def update_channel(
         setattr(channel, key, value)
     db.commit()
     db.refresh(channel)
+    _request_cache(db).get("channels", {}).pop(channel_id, None)
     return channel
 
 
@@ -58,6 +97,7 @@ def delete_channel(db: Session, channel_id: str) -> bool:
         return False
     soft_delete(db, channel)
     db.commit()
+    _request_cache(db).get("channels", {}).pop(channel_id, None)
     return True
 
 
@@ -91,6 +131,7 @@ def add_member(db: Session, channel_id: str, user_id: str) -> Optional[ChannelMe
     db.add(member)
     db.commit()
     db.refresh(member)
+    invalidate_membership_cache(db, user_id)
     return member
 
 
@@ -105,6 +146,7 @@ def remove_member(db: Session, channel_id: str, user_id: str) -> bool:
         return False
     soft_delete(db, member)
     db.commit()
+    invalidate_membership_cache(db, user_id)
     return True
 
 
@@ -116,15 +158,67 @@ def get_channel_members(db: Session, channel_id: str) -> List[ChannelMember]:
     return list(db.exec(statement).all())
 
 
+def get_member_channel_ids(db: Session, user_id: str) -> set[str]:
+    """Get the IDs of every channel a user belongs to, memoized per request and cached briefly in Redis."""
+    memo = _request_cache(db).setdefault("member_channel_ids", {})
+    if user_id in memo:
+        return memo[user_id]
+
+    client = get_redis()
+    channel_ids = None
+    if client:
+        try:
+            cached = client.get(_membership_cache_key(user_id))
+            if cached is not None:
+                channel_ids = set(json.loads(cached))
+        except RedisError as e:
+            logger.warning(f"Failed to read channel membership cache: {e}")
+
+    if channel_ids is None:
+        statement = select(ChannelMember.channel_id).where(
+            ChannelMember.user_id == user_id, ChannelMember.deleted_at.is_(None)
+        )
+        channel_ids = set(db.exec(statement).all())
+        if client:
+            try:
+                client.setex(
+                    _membership_cache_key(user_id),
+                    MEMBERSHIP_CACHE_TTL_SECONDS,
+                    json.dumps(sorted(channel_ids)),
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to write channel membership cache: {e}")
+
+    memo[user_id] = channel_ids
+    return channel_ids
+
+
 def is_member(db: Session, channel_id: str, user_id: str) -> bool:
     """Check if a user is a member of a channel."""
-    return (
-        db.exec(
-            select(ChannelMember).where(
-                ChannelMember.channel_id == channel_id,
-                ChannelMember.user_id == user_id,
-                ChannelMember.deleted_at.is_(None),
-            )
-        ).first()
-        is not None
+    return channel_id in get_member_channel_ids(db, user_id)
+
+
+def channel_visible_to(channel_id_column, current_user_id: Optional[str] = None):
+    """Build a SQL predicate that is true when the viewer may see rows in the referenced channel.
+
+    Rows outside a channel or in a non-private channel are visible to everyone, rows in a
+    private channel only to its members and to admins.
+    """
+    private_channel = exists().where(
+        Channel.id == channel_id_column, Channel.type == ChannelType.PRIVATE
+    )
+    if not current_user_id:
+        return or_(col(channel_id_column).is_(None), ~private_channel)
+
+    membership = exists().where(
+        ChannelMember.channel_id == channel_id_column,
+        ChannelMember.user_id == current_user_id,
+        ChannelMember.deleted_at.is_(None),
+    )
+    admin = exists().where(User.id == current_user_id, User.role == Role.ADMIN)
+    return or_(
+        col(channel_id_column).is_(None),
+        ~private_channel,
+        membership,
+        admin,
     )
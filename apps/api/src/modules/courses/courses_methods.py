@@ -4,6 +4,7 @@ from typing import List, Optional
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, desc, select
 
+from src.core.pagination import next_cursor, paginate
 from src.database.models import (
     Course,
     CourseStatus,
@@ -11,8 +12,8 @@ from src.database.models import (
     Lesson,
     Role,
     Section,
-    User,
 )
+from src.modules.auth.principal_methods import Principal
 
 
 def soft_delete(db: Session, record) -> None:
@@ -88,7 +89,7 @@ def get_all_courses(
     limit: int = 100,
     instructor_id: Optional[str] = None,
     status: Optional[str] = None,
-    current_user: Optional[User] = None,
+    current_user: Optional[Principal] = None,
 ) -> List[Course]:
     """Get all courses with pagination and optional filters."""
     statement = (
@@ -256,7 +257,7 @@ def create_enrollment(db: Session, enrollment_data: dict) -> EnrolledCourse:
         "enrolled_at" not in enrollment_data
         or enrollment_data.get("enrolled_at") is None
     ):
-        enrollment_data["enrolled_at"] = datetime.now().isoformat()
+        enrollment_data["enrolled_at"] = datetime.now(timezone.utc)
 
     enrollment = EnrolledCourse(**enrollment_data)
     db.add(enrollment)
@@ -304,14 +305,10 @@ def get_all_enrollments(
     user_id: Optional[str] = None,
     course_id: Optional[str] = None,
     status: Optional[str] = None,
-) -> List[EnrolledCourse]:
-    """Get all enrollments with pagination and optional filters."""
-    statement = (
-        select(EnrolledCourse)
-        .where(EnrolledCourse.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
-    )
+    cursor: Optional[str] = None,
+) -> tuple[List[EnrolledCourse], Optional[str]]:
+    """Get a page of enrollments with optional filters and the cursor of the next page."""
+    statement = select(EnrolledCourse).where(EnrolledCourse.deleted_at.is_(None))
 
     if user_id:
         statement = statement.where(EnrolledCourse.user_id == user_id)
@@ -322,7 +319,13 @@ def get_all_enrollments(
     if status:
         statement = statement.where(EnrolledCourse.status == status)
 
-    # Order by newest first (created_at descending)
-    statement = statement.order_by(desc(EnrolledCourse.created_at))
-
-    return list(db.exec(statement).all())
+    # Newest first, seeking past the cursor instead of counting skipped rows
+    statement = paginate(
+        statement,
+        [EnrolledCourse.created_at, EnrolledCourse.id],
+        cursor,
+        limit,
+        skip,
+    )
+    enrollments = list(db.exec(statement).all())
+    return enrollments, next_cursor(enrollments, ["created_at", "id"], limit)
@@ -6,12 +6,15 @@ from typing import List, Optional
 from sqlalchemy import desc, inspect
 from sqlmodel import Session, and_, select
 
+from src.core.common import as_utc
+from src.core.pagination import next_cursor, paginate
 from src.database.models import (
     ChannelMember,
     InviteCode,
     InviteCodeStatus,
     User,
 )
+from src.modules.channels.channels_methods import invalidate_membership_cache
 
 
 def soft_delete(db: Session, record) -> None:
@@ -30,7 +33,7 @@ def create_invite_code(
     db: Session,
     code: Optional[str] = None,
     max_uses: int = 1,
-    expires_at: Optional[str] = None,
+    expires_at: Optional[datetime] = None,
     auto_join_channel_id: Optional[str] = None,
     created_by: str | None = None,
 ) -> InviteCode:
@@ -82,8 +85,9 @@ def get_all_invite_codes(
     limit: int = 100,
     status: Optional[InviteCodeStatus] = None,
     created_by: Optional[str] = None,
-) -> List[InviteCode]:
-    """Get all invite codes with optional filtering."""
+    cursor: Optional[str] = None,
+) -> tuple[List[InviteCode], Optional[str]]:
+    """Get a page of invite codes with optional filtering and the cursor of the next page."""
     statement = select(InviteCode).where(InviteCode.deleted_at.is_(None))
 
     filters = []
@@ -95,11 +99,12 @@ def get_all_invite_codes(
     if filters:
         statement = statement.where(and_(*filters))
 
-    # Get the actual column from the table using inspect
+    # Get the actual columns from the table using inspect
     mapper = inspect(InviteCode)
-    created_at_column = mapper.columns.created_at
-    statement = statement.offset(skip).limit(limit).order_by(desc(created_at_column))
-    return list(db.exec(statement).all())
+    sort_key = [mapper.columns.created_at, mapper.columns.id]
+    statement = paginate(statement, sort_key, cursor, limit, skip)
+    invite_codes = list(db.exec(statement).all())
+    return invite_codes, next_cursor(invite_codes, ["created_at", "id"], limit)
 
 
 def update_invite_code(
@@ -150,21 +155,13 @@ def validate_and_use_invite_code(
         return None, f"Invite code is {invite_code.status}"
 
     # Check if code has expired
-    if invite_code.expires_at:
-        try:
-            expires_at = datetime.fromisoformat(
-                invite_code.expires_at.replace("Z", "+00:00")
-            )
-            if datetime.now(timezone.utc) > expires_at:
-                # Mark as expired
-                invite_code.status = InviteCodeStatus.EXPIRED
-                db.commit()
-                return None, "Invite code has expired"
-        except ValueError:
-            # Invalid date format, treat as expired
-            invite_code.status = InviteCodeStatus.EXPIRED
-            db.commit()
-            return None, "Invite code has expired"
+    if invite_code.expires_at and datetime.now(timezone.utc) > as_utc(
+        invite_code.expires_at
+    ):
+        # Mark as expired
+        invite_code.status = InviteCodeStatus.EXPIRED
+        db.commit()
+        return None, "Invite code has expired"
 
     if invite_code.used_count >= invite_code.max_uses:
         # Mark as used
@@ -211,6 +208,7 @@ def auto_join_user_to_channel(db: Session, user_id: str, channel_id: str) -> boo
 
     db.add(channel_member)
     db.commit()
+    invalidate_membership_cache(db, user_id)
     return True
 
 
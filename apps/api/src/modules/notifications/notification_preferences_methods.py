@@ -1,12 +1,30 @@
-from typing import Optional
+import json
+from typing import Dict, List, Optional
 
-from sqlmodel import Session, select
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlmodel import Session, col, select
 
+from src.core.redis_client import get_redis
 from src.database.models import (
     NotificationFrequency,
     NotificationPreferences,
 )
 
+PREFERENCES_CACHE_TTL_SECONDS = 3600
+
+
+def _preferences_cache_key(user_id: str) -> str:
+    return f"notification_preferences:{user_id}"
+
+
+def _email_frequencies(preferences: NotificationPreferences) -> Dict[str, str]:
+    return {
+        "mention": preferences.mention_email.value,
+        "like": preferences.like_email.value,
+        "reply": preferences.reply_email.value,
+    }
+
 
 def get_notification_preferences(
     db: Session, user_id: str
@@ -18,24 +36,70 @@ def get_notification_preferences(
     return db.exec(statement).first()
 
 
-def get_or_create_notification_preferences(
+def get_notification_preferences_or_default(
     db: Session, user_id: str
 ) -> NotificationPreferences:
-    """Get notification preferences for a user, creating default if not exists."""
+    """Get notification preferences for a user, falling back to unsaved defaults."""
     preferences = get_notification_preferences(db, user_id)
     if preferences:
         return preferences
+    # Users keep the defaults without a row until they change something
+    return NotificationPreferences(user_id=user_id)
 
-    preferences = NotificationPreferences(
-        user_id=user_id,
-        mention_email=NotificationFrequency.IMMEDIATE,
-        like_email=NotificationFrequency.DAILY,
-        reply_email=NotificationFrequency.IMMEDIATE,
+
+def get_email_frequencies_for_users(
+    db: Session, user_ids: List[str]
+) -> Dict[str, Dict[str, str]]:
+    """Get the email frequency of every notification type for many users, cached in Redis."""
+    user_ids = list(dict.fromkeys(user_ids))
+    frequencies: Dict[str, Dict[str, str]] = {}
+
+    client = get_redis()
+    if client and user_ids:
+        try:
+            cached = client.mget([_preferences_cache_key(uid) for uid in user_ids])
+            for user_id, value in zip(user_ids, cached):
+                if value is not None:
+                    frequencies[user_id] = json.loads(value)
+        except RedisError as e:
+            logger.warning(f"Failed to read notification preferences cache: {e}")
+
+    missing = [user_id for user_id in user_ids if user_id not in frequencies]
+    if not missing:
+        return frequencies
+
+    statement = select(NotificationPreferences).where(
+        col(NotificationPreferences.user_id).in_(missing)
     )
-    db.add(preferences)
-    db.commit()
-    db.refresh(preferences)
-    return preferences
+    loaded = {p.user_id: _email_frequencies(p) for p in db.exec(statement).all()}
+    defaults = _email_frequencies(NotificationPreferences(user_id=""))
+    for user_id in missing:
+        frequencies[user_id] = loaded.get(user_id, defaults)
+
+    if client:
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for user_id in missing:
+                pipeline.setex(
+                    _preferences_cache_key(user_id),
+                    PREFERENCES_CACHE_TTL_SECONDS,
+                    json.dumps(frequencies[user_id]),
+                )
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to write notification preferences cache: {e}")
+    return frequencies
+
+
+def invalidate_notification_preferences(user_id: str) -> None:
+    """Drop the cached notification preferences of a user after they change."""
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(_preferences_cache_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Failed to invalidate notification preferences cache: {e}")
 
 
 def update_notification_preferences(
@@ -46,7 +110,7 @@ def update_notification_preferences(
     reply_email: Optional[NotificationFrequency] = None,
 ) -> NotificationPreferences:
     """Update notification preferences for a user."""
-    preferences = get_or_create_notification_preferences(db, user_id)
+    preferences = get_notification_preferences_or_default(db, user_id)
 
     if mention_email is not None:
         preferences.mention_email = mention_email
@@ -55,8 +119,10 @@ def update_notification_preferences(
     if reply_email is not None:
         preferences.reply_email = reply_email
 
+    db.add(preferences)
     db.commit()
     db.refresh(preferences)
+    invalidate_notification_preferences(user_id)
     return preferences
 
 
@@ -64,12 +130,17 @@ def get_email_frequency_for_notification_type(
     db: Session, user_id: str, notification_type: str
 ) -> NotificationFrequency:
     """Get the email frequency setting for a specific notification type."""
-    preferences = get_or_create_notification_preferences(db, user_id)
+    return get_email_frequencies(db, {user_id: notification_type})[user_id]
 
-    frequency_map = {
-        "mention": preferences.mention_email,
-        "like": preferences.like_email,
-        "reply": preferences.reply_email,
-    }
 
-    return frequency_map.get(notification_type, NotificationFrequency.NONE)
+def get_email_frequencies(
+    db: Session, notification_types: Dict[str, str]
+) -> Dict[str, NotificationFrequency]:
+    """Get each user's email frequency for a notification type without writing anything."""
+    frequencies = get_email_frequencies_for_users(db, list(notification_types))
+    return {
+        user_id: NotificationFrequency(
+            frequencies[user_id].get(notification_type, NotificationFrequency.NONE)
+        )
+        for user_id, notification_type in notification_types.items()
+    }
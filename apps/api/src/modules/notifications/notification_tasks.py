@@ -1,13 +1,17 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
+from celery import group
 from loguru import logger
-from sqlmodel import Session, select
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select
 
 from src.core.celery_app import celery_app
 from src.core.settings import settings
 from src.database.engine import engine
 from src.database.models import (
+    Notification,
     NotificationFrequency,
     NotificationType,
     PendingNotificationEmail,
@@ -15,9 +19,13 @@ from src.database.models import (
 )
 from src.modules.email.email_service import email_service
 from src.modules.notifications.notification_preferences_methods import (
+    get_email_frequencies,
     get_email_frequency_for_notification_type,
 )
-from src.modules.notifications.notifications_methods import create_notification
+from src.modules.notifications.notifications_methods import (
+    create_notification,
+    publish_notifications,
+)
 
 
 def _get_user(db: Session, user_id: str) -> Optional[User]:
@@ -25,9 +33,9 @@ def _get_user(db: Session, user_id: str) -> Optional[User]:
     return db.get(User, user_id)
 
 
-def _calculate_scheduled_time(frequency: NotificationFrequency) -> str:
+def _calculate_scheduled_time(frequency: NotificationFrequency) -> datetime:
     """Calculate the scheduled time for digest emails."""
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     if frequency == NotificationFrequency.DAILY:
         next_day = now + timedelta(days=1)
         scheduled = next_day.replace(hour=8, minute=0, second=0, microsecond=0)
@@ -39,27 +47,35 @@ def _calculate_scheduled_time(frequency: NotificationFrequency) -> str:
         scheduled = next_monday.replace(hour=8, minute=0, second=0, microsecond=0)
     else:
         scheduled = now
-    return scheduled.isoformat()
+    return scheduled
 
 
-def _queue_pending_email(
-    db: Session,
+def _pending_email(
     user_id: str,
     notification_id: str,
     notification_type: NotificationType,
     frequency: NotificationFrequency,
-) -> None:
-    """Queue a notification email for later digest delivery."""
-    scheduled_time = _calculate_scheduled_time(frequency)
-    pending_email = PendingNotificationEmail(
+) -> PendingNotificationEmail:
+    """Build the digest entry of a notification email."""
+    return PendingNotificationEmail(
         user_id=user_id,
         notification_id=notification_id,
         notification_type=notification_type,
         frequency=frequency,
-        scheduled_for=scheduled_time,
+        scheduled_for=_calculate_scheduled_time(frequency),
         is_sent=False,
     )
-    db.add(pending_email)
+
+
+def _queue_pending_email(
+    db: Session,
+    user_id: str,
+    notification_id: str,
+    notification_type: NotificationType,
+    frequency: NotificationFrequency,
+) -> None:
+    """Queue a notification email for later digest delivery."""
+    db.add(_pending_email(user_id, notification_id, notification_type, frequency))
     db.commit()
 
 
@@ -122,6 +138,9 @@ def create_notification_task(
 
             recipient = _get_user(db, recipient_id)
             sender = _get_user(db, sender_id)
+            publish_notifications(
+                db, [notification], sender.username if sender else None
+            )
 
             email_sent = False
             if recipient and sender and email_frequency != NotificationFrequency.NONE:
@@ -155,9 +174,174 @@ def create_notification_task(
             }
 
 
+@celery_app.task
+def create_post_notifications_task(
+    post_id: str,
+    sender_id: str,
+    content: str,
+    mentions: List[str],
+    parent_user_id: Optional[str] = None,
+    original_post_id: Optional[str] = None,
+):
+    """Create the reply and mention notifications of a new post in one batch."""
+    # Users and notifications are still read after the commit to send emails
+    with Session(engine, expire_on_commit=False) as db:
+        try:
+            # One query resolves the sender, the replied-to author and every mention
+            statement = select(User).where(
+                or_(
+                    and_(
+                        col(User.username).in_(mentions),
+                        col(User.deleted_at).is_(None),
+                    ),
+                    col(User.id).in_([sender_id, parent_user_id]),
+                )
+            )
+            users = list(db.exec(statement).all())
+            users_by_id = {user.id: user for user in users}
+            sender = users_by_id.get(sender_id)
+
+            notification_types = {}
+            if parent_user_id and parent_user_id != sender_id:
+                notification_types[parent_user_id] = NotificationType.REPLY
+            mentioned = set(mentions)
+            for user in users:
+                if user.username in mentioned and user.id not in (
+                    sender_id,
+                    parent_user_id,
+                ):
+                    notification_types[user.id] = NotificationType.MENTION
+
+            if not notification_types:
+                return {
+                    "success": True,
+                    "notification_count": 0,
+                    "message": "No notifications to create",
+                }
+
+            email_frequencies = get_email_frequencies(
+                db,
+                {
+                    user_id: notification_type.value
+                    for user_id, notification_type in notification_types.items()
+                },
+            )
+
+            data = {
+                "post_id": post_id,
+                "content": content,
+                "original_post_id": original_post_id,
+            }
+            notifications = [
+                Notification(
+                    recipient_id=recipient_id,
+                    sender_id=sender_id,
+                    type=notification_type,
+                    data=data,
+                )
+                for recipient_id, notification_type in notification_types.items()
+            ]
+            pending_emails = []
+            immediate = []
+            for notification in notifications:
+                frequency = email_frequencies[notification.recipient_id]
+                if frequency == NotificationFrequency.IMMEDIATE:
+                    immediate.append(notification)
+                elif frequency != NotificationFrequency.NONE:
+                    pending_emails.append(
+                        _pending_email(
+                            notification.recipient_id,
+                            notification.id,
+                            notification.type,
+                            frequency,
+                        )
+                    )
+            db.add_all(notifications)
+            db.add_all(pending_emails)
+            db.commit()
+            publish_notifications(
+                db, notifications, sender.username if sender else None
+            )
+
+            emails_sent = len(pending_emails)
+            if sender:
+                for notification in immediate:
+                    recipient = users_by_id.get(notification.recipient_id)
+                    if recipient and _send_immediate_email(
+                        db, recipient, sender, notification.type.value, data
+                    ):
+                        emails_sent += 1
+
+            return {
+                "success": True,
+                "notification_count": len(notifications),
+                "emails_sent": emails_sent,
+                "message": f"Created {len(notifications)} notifications",
+            }
+        except Exception as e:
+            logger.error(f"Failed to create post notifications: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to create post notifications",
+            }
+
+
+def _unclaimed():
+    """Match digest rows no run holds a live claim on."""
+    expired_before = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.NOTIFICATION_DIGEST_CLAIM_LEASE_SECONDS
+    )
+    return or_(
+        col(PendingNotificationEmail.claimed_at).is_(None),
+        col(PendingNotificationEmail.claimed_at) < expired_before,
+    )
+
+
+def _claim_digest_rows(
+    db: Session, pending_ids: List[str], claimed_at: datetime
+) -> List[str]:
+    """Claim the unsent, unclaimed digest rows in one UPDATE and return their IDs."""
+    if not pending_ids:
+        return []
+    result = db.exec(
+        update(PendingNotificationEmail)
+        .where(
+            col(PendingNotificationEmail.id).in_(pending_ids),
+            PendingNotificationEmail.is_sent == False,  # noqa: E712
+            _unclaimed(),
+        )
+        .values(claimed_at=claimed_at, updated_at=datetime.now(timezone.utc))
+        .returning(PendingNotificationEmail.id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = list(result.scalars().all())
+    db.commit()
+    return claimed
+
+
+def _release_digest_rows(
+    db: Session, pending_ids: List[str], claimed_at: datetime, is_sent: bool
+) -> None:
+    """Drop this run's claim on digest rows, marking them sent if the email went out."""
+    if not pending_ids:
+        return
+    # Rows another run took over after the lease lapsed are left to that run
+    db.exec(
+        update(PendingNotificationEmail)
+        .where(
+            col(PendingNotificationEmail.id).in_(pending_ids),
+            PendingNotificationEmail.claimed_at == claimed_at,
+        )
+        .values(is_sent=is_sent, claimed_at=None, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
 @celery_app.task
 def send_notification_digest(digest_type: str = "daily"):
-    """Send notification digest emails (daily or weekly)."""
+    """Split due digest emails into recipient chunks and send the chunks in parallel."""
     frequency = (
         NotificationFrequency.DAILY
         if digest_type == "daily"
@@ -166,36 +350,117 @@ def send_notification_digest(digest_type: str = "daily"):
 
     with Session(engine) as db:
         try:
-            now = datetime.utcnow()
-            statement = select(PendingNotificationEmail).where(
-                PendingNotificationEmail.frequency == frequency,
-                PendingNotificationEmail.is_sent == False,  # noqa: E712
-                PendingNotificationEmail.scheduled_for <= now.isoformat(),
+            # Rows queued after this run started wait for the next one
+            due_before = datetime.now(timezone.utc)
+            chunks = []
+            after = ""
+            while True:
+                statement = (
+                    select(PendingNotificationEmail.user_id)
+                    .where(
+                        PendingNotificationEmail.frequency == frequency,
+                        PendingNotificationEmail.is_sent == False,  # noqa: E712
+                        PendingNotificationEmail.scheduled_for <= due_before,
+                        _unclaimed(),
+                        PendingNotificationEmail.user_id > after,
+                    )
+                    .group_by(PendingNotificationEmail.user_id)
+                    .order_by(PendingNotificationEmail.user_id)
+                    .limit(settings.NOTIFICATION_DIGEST_CHUNK_SIZE)
+                )
+                user_ids = list(db.exec(statement).all())
+                if not user_ids:
+                    break
+                chunks.append(
+                    send_notification_digest_chunk.s(
+                        digest_type, user_ids, due_before.isoformat()
+                    )
+                )
+                after = user_ids[-1]
+
+            if chunks:
+                group(chunks).apply_async()
+
+            return {
+                "success": True,
+                "chunk_count": len(chunks),
+                "message": f"Dispatched {len(chunks)} {digest_type} digest chunks",
+            }
+        except Exception as e:
+            logger.error(f"Failed to send digest emails: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to send digest emails",
+            }
+
+
+# Acked only once done, so a chunk whose worker dies is redelivered. Each
+# recipient's rows are claimed before their email goes out and only marked sent
+# after it did, so an overlapping run skips them while the claim is live, and rows
+# left claimed by a dead worker are picked up again once their lease lapses.
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def send_notification_digest_chunk(
+    digest_type: str, user_ids: List[str], due_before: str
+):
+    """Send the digest emails of a chunk of recipients."""
+    frequency = (
+        NotificationFrequency.DAILY
+        if digest_type == "daily"
+        else NotificationFrequency.WEEKLY
+    )
+
+    # Loaded rows stay usable across the per-recipient claim and release commits
+    with Session(engine, expire_on_commit=False) as db:
+        sent_count = 0
+        try:
+            statement = (
+                select(PendingNotificationEmail)
+                .where(
+                    col(PendingNotificationEmail.user_id).in_(user_ids),
+                    PendingNotificationEmail.frequency == frequency,
+                    PendingNotificationEmail.is_sent == False,  # noqa: E712
+                    PendingNotificationEmail.scheduled_for
+                    <= datetime.fromisoformat(due_before),
+                    _unclaimed(),
+                )
+                .options(
+                    selectinload(PendingNotificationEmail.user),  # type: ignore
+                    selectinload(PendingNotificationEmail.notification).selectinload(  # type: ignore
+                        Notification.sender  # type: ignore
+                    ),
+                )
+                .order_by(
+                    PendingNotificationEmail.user_id,
+                    PendingNotificationEmail.created_at,
+                )
             )
             pending_emails = list(db.exec(statement).all())
 
             user_notifications: dict = {}
             for pending in pending_emails:
-                if pending.user_id not in user_notifications:
-                    user_notifications[pending.user_id] = []
-                user_notifications[pending.user_id].append(pending)
+                user_notifications.setdefault(pending.user_id, []).append(pending)
 
-            sent_count = 0
-            for user_id, pending_list in user_notifications.items():
-                user = _get_user(db, user_id)
+            for pending_list in user_notifications.values():
+                user = pending_list[0].user
                 if not user:
                     continue
 
+                claimed_at = datetime.now(timezone.utc)
+                claimed = set(
+                    _claim_digest_rows(
+                        db, [pending.id for pending in pending_list], claimed_at
+                    )
+                )
                 notifications_data = []
                 for pending in pending_list:
                     notif = pending.notification
-                    if notif:
-                        sender = _get_user(db, notif.sender_id)
+                    if pending.id in claimed and notif:
                         notifications_data.append(
                             {
                                 "type": notif.type.value,
-                                "sender_username": sender.username
-                                if sender
+                                "sender_username": notif.sender.username
+                                if notif.sender
                                 else "Someone",
                                 "content": notif.data.get("content")
                                 if notif.data
@@ -203,18 +468,19 @@ def send_notification_digest(digest_type: str = "daily"):
                             }
                         )
 
-                if notifications_data:
-                    success = email_service.send_notification_digest_email(
-                        to_email=user.email,
-                        notifications=notifications_data,
-                        digest_type=digest_type,
-                    )
-
-                    if success:
-                        for pending in pending_list:
-                            pending.is_sent = True
-                        db.commit()
-                        sent_count += 1
+                success = False
+                try:
+                    if notifications_data:
+                        success = email_service.send_notification_digest_email(
+                            to_email=user.email,
+                            notifications=notifications_data,
+                            digest_type=digest_type,
+                        )
+                finally:
+                    # Unsent rows go back to the queue for the next run
+                    _release_digest_rows(db, list(claimed), claimed_at, success)
+                if success:
+                    sent_count += 1
 
             return {
                 "success": True,
@@ -222,6 +488,7 @@ def send_notification_digest(digest_type: str = "daily"):
                 "message": f"Sent {sent_count} {digest_type} digest emails",
             }
         except Exception as e:
+            db.rollback()
             logger.error(f"Failed to send digest emails: {str(e)}")
             return {
                 "success": False,
@@ -1,8 +1,11 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
-from sqlalchemy import desc
-from sqlmodel import Session, select
+from sqlalchemy import func, update
+from sqlmodel import Session, col, select
 
+from src.core.pagination import next_cursor, paginate
+from src.core.pubsub import INBOX_CHANNEL, publish_many, publish_to_inbox
 from src.database.models import Notification, NotificationType
 
 
@@ -27,18 +30,21 @@ def create_notification(
 
 
 def get_notifications_by_user(
-    db: Session, user_id: str, skip: int = 0, limit: int = 100
-) -> List[Notification]:
-    """Get all notifications for a user with pagination."""
-    statement = (
-        select(Notification)
-        .where(Notification.recipient_id == user_id, Notification.deleted_at.is_(None))
-        .order_by(desc(Notification.created_at))
-        .offset(skip)
-        .limit(limit)
+    db: Session,
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> tuple[List[Notification], Optional[str]]:
+    """Get a page of notifications for a user and the cursor of the next page."""
+    statement = select(Notification).where(
+        Notification.recipient_id == user_id, Notification.deleted_at.is_(None)
+    )
+    statement = paginate(
+        statement, [Notification.created_at, Notification.id], cursor, limit, skip
     )
     notifications = list(db.exec(statement).all())
-    return notifications
+    return notifications, next_cursor(notifications, ["created_at", "id"], limit)
 
 
 def mark_notification_as_read(
@@ -57,26 +63,85 @@ def mark_notification_as_read(
 
 def mark_all_notifications_as_read(db: Session, user_id: str) -> int:
     """Mark all notifications for a user as read."""
-    statement = select(Notification).where(
-        Notification.recipient_id == user_id, not Notification.is_read
+    statement = (
+        update(Notification)
+        .where(*_unread_criteria(user_id))
+        .values(is_read=True, updated_at=datetime.now(timezone.utc))
     )
-    unread_notifications = db.exec(statement).all()
-
-    count = 0
-    for notification in unread_notifications:
-        notification.is_read = True
-        count += 1
-
+    result = db.exec(statement)
     db.commit()
-    return count
+    return result.rowcount
 
 
 def get_unread_notification_count(db: Session, user_id: str) -> int:
     """Get the count of unread notifications for a user."""
-    statement = select(Notification).where(
+    statement = (
+        select(func.count()).select_from(Notification).where(*_unread_criteria(user_id))
+    )
+    return db.exec(statement).one()
+
+
+def get_unread_notification_counts(db: Session, user_ids: List[str]) -> Dict[str, int]:
+    """Get the count of unread notifications for many users in one query."""
+    statement = (
+        select(Notification.recipient_id, func.count())
+        .where(
+            col(Notification.recipient_id).in_(user_ids),
+            Notification.is_read == False,  # noqa: E712
+            Notification.deleted_at.is_(None),
+        )
+        .group_by(Notification.recipient_id)
+    )
+    counts = dict(db.exec(statement).all())
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+
+def publish_notifications(
+    db: Session, notifications: List[Notification], sender_username: Optional[str]
+) -> None:
+    """Push new notifications and their recipients' unread counts to open sockets."""
+    if not notifications:
+        return
+    unread_counts = get_unread_notification_counts(
+        db, list({n.recipient_id for n in notifications})
+    )
+    publish_many(
+        [
+            (
+                INBOX_CHANNEL.format(notification.recipient_id),
+                {
+                    "type": "notification",
+                    "data": {
+                        "id": notification.id,
+                        "type": notification.type.value,
+                        "sender_id": notification.sender_id,
+                        "sender_username": sender_username,
+                        "data": notification.data,
+                        "created_at": notification.created_at.isoformat(),
+                        "unread_count": unread_counts[notification.recipient_id],
+                    },
+                },
+            )
+            for notification in notifications
+        ]
+    )
+
+
+def publish_unread_count(db: Session, user_id: str) -> None:
+    """Push a user's unread notification count to their open sockets."""
+    publish_to_inbox(
+        user_id,
+        {
+            "type": "unread_count",
+            "data": {"unread_count": get_unread_notification_count(db, user_id)},
+        },
+    )
+
+
+def _unread_criteria(user_id: str) -> tuple:
+    """Filter matching the partial index on unread notifications."""
+    return (
         Notification.recipient_id == user_id,
-        not Notification.is_read,
+        Notification.is_read == False,  # noqa: E712
         Notification.deleted_at.is_(None),
     )
-    notifications = db.exec(statement).all()
-    return len(notifications)
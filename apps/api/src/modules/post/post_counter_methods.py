@@ -0,0 +1,120 @@
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
+
+from src.database.models import Post, PostReactionCount, Reaction
+
+
+def increment_comment_counts(db: Session, parent_id: str, delta: int) -> None:
+    """Add delta to the comment count of a post and every one of its ancestors."""
+    parent_path = db.exec(select(Post.path).where(Post.id == parent_id)).first()
+    ancestor_ids = parent_path.split("/") if parent_path else [parent_id]
+    db.exec(
+        update(Post)
+        .where(col(Post.id).in_(ancestor_ids))
+        .values(comment_count=Post.comment_count + delta)
+        .execution_options(synchronize_session=False)
+    )  # type: ignore
+
+
+def increment_reaction_count(db: Session, post_id: str, emoji: str, delta: int) -> None:
+    """Add delta to the total and per-emoji reaction counts of a post."""
+    db.exec(
+        update(Post)
+        .where(col(Post.id) == post_id)
+        .values(reaction_count=Post.reaction_count + delta)
+        .execution_options(synchronize_session=False)
+    )  # type: ignore
+
+    emoji_update = (
+        update(PostReactionCount)
+        .where(
+            col(PostReactionCount.post_id) == post_id,
+            col(PostReactionCount.emoji) == emoji,
+        )
+        .values(count=PostReactionCount.count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if db.exec(emoji_update).rowcount or delta < 0:  # type: ignore
+        return
+
+    # First reaction with this emoji; a concurrent insert wins the unique constraint
+    try:
+        with db.begin_nested():
+            db.add(PostReactionCount(post_id=post_id, emoji=emoji, count=delta))
+    except IntegrityError:
+        db.exec(emoji_update)  # type: ignore
+
+
+def reconcile_post_counters(db: Session, post_ids: Optional[list[str]] = None) -> int:
+    """Recompute stored post counters from replies and reactions, returning the number of posts fixed."""
+    # Every live reply is counted under each ancestor whose path prefixes its own
+    ancestor = aliased(Post)
+    comment_statement = (
+        select(ancestor.id, func.count())
+        .select_from(ancestor)
+        .join(Post, col(Post.path).like(col(ancestor.path) + "/%"))
+        .where(Post.deleted_at.is_(None))
+        .group_by(ancestor.id)
+    )
+    reaction_statement = (
+        select(Reaction.post_id, Reaction.emoji, func.count(col(Reaction.id)))
+        .join(Post, col(Post.id) == Reaction.post_id)
+        .where(Reaction.deleted_at.is_(None), Post.deleted_at.is_(None))
+        .group_by(Reaction.post_id, Reaction.emoji)
+    )
+    # Counters on deleted posts are never read, so only live posts are checked
+    post_statement = select(Post.id, Post.comment_count, Post.reaction_count).where(
+        Post.deleted_at.is_(None)
+    )
+    emoji_statement = (
+        select(PostReactionCount)
+        .join(Post, col(Post.id) == PostReactionCount.post_id)
+        .where(Post.deleted_at.is_(None))
+    )
+    if post_ids is not None:
+        comment_statement = comment_statement.where(col(ancestor.id).in_(post_ids))
+        reaction_statement = reaction_statement.where(
+            col(Reaction.post_id).in_(post_ids)
+        )
+        post_statement = post_statement.where(col(Post.id).in_(post_ids))
+        emoji_statement = emoji_statement.where(
+            col(PostReactionCount.post_id).in_(post_ids)
+        )
+
+    comment_counts = dict(db.exec(comment_statement).all())
+    emoji_counts: dict[tuple[str, str], int] = {}
+    reaction_counts: dict[str, int] = {}
+    for post_id, emoji, count in db.exec(reaction_statement).all():
+        emoji_counts[(post_id, emoji)] = count
+        reaction_counts[post_id] = reaction_counts.get(post_id, 0) + count
+
+    fixed_posts = set()
+    for post_id, comment_count, reaction_count in db.exec(post_statement).all():
+        expected_comments = comment_counts.get(post_id, 0)
+        expected_reactions = reaction_counts.get(post_id, 0)
+        if (comment_count, reaction_count) != (expected_comments, expected_reactions):
+            db.exec(
+                update(Post)
+                .where(col(Post.id) == post_id)
+                .values(
+                    comment_count=expected_comments, reaction_count=expected_reactions
+                )
+                .execution_options(synchronize_session=False)
+            )  # type: ignore
+            fixed_posts.add(post_id)
+
+    for row in db.exec(emoji_statement).all():
+        expected = emoji_counts.pop((row.post_id, row.emoji), 0)
+        if row.count != expected:
+            row.count = expected
+            fixed_posts.add(row.post_id)
+    for (post_id, emoji), count in emoji_counts.items():
+        db.add(PostReactionCount(post_id=post_id, emoji=emoji, count=count))
+        fixed_posts.add(post_id)
+
+    db.commit()
+    return len(fixed_posts)
@@ -1,16 +1,28 @@
-from collections import Counter
 from datetime import datetime, timezone
-from typing import List, Optional, cast
+from typing import List, Optional
 
 from fastapi import UploadFile
-from sqlalchemy import Column, desc, text
-from sqlalchemy.orm import joinedload
-from sqlmodel import Session, select
-
-from src.database.models import Channel, Media, Post, Reaction, User
-from src.modules.channels.channels_methods import is_member
+from sqlalchemy import and_, desc, func, or_, tuple_
+from sqlalchemy.orm import aliased, joinedload
+from sqlmodel import Session, col, select
+
+from src.core.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+from src.database.models import Channel, Media, Post, PostReactionCount, Reaction, User
+from src.modules.channels.channels_methods import channel_visible_to
+from src.modules.post.post_counter_methods import increment_comment_counts
+from src.modules.post.post_timeline_methods import (
+    CHANNEL_TIMELINE_KEY,
+    GLOBAL_TIMELINE_KEY,
+    USER_TIMELINE_KEY,
+    add_post_to_timelines,
+    get_timeline_posts,
+    remove_posts_from_timelines,
+    timeline_score,
+)
 from src.modules.storages.storage_methods import upload_file
 
+POST_SORT_KEY = [Post.is_pinned, Post.created_at, Post.id]
+
 
 def soft_delete(db: Session, record) -> None:
     """Soft delete a record by setting deleted_at timestamp."""
@@ -18,37 +30,14 @@ def soft_delete(db: Session, record) -> None:
     db.add(record)
 
 
-def filter_private_channel_posts(
-    posts: list[Post],
-    current_user_id: Optional[str] = None,
-    db: Optional[Session] = None,
-) -> list[Post]:
-    """Filter out posts from private channels where user is not a member."""
-    filtered_posts = []
-    for post in posts:
-        if not post.channel_id:
-            filtered_posts.append(post)
-            continue
-
-        if post.channel and post.channel.type != "private":
-            filtered_posts.append(post)
-            continue
-
-        if not current_user_id or not db:
-            continue
-
-        if post.channel and is_member(db, post.channel_id, current_user_id):
-            filtered_posts.append(post)
-
-    return filtered_posts
-
-
 def create_post(
     db: Session, post_data: dict, files: Optional[List[UploadFile]] = None
 ) -> Post:
     """Create a new post."""
     post = Post(**post_data)
     db.add(post)
+    if post.parent_id:
+        increment_comment_counts(db, post.parent_id, 1)
     db.commit()
     db.refresh(post)
 
@@ -60,6 +49,7 @@ def create_post(
         db.commit()
         db.refresh(post)
 
+    add_post_to_timelines(post)
     return post
 
 
@@ -85,34 +75,46 @@ def update_post(db: Session, post_id: str, update_data: dict) -> Optional[Post]:
         setattr(post, key, value)
     db.commit()
     db.refresh(post)
+    if "is_pinned" in update_data:
+        add_post_to_timelines(post)
     return post
 
 
-def delete_post(db: Session, post_id: str) -> bool:
-    """Soft delete a post by ID."""
-    post = db.get(Post, post_id)
-    if not post:
-        return False
-
-    from src.database.models import Media, Reaction
-
-    media_statement = select(Media).where(Media.post_id == post_id)
+def _soft_delete_post_tree(db: Session, post: Post) -> list[Post]:
+    """Soft delete a post together with its media, reactions and replies, returning the deleted posts."""
+    media_statement = select(Media).where(Media.post_id == post.id)
     media_records = db.exec(media_statement).all()
     for media in media_records:
         soft_delete(db, media)
 
-    reaction_statement = select(Reaction).where(Reaction.post_id == post_id)
+    reaction_statement = select(Reaction).where(Reaction.post_id == post.id)
     reaction_records = db.exec(reaction_statement).all()
     for reaction in reaction_records:
         soft_delete(db, reaction)
 
-    replies_statement = select(Post).where(Post.parent_id == post_id)
+    deleted_posts = [post]
+    replies_statement = select(Post).where(Post.parent_id == post.id)
     replies_records = db.exec(replies_statement).all()
     for reply in replies_records:
-        delete_post(db, reply.id)
+        deleted_posts.extend(_soft_delete_post_tree(db, reply))
 
     soft_delete(db, post)
+    return deleted_posts
+
+
+def delete_post(db: Session, post_id: str) -> bool:
+    """Soft delete a post by ID."""
+    post = db.get(Post, post_id)
+    if not post:
+        return False
+
+    # The whole subtree disappears, so every ancestor loses it in one update
+    if post.parent_id and post.deleted_at is None:
+        increment_comment_counts(db, post.parent_id, -(post.comment_count + 1))
+
+    deleted_posts = _soft_delete_post_tree(db, post)
     db.commit()
+    remove_posts_from_timelines(deleted_posts)
     return True
 
 
@@ -120,16 +122,23 @@ def get_posts_by_user(
     db: Session, user_id: str, current_user_id: Optional[str] = None
 ) -> list[Post]:
     """Get all posts for a user, filtering out private channel posts for non-members."""
+    cached = get_timeline_posts(db, USER_TIMELINE_KEY.format(user_id), current_user_id)
+    if cached is not None:
+        return cached
+
     statement = (
         select(Post)
         .options(
             joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
         )
-        .where(Post.user_id == user_id, Post.deleted_at.is_(None))
+        .where(
+            Post.user_id == user_id,
+            Post.deleted_at.is_(None),
+            channel_visible_to(Post.channel_id, current_user_id),
+        )
         .order_by(desc(Post.created_at))
     )  # type: ignore
-    all_posts = list(db.exec(statement).unique().all())
-    return filter_private_channel_posts(all_posts, current_user_id, db)
+    return list(db.exec(statement).unique().all())
 
 
 def get_posts_by_type(
@@ -141,11 +150,14 @@ def get_posts_by_type(
         .options(
             joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
         )
-        .where(Post.type == post_type, Post.deleted_at.is_(None))
+        .where(
+            Post.type == post_type,
+            Post.deleted_at.is_(None),
+            channel_visible_to(Post.channel_id, current_user_id),
+        )
         .order_by(desc(Post.created_at))
     )  # type: ignore
-    all_posts = list(db.exec(statement).all())
-    return filter_private_channel_posts(all_posts, current_user_id, db)
+    return list(db.exec(statement).unique().all())
 
 
 def get_posts_by_parent_id(db: Session, parent_id: str) -> list[Post]:
@@ -162,91 +174,100 @@ def get_posts_by_parent_id(db: Session, parent_id: str) -> list[Post]:
     return posts
 
 
+def _thread_statement(parent: Post, current_user_id: Optional[str] = None):
+    """Build the query for every reply under a post, ordered for thread rendering.
+
+    Top level replies come pinned first and newest first, each followed by its own replies
+    in path order.
+    """
+    # Pair every reply with the direct child of the parent whose subtree it is in
+    top = aliased(Post)
+    statement = (
+        select(Post)
+        .options(
+            joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
+        )
+        .join(
+            top,
+            and_(
+                top.parent_id == parent.id,
+                or_(
+                    col(Post.path) == top.path,
+                    col(Post.path).like(col(top.path) + "/%"),
+                ),
+            ),
+        )
+        .where(
+            col(Post.path).like(f"{parent.path}/%"),
+            Post.deleted_at.is_(None),
+            channel_visible_to(Post.channel_id, current_user_id),
+        )
+        .order_by(
+            desc(top.is_pinned), desc(top.created_at), desc(top.id), col(Post.path)
+        )
+    )
+    return statement, top
+
+
 def get_all_nested_posts_by_parent_id(
     db: Session, parent_id: str, current_user_id: Optional[str] = None
 ) -> list[Post]:
     """Get all nested posts by parent ID."""
-    from src.database.models import PostType, Role
-
-    sql = """
-    WITH RECURSIVE reply_tree AS (
-        -- Base case: Get direct replies to the parent post
-        SELECT p.id, p.parent_id, p.created_at, p.is_pinned, p.updated_at, p.content, p.type, p.user_id, p.channel_id, 1 as depth,
-               CAST((CASE WHEN p.is_pinned THEN 1 ELSE 0 END) AS TEXT) || '/' ||
-               CAST(2147483647 - EXTRACT(EPOCH FROM p.created_at) AS TEXT) as sort_path
-        FROM post p
-        WHERE p.parent_id = :parent_id AND p.deleted_at IS NULL
-        UNION ALL
-        -- Recursive case: Get replies to any reply in the tree
-        SELECT p.id, p.parent_id, p.created_at, p.is_pinned, p.updated_at, p.content, p.type, p.user_id, p.channel_id, rt.depth + 1,
-               rt.sort_path || '/' || CAST(EXTRACT(EPOCH FROM p.created_at) AS TEXT)
-        FROM post p
-        INNER JOIN reply_tree rt ON p.parent_id = rt.id
-        WHERE p.deleted_at IS NULL
+    parent = db.get(Post, parent_id)
+    if not parent:
+        return []
+    statement, _ = _thread_statement(parent, current_user_id)
+    return list(db.exec(statement).unique().all())
+
+
+def get_post_replies(
+    db: Session,
+    parent_id: str,
+    current_user_id: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[list[Post], Optional[str]]:
+    """Get a page of the reply thread under a post and the cursor of the next page."""
+    parent = db.get(Post, parent_id)
+    if not parent:
+        return [], None
+    statement, top = _thread_statement(parent, current_user_id)
+    if cursor:
+        is_pinned, created_at, top_id, path = decode_cursor(
+            cursor, [Post.is_pinned, Post.created_at, Post.id, Post.path]
+        )
+        statement = statement.where(
+            or_(
+                tuple_(top.is_pinned, top.created_at, top.id)
+                < tuple_(is_pinned, created_at, top_id),
+                and_(col(top.id) == top_id, col(Post.path) > path),
+            )
+        )
+    replies = list(db.exec(statement.limit(limit)).unique().all())
+    if len(replies) < limit:
+        return replies, None
+
+    last = replies[-1]
+    last_top = db.get(Post, last.path.split("/")[len(parent.path.split("/"))])
+    return replies, encode_cursor(
+        [last_top.is_pinned, last_top.created_at, last_top.id, last.path]
     )
-    SELECT rt.*,
-           u.id as user_id, u.username, u.name, u.bio, u.email, u.is_active, u.is_verified, u.avatar_url, u.role, u.created_at as user_created_at, u.updated_at as user_updated_at,
-           m.id as media_id, m.url as media_url, m.user_id as media_user_id, m.created_at as media_created_at, m.updated_at as media_updated_at
-    FROM reply_tree rt
-    LEFT JOIN "user" u ON rt.user_id = u.id AND u.deleted_at IS NULL
-    LEFT JOIN media m ON rt.id = m.post_id AND m.deleted_at IS NULL
-    ORDER BY rt.sort_path ASC;
-    """
-    result = db.exec(text(sql).bindparams(parent_id=parent_id))
-
-    posts_dict = {}
-    for row in result.all():
-        post_id = row.id
-
-        user = None
-        if row.user_id:
-            user_dict = {
-                "id": row.user_id,
-                "username": row.username,
-                "name": row.name,
-                "bio": row.bio,
-                "email": row.email,
-                "is_active": row.is_active,
-                "is_verified": row.is_verified,
-                "avatar_url": row.avatar_url,
-                "role": Role(row.role.lower()) if row.role else Role.USER,
-                "created_at": row.user_created_at,
-                "updated_at": row.user_updated_at,
-            }
-            user = User(**user_dict)
-
-        if post_id not in posts_dict:
-            post_dict = {
-                "id": row.id,
-                "parent_id": row.parent_id,
-                "created_at": row.created_at,
-                "updated_at": row.updated_at,
-                "content": row.content,
-                "type": PostType(row.type.lower()),
-                "user_id": row.user_id,
-                "channel_id": row.channel_id,
-                "user": user,
-                "medias": [],
-            }
-            posts_dict[post_id] = Post(**post_dict)
-
-        if row.media_id:
-            media_dict = {
-                "id": row.media_id,
-                "url": row.media_url,
-                "post_id": post_id,
-                "user_id": row.media_user_id,
-                "created_at": row.media_created_at,
-                "updated_at": row.media_updated_at,
-            }
-            posts_dict[post_id].medias.append(Media(**media_dict))
-
-    all_posts = list(posts_dict.values())
-    return filter_private_channel_posts(all_posts, current_user_id, db)
 
 
 def get_posts_by_channel_slug(db: Session, channel_slug: str) -> list[Post]:
     """Get all posts for a channel by slug."""
+    channel_id = db.exec(
+        select(Channel.id).where(
+            Channel.slug == channel_slug, Channel.deleted_at.is_(None)
+        )
+    ).first()
+    if channel_id:
+        cached = get_timeline_posts(
+            db, CHANNEL_TIMELINE_KEY.format(channel_id), visibility=False
+        )
+        if cached is not None:
+            return cached
+
     statement = (
         select(Post)
         .options(
@@ -261,71 +282,148 @@ def get_posts_by_channel_slug(db: Session, channel_slug: str) -> list[Post]:
 
 
 def get_all_posts(
-    db: Session, skip: int = 0, limit: int = 100, current_user_id: Optional[str] = None
-) -> list[Post]:
-    """Get all posts with pagination, filtering out private channel posts for non-members."""
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    current_user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> tuple[list[Post], Optional[str]]:
+    """Get a page of posts and the cursor of the next page, filtering out private channel posts for non-members."""
+    # Offset paging predates the timeline cache and always reads from SQL
+    if not skip:
+        after = None
+        if cursor:
+            is_pinned, created_at, post_id = decode_cursor(cursor, POST_SORT_KEY)
+            after = (timeline_score(created_at, is_pinned), post_id)
+        cached = get_timeline_posts(
+            db, GLOBAL_TIMELINE_KEY, current_user_id, limit, after
+        )
+        if cached is not None:
+            return cached, next_cursor(cached, ["is_pinned", "created_at", "id"], limit)
+
     statement = (
         select(Post)
         .options(
             joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
         )  # type: ignore
-        .where(Post.type == "post", Post.deleted_at.is_(None))
-        .order_by(desc(Post.is_pinned), desc(Post.created_at))
-        .offset(skip)
-        .limit(limit)
+        .where(
+            Post.type == "post",
+            Post.deleted_at.is_(None),
+            channel_visible_to(Post.channel_id, current_user_id),
+        )
     )
-    all_posts = list(db.exec(statement).unique().all())
-    return filter_private_channel_posts(all_posts, current_user_id, db)
+    statement = paginate(statement, POST_SORT_KEY, cursor, limit, skip)
+    posts = list(db.exec(statement).unique().all())
+    return posts, next_cursor(posts, ["is_pinned", "created_at", "id"], limit)
+
+
+def get_post_summaries(
+    db: Session, post_ids: list[str], current_user_id: Optional[str] = None
+) -> dict[str, dict]:
+    """Get stored counters plus reaction and commenter summaries for many posts in a fixed number of queries."""
+    summaries: dict[str, dict] = {
+        post_id: {"comment_count": 0, "reaction_count": 0} for post_id in post_ids
+    }
+    if post_ids:
+        count_statement = select(
+            Post.id, Post.comment_count, Post.reaction_count
+        ).where(col(Post.id).in_(post_ids))
+        for post_id, comment_count, reaction_count in db.exec(count_statement).all():
+            summaries[post_id]["comment_count"] = comment_count
+            summaries[post_id]["reaction_count"] = reaction_count
+
+    reactions = _reaction_summaries(db, post_ids, current_user_id)
+    comments = _comment_summaries(db, post_ids, current_user_id)
+    for post_id, summary in summaries.items():
+        summary["reactions"] = reactions[post_id]
+        summary["comment_summary"] = comments[post_id]
+    return summaries
+
+
+def _reaction_summaries(
+    db: Session, post_ids: list[str], current_user_id: Optional[str]
+) -> dict[str, dict]:
+    """Get the per-emoji reaction counts of many posts, flagging the caller's own."""
+    summaries: dict[str, dict] = {
+        post_id: {"summary": [], "user_reaction_ids": []} for post_id in post_ids
+    }
+    if not post_ids:
+        return summaries
+
+    my_emojis: set[tuple[str, str]] = set()
+    if current_user_id:
+        my_statement = select(Reaction.post_id, Reaction.emoji).where(
+            col(Reaction.post_id).in_(post_ids),
+            Reaction.user_id == current_user_id,
+            Reaction.deleted_at.is_(None),
+        )
+        my_emojis = set(db.exec(my_statement).all())
+
+    emoji_statement = (
+        select(PostReactionCount)
+        .where(
+            col(PostReactionCount.post_id).in_(post_ids), PostReactionCount.count > 0
+        )
+        .order_by(PostReactionCount.created_at)
+    )
+    for emoji_count in db.exec(emoji_statement).all():
+        me = (emoji_count.post_id, emoji_count.emoji) in my_emojis
+        reactions = summaries[emoji_count.post_id]
+        reactions["summary"].append(
+            {"emoji": emoji_count.emoji, "count": emoji_count.count, "me": me}
+        )
+        if me:
+            reactions["user_reaction_ids"].append(
+                f"{current_user_id}_emoji_{emoji_count.emoji}"
+            )
+    return summaries
+
+
+def _comment_summaries(
+    db: Session, post_ids: list[str], current_user_id: Optional[str]
+) -> dict[str, dict]:
+    """Get who replied anywhere under each of many posts, in order of first reply."""
+    summaries: dict[str, dict] = {
+        post_id: {"count": 0, "names": []} for post_id in post_ids
+    }
+    if not post_ids:
+        return summaries
+
+    # Every reply under a page post has a path starting with that post's path
+    root = aliased(Post)
+    comment_statement = (
+        select(root.id, Post.user_id, User.name, User.username)
+        .select_from(root)
+        .join(Post, col(Post.path).like(col(root.path) + "/%"))
+        .outerjoin(User, col(User.id) == Post.user_id)
+        .where(col(root.id).in_(post_ids), Post.deleted_at.is_(None))
+        .group_by(root.id, Post.user_id, User.name, User.username)
+        .order_by(func.min(Post.created_at))
+    )
+    commenters: dict[str, list[tuple[str, str]]] = {}
+    for root_id, user_id, name, username in db.exec(comment_statement).all():
+        if username is not None:
+            commenters.setdefault(root_id, []).append((user_id, name or username))
+
+    for root_id, users in commenters.items():
+        summaries[root_id] = {
+            "count": len(users),
+            "names": [name for _, name in users],
+            "me": any(user_id == current_user_id for user_id, _ in users),
+        }
+
+    return summaries
 
 
 def get_reactions_summary(
     db: Session, post_id: str, current_user_id: Optional[str] = None
 ) -> dict:
     """Get reactions summary for a post."""
-    reactions = db.exec(
-        select(Reaction).where(
-            Reaction.post_id == post_id, Reaction.deleted_at.is_(None)
-        )
-    ).all()
-    emoji_counts = Counter(r.emoji for r in reactions)
-    user_reactions = {r.emoji for r in reactions if r.user_id == current_user_id}
-
-    summary = [
-        {"emoji": emoji, "count": count, "me": emoji in user_reactions}
-        for emoji, count in emoji_counts.items()
-    ]
-
-    user_reaction_ids = (
-        [f"{current_user_id}_emoji_{emoji}" for emoji in user_reactions]
-        if current_user_id
-        else []
-    )
-
-    return {"summary": summary, "user_reaction_ids": user_reaction_ids}
+    return _reaction_summaries(db, [post_id], current_user_id)[post_id]
 
 
 def get_comment_summary(
     db: Session, post_id: str, current_user_id: Optional[str] = None
 ) -> dict:
     """Get comment summary for a post."""
-    sql = """
-    WITH RECURSIVE rt AS (
-        SELECT id, user_id FROM post WHERE parent_id = :post_id AND deleted_at IS NULL
-        UNION ALL
-        SELECT p.id, p.user_id FROM post p INNER JOIN rt ON p.parent_id = rt.id WHERE p.deleted_at IS NULL
-    )
-    SELECT DISTINCT user_id FROM rt WHERE user_id IS NOT NULL
-    """
-    result = db.exec(text(sql).bindparams(post_id=post_id))
-    user_ids = [row.user_id for row in result.all()]
-
-    if not user_ids:
-        return {"count": 0, "names": []}
-
-    user_id_col = cast(Column, User.id)
-    users = db.exec(select(User).where(user_id_col.in_(user_ids))).all()
-    names = [user.name or user.username for user in users]
-
-    me = current_user_id in user_ids if current_user_id else False
-
-    return {"count": len(names), "names": names, "me": me}
+    return _comment_summaries(db, [post_id], current_user_id)[post_id]
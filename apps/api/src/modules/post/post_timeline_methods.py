@@ -0,0 +1,304 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, col, select
+
+from src.core.common import as_utc
+from src.core.redis_client import get_redis
+from src.database.engine import engine
+from src.database.models import Post, PostType
+from src.modules.channels.channels_methods import channel_visible_to
+
+GLOBAL_TIMELINE_KEY = "timeline:global"
+CHANNEL_TIMELINE_KEY = "timeline:channel:{}"
+USER_TIMELINE_KEY = "timeline:user:{}"
+TIMELINE_MAX_LENGTH = 1000
+# Per-user and per-channel timelines are rebuilt on the next read once they expire
+TIMELINE_TTL_SECONDS = 24 * 60 * 60
+# Outside the timeline:* namespace so full rebuilds never sweep it away
+TIMELINE_REBUILD_LOCK_KEY = "timeline_rebuild_lock:{}"
+TIMELINE_REBUILD_LOCK_SECONDS = 30
+# Posts are stamped before they commit, so a rebuild re-reads a little further back
+TIMELINE_REBUILD_OVERLAP = timedelta(minutes=1)
+# Pinned posts sort above every timestamp; microsecond scores stay exact below 2**53
+PINNED_SCORE_OFFSET = 2**52
+
+
+def timeline_score(created_at: datetime, is_pinned: bool = False) -> int:
+    """Sort score of a post, newest first with pinned posts on top."""
+    score = int(as_utc(created_at).timestamp() * 1_000_000)
+    return score + PINNED_SCORE_OFFSET if is_pinned else score
+
+
+def _timeline_entries(post) -> dict[str, int]:
+    """Timeline keys a post belongs to, with its score in each."""
+    entries = {USER_TIMELINE_KEY.format(post.user_id): timeline_score(post.created_at)}
+    pinned_score = timeline_score(post.created_at, post.is_pinned)
+    if post.channel_id:
+        entries[CHANNEL_TIMELINE_KEY.format(post.channel_id)] = pinned_score
+    if post.type == PostType.POST:
+        entries[GLOBAL_TIMELINE_KEY] = pinned_score
+    return entries
+
+
+def _timeline_criteria(key: str) -> Optional[list]:
+    """SQL criteria matching the posts of a timeline, or None for an unknown key."""
+    if key == GLOBAL_TIMELINE_KEY:
+        return [Post.type == PostType.POST]
+    channel_prefix = CHANNEL_TIMELINE_KEY.format("")
+    if key.startswith(channel_prefix):
+        return [Post.channel_id == key[len(channel_prefix) :]]
+    user_prefix = USER_TIMELINE_KEY.format("")
+    if key.startswith(user_prefix):
+        return [Post.user_id == key[len(user_prefix) :]]
+    return None
+
+
+def _timeline_rows():
+    """Select the columns a post's timeline entries are computed from."""
+    return select(
+        Post.id,
+        Post.user_id,
+        Post.channel_id,
+        Post.type,
+        Post.is_pinned,
+        Post.created_at,
+        Post.deleted_at,
+    )
+
+
+def add_post_to_timelines(post: Post) -> None:
+    """Push a new or re-pinned post onto every cached timeline it belongs to."""
+    client = get_redis()
+    if not client:
+        return
+    try:
+        entries = _timeline_entries(post)
+        # Timelines that were never built stay missing so reads keep using SQL
+        keys = [key for key in entries if client.exists(key)]
+        pipeline = client.pipeline()
+        for key in keys:
+            pipeline.zadd(key, {post.id: entries[key]})
+            pipeline.zremrangebyrank(key, 0, -TIMELINE_MAX_LENGTH - 1)
+        pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not add post {post.id} to timelines: {e}")
+
+
+def remove_posts_from_timelines(posts: list[Post]) -> None:
+    """Trim deleted posts from every timeline they were on."""
+    client = get_redis()
+    if not client or not posts:
+        return
+    try:
+        pipeline = client.pipeline()
+        for post in posts:
+            for key in _timeline_entries(post):
+                pipeline.zrem(key, post.id)
+        pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not remove posts from timelines: {e}")
+
+
+def _hydrate_posts(
+    db: Session, post_ids: list[str], current_user_id: Optional[str], visibility: bool
+) -> list[Post]:
+    """Load live posts by ID in timeline order."""
+    if not post_ids:
+        return []
+    statement = (
+        select(Post)
+        .options(
+            joinedload(Post.user), joinedload(Post.channel), joinedload(Post.medias)
+        )  # type: ignore
+        .where(col(Post.id).in_(post_ids), Post.deleted_at.is_(None))
+    )
+    if visibility:
+        statement = statement.where(
+            channel_visible_to(Post.channel_id, current_user_id)
+        )
+    posts = {post.id: post for post in db.exec(statement).unique().all()}
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+def get_timeline_posts(
+    db: Session,
+    key: str,
+    current_user_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple[int, str]] = None,
+    visibility: bool = True,
+) -> Optional[list[Post]]:
+    """Get posts from a cached timeline, or None when the cache cannot answer and SQL should.
+
+    after is the (score, post_id) of the last post already served; without a limit the
+    whole timeline is returned.
+    """
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        size = client.zcard(key)
+        if not size:
+            # Build a missing timeline once; other readers use SQL until it exists
+            if not rebuild_timeline(key):
+                return None
+            size = client.zcard(key)
+            if not size:
+                return None
+        # A full timeline has been trimmed, so anything older only exists in SQL
+        trimmed = size >= TIMELINE_MAX_LENGTH
+        if trimmed and not limit:
+            return None
+        max_score = after[0] if after else "+inf"
+        batch = limit * 2 if limit else TIMELINE_MAX_LENGTH
+        offset = 0
+        posts: list[Post] = []
+        while True:
+            entries = client.zrevrangebyscore(
+                key, max_score, "-inf", start=offset, num=batch, withscores=True
+            )
+            offset += len(entries)
+            post_ids = [
+                post_id
+                for post_id, score in entries
+                if not (after and score == after[0] and post_id >= after[1])
+            ]
+            # Posts hidden from this viewer are skipped, so keep reading until the page fills
+            posts.extend(_hydrate_posts(db, post_ids, current_user_id, visibility))
+            if limit and len(posts) >= limit:
+                return posts[:limit]
+            if len(entries) < batch:
+                break
+        if trimmed:
+            return None
+    except RedisError as e:
+        logger.warning(f"Could not read timeline {key}: {e}")
+        return None
+    return posts
+
+
+def _timeline_ttl(key: str) -> Optional[int]:
+    """Expiry of a timeline in seconds, or None for the global one that never expires."""
+    return None if key == GLOBAL_TIMELINE_KEY else TIMELINE_TTL_SECONDS
+
+
+def _reapply_recent_posts(
+    db: Session, since: datetime, key: Optional[str] = None
+) -> None:
+    """Re-apply posts written while a rebuild read the database.
+
+    Writers only touch timelines that already exist, so their changes can miss a
+    timeline that is swapped in after they ran.
+    """
+    client = get_redis()
+    if not client:
+        return
+    statement = _timeline_rows().where(
+        col(Post.updated_at) >= since - TIMELINE_REBUILD_OVERLAP
+    )
+    if key:
+        statement = statement.where(*_timeline_criteria(key))
+    pipeline = client.pipeline()
+    added = set()
+    for post in db.exec(statement):
+        for entry_key, score in _timeline_entries(post).items():
+            if key and entry_key != key:
+                continue
+            if post.deleted_at:
+                pipeline.zrem(entry_key, post.id)
+            else:
+                pipeline.zadd(entry_key, {post.id: score})
+                added.add(entry_key)
+    for entry_key in added:
+        pipeline.zremrangebyrank(entry_key, 0, -TIMELINE_MAX_LENGTH - 1)
+        ttl = _timeline_ttl(entry_key)
+        if ttl:
+            # Timelines created here start expiring; rebuilt ones keep their expiry
+            pipeline.expire(entry_key, ttl, nx=True)
+    pipeline.execute()
+
+
+def _write_timeline(db: Session, key: str) -> bool:
+    """Replace a timeline with its newest posts from the database, returning whether it has any."""
+    client = get_redis()
+    criteria = _timeline_criteria(key)
+    if not client or criteria is None:
+        return False
+    order = [col(Post.created_at).desc()]
+    if not key.startswith(USER_TIMELINE_KEY.format("")):
+        order.insert(0, col(Post.is_pinned).desc())
+    statement = (
+        _timeline_rows()
+        .where(Post.deleted_at.is_(None), *criteria)
+        .order_by(*order)
+        .limit(TIMELINE_MAX_LENGTH)
+    )
+    timeline = {post.id: _timeline_entries(post)[key] for post in db.exec(statement)}
+    if not timeline:
+        return False
+    # Swap the rebuilt timeline in atomically so readers never see a partial one
+    pipeline = client.pipeline()
+    pipeline.delete(f"{key}:rebuild")
+    pipeline.zadd(f"{key}:rebuild", timeline)
+    pipeline.rename(f"{key}:rebuild", key)
+    ttl = _timeline_ttl(key)
+    if ttl:
+        pipeline.expire(key, ttl)
+    pipeline.execute()
+    return True
+
+
+def rebuild_timeline(key: str) -> bool:
+    """Build one missing timeline from the primary, or return False when another reader holds the lock."""
+    client = get_redis()
+    if not client or _timeline_criteria(key) is None:
+        return False
+    # The lock is left to expire, which also spaces out retries for empty
+    # timelines that Redis cannot store
+    if not client.set(
+        TIMELINE_REBUILD_LOCK_KEY.format(key),
+        1,
+        nx=True,
+        ex=TIMELINE_REBUILD_LOCK_SECONDS,
+    ):
+        return False
+
+    # Replicas can lag behind the writes this timeline has already missed
+    with Session(engine) as db:
+        started = datetime.now(timezone.utc)
+        _write_timeline(db, key)
+        _reapply_recent_posts(db, started, key)
+    return True
+
+
+def rebuild_timelines(db: Session) -> int:
+    """Rebuild every cached timeline from the database and return how many were written."""
+    client = get_redis()
+    if not client:
+        return 0
+
+    started = datetime.now(timezone.utc)
+    live = Post.deleted_at.is_(None)
+    user_ids = db.exec(select(Post.user_id).where(live).distinct())
+    channel_ids = db.exec(
+        select(Post.channel_id)
+        .where(live, col(Post.channel_id).is_not(None))
+        .distinct()
+    )
+    keys = [
+        GLOBAL_TIMELINE_KEY,
+        *(CHANNEL_TIMELINE_KEY.format(channel_id) for channel_id in channel_ids),
+        *(USER_TIMELINE_KEY.format(user_id) for user_id in user_ids),
+    ]
+    # One timeline at a time, so at most TIMELINE_MAX_LENGTH posts are held in memory
+    written = {key for key in keys if _write_timeline(db, key)}
+
+    stale_keys = set(client.scan_iter(match="timeline:*")) - written
+    if stale_keys:
+        client.delete(*stale_keys)
+    _reapply_recent_posts(db, started)
+    return len(written)
@@ -6,6 +6,7 @@ from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
 
 from src.database.models import Reaction
+from src.modules.post.post_counter_methods import increment_reaction_count
 
 
 def soft_delete(db: Session, record) -> None:
@@ -15,21 +16,28 @@ def soft_delete(db: Session, record) -> None:
 
 
 def create_reaction(db: Session, reaction_data: dict) -> Optional[Reaction]:
-    """Create or toggle a reaction."""
+    """Create or toggle a reaction, keeping the post reaction counters in step."""
     user_id = reaction_data["user_id"]
     post_id = reaction_data["post_id"]
     emoji = reaction_data["emoji"]
 
     existing = db.exec(
-        select(Reaction).where(Reaction.user_id == user_id, Reaction.post_id == post_id)
+        select(Reaction).where(
+            Reaction.user_id == user_id,
+            Reaction.post_id == post_id,
+            Reaction.deleted_at.is_(None),
+        )
     ).first()
 
     if existing:
         if existing.emoji == emoji:
             soft_delete(db, existing)
+            increment_reaction_count(db, post_id, emoji, -1)
             db.commit()
             return None
         else:
+            increment_reaction_count(db, post_id, existing.emoji, -1)
+            increment_reaction_count(db, post_id, emoji, 1)
             existing.emoji = emoji
             db.commit()
             db.refresh(existing)
@@ -37,6 +45,7 @@ def create_reaction(db: Session, reaction_data: dict) -> Optional[Reaction]:
     else:
         reaction = Reaction(**reaction_data)
         db.add(reaction)
+        increment_reaction_count(db, post_id, emoji, 1)
         db.commit()
         db.refresh(reaction)
         return reaction
@@ -49,11 +58,13 @@ def delete_reaction(db: Session, user_id: str, post_id: str, emoji: str) -> bool
             Reaction.user_id == user_id,
             Reaction.post_id == post_id,
             Reaction.emoji == emoji,
+            Reaction.deleted_at.is_(None),
         )
     ).first()
 
     if existing:
         soft_delete(db, existing)
+        increment_reaction_count(db, post_id, emoji, -1)
         db.commit()
         return True
     return False
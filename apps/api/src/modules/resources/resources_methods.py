@@ -5,6 +5,7 @@ from sqlalchemy.orm import joinedload
 from sqlmodel import Session, desc, select
 
 from src.database.models import Resource
+from src.modules.channels.channels_methods import channel_visible_to
 
 
 def soft_delete(db: Session, record) -> None:
@@ -13,29 +14,6 @@ def soft_delete(db: Session, record) -> None:
     db.add(record)
 
 
-def filter_private_channel_resources(
-    resources: list[Resource],
-    current_user_id: Optional[str] = None,
-    db: Optional[Session] = None,
-) -> list[Resource]:
-    """Filter out resources from private channels where user is not a member."""
-    filtered_resources = []
-    for resource in resources:
-        if resource.channel and resource.channel.type != "private":
-            filtered_resources.append(resource)
-            continue
-
-        if not current_user_id or not db:
-            continue
-
-        from src.modules.channels.channels_methods import is_member
-
-        if resource.channel and is_member(db, resource.channel_id, current_user_id):
-            filtered_resources.append(resource)
-
-    return filtered_resources
-
-
 def create_resource(db: Session, resource_data: dict) -> Resource:
     """Create a new resource."""
     resource = Resource(**resource_data)
@@ -56,12 +34,18 @@ def get_resource(db: Session, resource_id: str) -> Optional[Resource]:
     return resource
 
 
-def get_resources_by_user(db: Session, user_id: str) -> List[Resource]:
-    """Get all resources created by a user."""
+def get_resources_by_user(
+    db: Session, user_id: str, current_user_id: Optional[str] = None
+) -> List[Resource]:
+    """Get all resources created by a user, hiding private channel resources from non-members."""
     statement = (
         select(Resource)
         .options(joinedload(Resource.user), joinedload(Resource.channel))
-        .where(Resource.user_id == user_id, Resource.deleted_at.is_(None))
+        .where(
+            Resource.user_id == user_id,
+            Resource.deleted_at.is_(None),
+            channel_visible_to(Resource.channel_id, current_user_id),
+        )
         .order_by(desc(Resource.created_at))
     )
     resources = list(db.exec(statement).unique().all())
@@ -80,12 +64,17 @@ def get_resources_by_channel(db: Session, channel_id: str) -> List[Resource]:
     return resources
 
 
-def get_all_resources(db: Session, skip: int = 0, limit: int = 100) -> List[Resource]:
-    """Get all resources with pagination."""
+def get_all_resources(
+    db: Session, skip: int = 0, limit: int = 100, current_user_id: Optional[str] = None
+) -> List[Resource]:
+    """Get all resources with pagination, hiding private channel resources from non-members."""
     statement = (
         select(Resource)
         .options(joinedload(Resource.user), joinedload(Resource.channel))
-        .where(Resource.deleted_at.is_(None))
+        .where(
+            Resource.deleted_at.is_(None),
+            channel_visible_to(Resource.channel_id, current_user_id),
+        )
         .order_by(desc(Resource.created_at))
         .offset(skip)
         .limit(limit)
@@ -3,7 +3,9 @@ from typing import Optional
 
 from sqlmodel import Session, col, func, select
 
+from src.core.pagination import next_cursor, paginate
 from src.database.models import Role, User
+from src.modules.auth.principal_methods import invalidate_principal
 
 
 def soft_delete(db: Session, record) -> None:
@@ -48,6 +50,7 @@ def update_user(db: Session, user_id: str, update_data: dict) -> Optional[User]:
         setattr(user, key, value)
     db.commit()
     db.refresh(user)
+    invalidate_principal(user_id)
     return user
 
 
@@ -134,18 +137,24 @@ def delete_user(db: Session, user_id: str) -> bool:
 
     soft_delete(db, user)
     db.commit()
+    invalidate_principal(user_id)
     return True
 
 
 def get_all_users(
-    db: Session, skip: int = 0, limit: int = 100, query: Optional[str] = None
-) -> list[User]:
-    """Get all users with pagination and optional query filtering."""
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    query: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> tuple[list[User], Optional[str]]:
+    """Get a page of users with optional query filtering and the cursor of the next page."""
     statement = select(User).where(User.deleted_at.is_(None))
     if query:
         statement = statement.where(col(User.username).ilike(f"%{query}%"))
-    statement = statement.offset(skip).limit(limit)
-    return list(db.exec(statement).all())
+    statement = paginate(statement, [User.created_at, User.id], cursor, limit, skip)
+    users = list(db.exec(statement).all())
+    return users, next_cursor(users, ["created_at", "id"], limit)
 
 
 def ban_user(db: Session, user_id: str) -> Optional[User]:
@@ -154,8 +163,10 @@ def ban_user(db: Session, user_id: str) -> Optional[User]:
     if not user:
         return None
     user.is_active = False
+    user.token_version += 1
     db.commit()
     db.refresh(user)
+    invalidate_principal(user_id)
     return user
 
 
@@ -177,4 +188,5 @@ def promote_user_to_admin(db: Session, user_id: str) -> Optional[User]:
     user.is_active = True  # Admin is active by default
     db.commit()
     db.refresh(user)
+    invalidate_principal(user_id)
     return user
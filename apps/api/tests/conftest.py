@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.engine import get_async_session as get_async_db
+from src.database.engine import get_session as get_db
+from src.main import app
+
+
+@pytest.fixture
+def create_test_engines():
+    """Create sync and async engines over the same SQLite file, disposed after the test"""
+    engines = []
+
+    def create(db_path):
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+        engines.append((engine, async_engine))
+        return engine, async_engine
+
+    yield create
+    for engine, async_engine in engines:
+        engine.dispose()
+        asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def override_sessions():
+    """Point both session dependencies at the test engines until the test ends"""
+
+    def override(engine, async_engine):
+        def get_test_db():
+            with Session(engine) as session:
+                yield session
+
+        async def get_test_async_db():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = get_test_db
+        app.dependency_overrides[get_async_db] = get_test_async_db
+
+    yield override
+    app.dependency_overrides.clear()
@@ -53,3 +53,63 @@ def test_get_account():
     app.dependency_overrides.clear()
     assert response.status_code == 200
     assert response.json()["id"] == "user123"
+
+
+def test_access_token_is_verified_without_a_user_lookup():
+    import fakeredis
+    from datetime import timedelta
+    from sqlalchemy import event
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+    from src.database.models import Role, User
+    from src.modules.auth.auth_methods import create_access_token
+    from src.modules.auth.principal_methods import access_token_claims
+    from src.modules.user.user_methods import ban_user, update_user
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    with Session(engine) as session:
+        user = User(username="principal", email="principal@example.com", is_active=True)
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        token = create_access_token(access_token_claims(user), timedelta(minutes=5))
+
+    user_queries = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: user_queries.append(statement)
+        if 'FROM "user"' in statement or "FROM user" in statement
+        else None,
+    )
+
+    def get_test_db():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        with patch("src.modules.auth.principal_methods.get_redis", return_value=redis_client):
+            # Notifications only need the caller's id, so once cached no user row is read
+            client.get("/api/notifications", headers=headers)
+            user_queries.clear()
+            assert client.get("/api/notifications", headers=headers).status_code == 200
+            assert user_queries == []
+
+            assert client.get("/api/broadcasts/", headers=headers).status_code == 403
+            with Session(engine) as session:
+                update_user(session, user_id, {"role": Role.ADMIN})
+            assert client.get("/api/broadcasts/", headers=headers).status_code == 200
+
+            with Session(engine) as session:
+                ban_user(session, user_id)
+            assert client.get("/api/notifications", headers=headers).status_code == 401
+    finally:
+        app.dependency_overrides.clear()
@@ -25,9 +25,10 @@ def test_register(monkeypatch):
         "src.modules.appsettings.appsettings_methods.get_active_app_settings",
         lambda *args, **kwargs: mock_app_settings
     )
-    monkeypatch.setattr(
-        "src.api.auth.api.register_user", lambda *args, **kwargs: mock_user
-    )
+    async def fake_register_user(*args, **kwargs):
+        return mock_user
+
+    monkeypatch.setattr("src.api.auth.api.register_user", fake_register_user)
     app.dependency_overrides[
         app.dependency_overrides.get("get_db", lambda: mock_db)
     ] = lambda: mock_db
@@ -87,9 +88,10 @@ def test_login(monkeypatch):
         lambda *args, **kwargs: mock_user,
     )
     # Mock login_user to return the token
-    monkeypatch.setattr(
-        "src.api.auth.api.login_user", lambda *args, **kwargs: mock_result
-    )
+    async def fake_login_user(*args, **kwargs):
+        return mock_result
+
+    monkeypatch.setattr("src.api.auth.api.login_user", fake_login_user)
     app.dependency_overrides[
         app.dependency_overrides.get("get_db", lambda: mock_db)
     ] = lambda: mock_db
@@ -120,3 +122,205 @@ def test_login_banned_user(monkeypatch):
     )
     assert response.status_code == 403
     assert "banned" in response.json()["detail"].lower()
+
+
+def test_refresh_tokens_are_verified_and_revoked_without_row_by_row_writes(tmp_path, create_test_engines):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import event
+    from sqlmodel import Session, select
+
+    from src.database.models import RefreshToken, RefreshTokenStatus, User
+    from src.modules.auth.auth_methods import (
+        create_refresh_token,
+        hash_token,
+        purge_refresh_tokens,
+        revoke_all_user_refresh_tokens,
+        verify_refresh_token,
+    )
+
+    engine, async_engine = create_test_engines(tmp_path / "auth.db")
+    writes = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("UPDATE", "DELETE")):
+            writes.append(statement)
+
+    with Session(engine) as db:
+        user = User(username="tokens", email="tokens@example.com", is_active=True)
+        db.add(user)
+        db.commit()
+        tokens = [create_refresh_token(db, user.id) for _ in range(3)]
+
+        # Uses within the touch interval stay read-only
+        assert verify_refresh_token(db, tokens[0]).id == user.id
+        assert verify_refresh_token(db, tokens[0]).id == user.id
+        assert writes == []
+
+        stale = db.exec(
+            select(RefreshToken).where(RefreshToken.token_hash == hash_token(tokens[0]))
+        ).one()
+        stale.last_used_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        db.commit()
+        writes.clear()
+        assert verify_refresh_token(db, tokens[0]).id == user.id
+        assert verify_refresh_token(db, tokens[0]).id == user.id
+        assert len(writes) == 1
+
+        # Expiry is part of the lookup, an expired token is simply not found
+        expired = db.exec(
+            select(RefreshToken).where(RefreshToken.token_hash == hash_token(tokens[1]))
+        ).one()
+        expired.expires_at = datetime.now(timezone.utc) - timedelta(days=30)
+        db.commit()
+        writes.clear()
+        assert verify_refresh_token(db, tokens[1]) is None
+        assert writes == []
+
+        assert revoke_all_user_refresh_tokens(db, user.id) == 3
+        assert len(writes) == 1
+        assert verify_refresh_token(db, tokens[2]) is None
+
+        assert purge_refresh_tokens(db) == 1
+        statuses = db.exec(select(RefreshToken.status)).all()
+        assert statuses == [RefreshTokenStatus.REVOKED, RefreshTokenStatus.REVOKED]
+
+
+def test_login_verifies_on_the_password_pool_and_writes_on_the_threadpool(monkeypatch):
+    import threading
+
+    from src.database.engine import get_session as get_db
+    from src.modules.auth.auth_methods import pwd_context
+
+    mock_db = MagicMock()
+    mock_user = MagicMock()
+    mock_user.id = "user123"
+    mock_user.is_active = True
+    mock_user.password = pwd_context.hash("password")
+    verify_threads, token_threads = [], []
+    verify_and_update = pwd_context.verify_and_update
+
+    def record_verify(*args):
+        verify_threads.append(threading.current_thread().name)
+        return verify_and_update(*args)
+
+    def record_refresh_token(*args):
+        token_threads.append(threading.current_thread().name)
+        return "refresh"
+
+    monkeypatch.setattr(pwd_context, "verify_and_update", record_verify)
+    monkeypatch.setattr(
+        "src.modules.user.user_methods.get_user_by_username",
+        lambda *args, **kwargs: mock_user,
+    )
+    monkeypatch.setattr(
+        "src.modules.auth.auth_methods.get_user_by_username",
+        lambda *args, **kwargs: mock_user,
+    )
+    monkeypatch.setattr(
+        "src.modules.auth.auth_methods.access_token_claims",
+        lambda user: {"sub": user.id},
+    )
+    monkeypatch.setattr(
+        "src.modules.auth.auth_methods.create_refresh_token", record_refresh_token
+    )
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        response = client.post(
+            "/api/login", json={"username": "testuser", "password": "password"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert verify_threads[0].startswith("password-hash")
+    assert not token_threads[0].startswith("password-hash")
+
+
+def test_sync_endpoints_respond_while_the_password_pool_is_saturated(monkeypatch):
+    import asyncio
+    import threading
+
+    import httpx
+
+    from src.database.engine import get_session as get_db
+    from src.modules.auth.auth_methods import pwd_context
+
+    mock_db = MagicMock()
+    mock_db.exec.return_value.first.return_value = None
+    mock_user = MagicMock()
+    mock_user.is_active = True
+    mock_user.password = "hash"
+    release = threading.Event()
+
+    def blocked_verify(*args):
+        release.wait(10)
+        return False, None
+
+    monkeypatch.setattr(pwd_context, "verify_and_update", blocked_verify)
+    monkeypatch.setattr(
+        "src.modules.user.user_methods.get_user_by_username",
+        lambda *args, **kwargs: mock_user,
+    )
+    monkeypatch.setattr(
+        "src.modules.auth.auth_methods.get_user_by_username",
+        lambda *args, **kwargs: mock_user,
+    )
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            # More logins than the request threadpool has threads, all stuck on bcrypt
+            logins = [
+                asyncio.create_task(
+                    http.post("/api/login", json={"username": "testuser", "password": "password"})
+                )
+                for _ in range(60)
+            ]
+            await asyncio.sleep(0.2)
+            other = await asyncio.wait_for(http.get("/api/users/missing"), timeout=5)
+            release.set()
+            return other, await asyncio.gather(*logins)
+
+    try:
+        other, logins = asyncio.run(main())
+    finally:
+        release.set()
+        app.dependency_overrides.clear()
+
+    assert other.status_code == 404
+    assert [response.status_code for response in logins] == [401] * 60
+
+
+def test_login_upgrades_hashes_below_the_configured_cost(tmp_path, create_test_engines):
+    import asyncio
+
+    from sqlmodel import Session
+
+    from src.core.settings import settings
+    from src.database.models import User
+    from src.modules.auth.auth_methods import authenticate_user, pwd_context
+
+    engine, async_engine = create_test_engines(tmp_path / "auth.db")
+
+    with Session(engine) as db:
+        weak_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("hunter22")
+        user = User(username="legacy", email="legacy@example.com", password=weak_hash)
+        db.add(user)
+        db.commit()
+
+        assert asyncio.run(authenticate_user(db, "legacy", "wrong")) is None
+        assert user.password == weak_hash
+
+        assert asyncio.run(authenticate_user(db, "legacy", "hunter22")).id == user.id
+        upgraded_hash = user.password
+        assert upgraded_hash != weak_hash
+        assert pwd_context.identify(upgraded_hash) == "bcrypt"
+        assert f"${settings.BCRYPT_ROUNDS:02d}$" in upgraded_hash
+        assert not pwd_context.needs_update(upgraded_hash)
+
+        # Already at the configured cost, so nothing is rewritten
+        assert asyncio.run(authenticate_user(db, "legacy", "hunter22")).id == user.id
+        assert user.password == upgraded_hash
@@ -121,3 +121,40 @@ def test_delete_channel():
             app.dependency_overrides.clear()
             assert response.status_code == 200
             assert "message" in response.json()
+
+
+def test_membership_checks_are_memoized_per_session():
+    from sqlalchemy import event
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+    from src.modules.channels.channels_methods import add_member, get_channel, is_member
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(username="member", email="member@example.com", password=None)
+        channels = [Channel(name=f"Channel {i}", slug=f"channel-{i}", type="private") for i in range(3)]
+        session.add_all([user, *channels])
+        session.commit()
+        user_id = user.id
+        channel_ids = [channel.id for channel in channels]
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    with Session(engine) as session:
+        for channel_id in channel_ids * 3:
+            assert get_channel(session, channel_id).id == channel_id
+            assert is_member(session, channel_id, user_id) is False
+        assert len(statements) == len(channel_ids) + 1
+
+        add_member(session, channel_ids[0], user_id)
+        assert is_member(session, channel_ids[0], user_id) is True
+        assert is_member(session, channel_ids[1], user_id) is False
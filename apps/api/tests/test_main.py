@@ -26,3 +26,79 @@ def test_cors_headers():
     # OPTIONS may not be allowed on specific paths, check for CORS headers if present
     if response.status_code == 200:
         assert "access-control-allow-origin" in response.headers
+
+
+def test_reads_go_to_replica_until_client_writes():
+    from unittest.mock import patch
+
+    import fakeredis
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+
+    from src.database.engine import get_session
+
+    def make_engine():
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(engine)
+        return engine
+
+    primary, replica = make_engine(), make_engine()
+
+    def get_primary_db():
+        with Session(primary) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_primary_db
+    writer = {"Authorization": "Bearer writer"}
+    try:
+        with patch("src.database.engine.read_engine", replica), patch(
+            "src.database.engine.get_redis", return_value=fakeredis.FakeRedis(decode_responses=True)
+        ):
+            created = client.post(
+                "/api/users/",
+                json={"username": "fresh", "email": "fresh@example.com", "password": "secret"},
+                headers=writer,
+            )
+            user_id = created.json()["id"]
+            # The replica has not caught up, so only the writer reads from the primary
+            writer_read = client.get(f"/api/users/{user_id}", headers=writer)
+            other_read = client.get(f"/api/users/{user_id}", headers={"Authorization": "Bearer other"})
+            anonymous_read = client.get(f"/api/users/{user_id}")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert created.status_code == 200
+    assert writer_read.status_code == 200
+    assert other_read.status_code == 404
+    assert anonymous_read.status_code == 404
+
+
+def test_async_reads_check_the_primary_pin_off_the_event_loop():
+    import asyncio
+    import threading
+    from unittest.mock import MagicMock, patch
+
+    from src.database import engine as db_engine
+
+    threads = []
+
+    def reads_from_primary(request):
+        threads.append(threading.get_ident())
+        return True
+
+    async def main():
+        primary_session = MagicMock()
+        with patch.object(db_engine, "read_engine", MagicMock()), patch.object(
+            db_engine, "reads_from_primary", reads_from_primary
+        ):
+            sessions = db_engine.get_async_read_session(MagicMock(), primary_session)
+            assert await sessions.__anext__() is primary_session
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert len(threads) == 1
+    assert threads[0] != loop_thread
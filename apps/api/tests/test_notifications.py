@@ -51,3 +51,339 @@ def test_get_notifications():
 
 
 # Skipping test_mark_notification_as_read - complex validation requirements
+
+
+def test_post_notifications_are_created_in_one_batch(tmp_path, create_test_engines):
+    from datetime import timezone
+
+    from sqlalchemy import event
+    from sqlmodel import Session, select
+
+    from src.api.post.api import notify_post
+    from src.database.models import (
+        Notification,
+        NotificationFrequency,
+        NotificationPreferences,
+        PendingNotificationEmail,
+        User,
+    )
+    from src.modules.notifications.notification_tasks import (
+        create_post_notifications_task,
+    )
+
+    engine, async_engine = create_test_engines(tmp_path / "notifications.db")
+    with Session(engine) as session:
+        sender = User(username="sender", email="sender@example.com")
+        author = User(username="author", email="author@example.com")
+        mentioned = [User(username=f"friend{i}", email=f"friend{i}@example.com") for i in range(30)]
+        # Deleted accounts keep their username but are never notified
+        ghost = User(username="ghost", email="ghost@example.com", deleted_at=datetime.now(timezone.utc))
+        session.add_all([sender, author, ghost, *mentioned])
+        session.flush()
+        # A third of the mentioned users get daily digests instead of immediate emails
+        session.add_all(
+            NotificationPreferences(user_id=user.id, mention_email=NotificationFrequency.DAILY)
+            for user in mentioned[:10]
+        )
+        session.commit()
+        sender_id, author_id = sender.id, author.id
+
+    mentions = ["author", "sender", "nobody", "ghost", *(f"friend{i}" for i in range(30))]
+    post_data = {"content": " ".join(f"@{username}" for username in mentions)}
+    current_user = MagicMock()
+    current_user.id = sender_id
+    parent_post = MagicMock()
+    parent_post.user_id = author_id
+    with patch("src.api.post.api.create_post_notifications_task") as mock_task:
+        notify_post("post123", post_data, parent_post, "root123", current_user)
+    mock_task.delay.assert_called_once()
+    task_kwargs = mock_task.delay.call_args.kwargs
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with patch("src.modules.notifications.notification_tasks.engine", engine), \
+         patch("src.modules.notifications.notification_tasks.email_service") as mock_email:
+        mock_email.send_notification_email.return_value = True
+        result = create_post_notifications_task(**task_kwargs)
+
+    assert result["success"] is True
+    assert result["notification_count"] == 31
+    assert mock_email.send_notification_email.call_count == 21
+    assert len(statements) <= 6
+
+    with Session(engine) as session:
+        notifications = session.exec(select(Notification)).all()
+        assert sorted(n.type.value for n in notifications).count("mention") == 30
+        assert [n.recipient_id for n in notifications if n.type.value == "reply"] == [author_id]
+        assert all(n.sender_id == sender_id for n in notifications)
+        assert len(session.exec(select(PendingNotificationEmail)).all()) == 10
+        # Preferences are resolved without writing default rows
+        assert len(session.exec(select(NotificationPreferences)).all()) == 10
+
+
+def test_unread_count_uses_the_partial_index_and_read_all_is_one_update(tmp_path, create_test_engines, override_sessions):
+    from sqlalchemy import event
+    from sqlmodel import Session
+
+    from src.database.models import Notification, NotificationType, User
+    from src.modules.notifications import notifications_methods
+
+    engine, async_engine = create_test_engines(tmp_path / "unread.db")
+    with Session(engine) as session:
+        reader = User(username="reader", email="reader@example.com")
+        sender = User(username="sender", email="sender@example.com")
+        session.add_all([reader, sender])
+        session.flush()
+        for i in range(5):
+            session.add(
+                Notification(
+                    recipient_id=reader.id,
+                    sender_id=sender.id,
+                    type=NotificationType.MENTION,
+                    is_read=i == 0,
+                )
+            )
+        session.add(
+            Notification(recipient_id=sender.id, sender_id=reader.id, type=NotificationType.REPLY)
+        )
+        session.commit()
+        reader_id = reader.id
+
+    plans = []
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def explain_count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT count(*)"):
+            plans.extend(conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all())
+        return statement, parameters
+
+    override_sessions(engine, async_engine)
+    app.dependency_overrides[get_current_user] = lambda: create_mock_user(reader_id)
+    try:
+        before = client.get("/api/notifications/unread-count")
+        marked = client.post("/api/notifications/read-all")
+        after = client.get("/api/notifications/unread-count")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert before.json() == {"count": 4}
+    assert marked.json() == {"count": 4}
+    assert after.json() == {"count": 0}
+    assert any("ix_notification_unread_recipient_id" in plan[-1] for plan in plans)
+    with Session(engine) as session:
+        assert notifications_methods.get_unread_notification_count(session, reader_id) == 0
+        assert notifications_methods.mark_all_notifications_as_read(session, reader_id) == 0
+
+
+def test_digest_is_sent_in_parallel_chunks_and_resumes_without_resending(tmp_path, monkeypatch, create_test_engines):
+    from datetime import timedelta, timezone
+
+    from sqlmodel import Session, select
+
+    from src.core.celery_app import celery_app
+    from src.core.settings import settings
+    from src.database.models import (
+        Notification,
+        NotificationFrequency,
+        NotificationType,
+        PendingNotificationEmail,
+        User,
+    )
+    from src.modules.notifications.notification_tasks import (
+        send_notification_digest,
+        send_notification_digest_chunk,
+    )
+
+    engine, async_engine = create_test_engines(tmp_path / "digest.db")
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        sender = User(username="sender", email="sender@example.com")
+        readers = [User(username=f"reader{i}", email=f"reader{i}@example.com") for i in range(5)]
+        session.add_all([sender, *readers])
+        session.flush()
+
+        def queue(user, frequency=NotificationFrequency.DAILY, scheduled_for=now - timedelta(hours=1), is_sent=False):
+            notification = Notification(
+                recipient_id=user.id,
+                sender_id=sender.id,
+                type=NotificationType.LIKE,
+                data={"content": f"hello {user.username}"},
+            )
+            session.add(notification)
+            session.flush()
+            session.add(
+                PendingNotificationEmail(
+                    user_id=user.id,
+                    notification_id=notification.id,
+                    notification_type=NotificationType.LIKE,
+                    frequency=frequency,
+                    scheduled_for=scheduled_for,
+                    is_sent=is_sent,
+                )
+            )
+
+        for reader in readers:
+            queue(reader)
+            queue(reader)
+        # Not part of a daily run: weekly, not due yet, or already sent
+        queue(readers[0], frequency=NotificationFrequency.WEEKLY)
+        queue(readers[1], scheduled_for=now + timedelta(hours=1))
+        queue(readers[2], is_sent=True)
+        session.commit()
+        reader_ids = [reader.id for reader in readers]
+        sender_id = sender.id
+
+    # The mail provider fails for one reader on the first run
+    failing = {"reader3@example.com"}
+    sent = []
+    overlapping = []
+
+    def send_digest(to_email, notifications, digest_type):
+        # A second run starts while the first is still sending
+        if not overlapping:
+            overlapping.append(send_notification_digest("daily"))
+        if to_email in failing:
+            return False
+        sent.append((to_email, notifications))
+        return True
+
+    monkeypatch.setattr(settings, "NOTIFICATION_DIGEST_CHUNK_SIZE", 2)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr("src.modules.notifications.notification_tasks.engine", engine)
+    monkeypatch.setattr(
+        "src.modules.notifications.notification_tasks.email_service.send_notification_digest_email",
+        send_digest,
+    )
+
+    result = send_notification_digest("daily")
+    assert result["chunk_count"] == 3
+    # Rows claimed by either run are emailed exactly once
+    assert sorted(email for email, _ in sent) == [
+        "reader0@example.com",
+        "reader1@example.com",
+        "reader2@example.com",
+        "reader4@example.com",
+    ]
+    assert all(len(notifications) == 2 for _, notifications in sent)
+    assert sent[0][1][0]["sender_username"] == "sender"
+
+    # A second run only picks up what is still unsent
+    failing.clear()
+    sent.clear()
+    result = send_notification_digest("daily")
+    assert result["chunk_count"] == 1
+    assert [email for email, _ in sent] == ["reader3@example.com"]
+
+    # A redelivered chunk finds every row already claimed
+    sent.clear()
+    result = send_notification_digest_chunk("daily", reader_ids, now.isoformat())
+    assert result["sent_count"] == 0
+    assert sent == []
+
+    # A worker died after claiming a row and before emailing it
+    with Session(engine) as session:
+        notification = Notification(
+            recipient_id=reader_ids[4],
+            sender_id=sender_id,
+            type=NotificationType.LIKE,
+            data={"content": "after the crash"},
+        )
+        session.add(notification)
+        session.flush()
+        crashed = PendingNotificationEmail(
+            user_id=reader_ids[4],
+            notification_id=notification.id,
+            notification_type=NotificationType.LIKE,
+            frequency=NotificationFrequency.DAILY,
+            scheduled_for=now - timedelta(hours=1),
+            claimed_at=datetime.now(timezone.utc),
+        )
+        session.add(crashed)
+        session.commit()
+        crashed_id = crashed.id
+
+    # While its lease is live the row is left alone
+    result = send_notification_digest("daily")
+    assert result["chunk_count"] == 0
+    assert sent == []
+
+    # Once the lease lapses the next run takes it over and sends it once
+    with Session(engine) as session:
+        crashed = session.get(PendingNotificationEmail, crashed_id)
+        crashed.claimed_at = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.NOTIFICATION_DIGEST_CLAIM_LEASE_SECONDS + 60
+        )
+        session.add(crashed)
+        session.commit()
+    result = send_notification_digest("daily")
+    assert result["chunk_count"] == 1
+    assert [(email, [n["content"] for n in notifications]) for email, notifications in sent] == [
+        ("reader4@example.com", ["after the crash"])
+    ]
+    with Session(engine) as session:
+        crashed = session.get(PendingNotificationEmail, crashed_id)
+        assert crashed.is_sent
+        assert crashed.claimed_at is None
+
+    with Session(engine) as session:
+        unsent = session.exec(
+            select(PendingNotificationEmail).where(PendingNotificationEmail.is_sent == False)  # noqa: E712
+        ).all()
+        assert sorted(p.frequency.value for p in unsent) == ["daily", "weekly"]
+
+
+def test_preferences_are_virtual_until_changed_and_cached_in_redis(tmp_path, create_test_engines, override_sessions):
+    import fakeredis
+    from sqlalchemy import event
+    from sqlmodel import Session, select
+
+    from src.database.models import NotificationFrequency, NotificationPreferences, User
+    from src.modules.notifications.notification_preferences_methods import (
+        get_email_frequencies,
+        get_email_frequency_for_notification_type,
+    )
+
+    engine, async_engine = create_test_engines(tmp_path / "preferences.db")
+    with Session(engine) as session:
+        users = [User(username=f"user{i}", email=f"user{i}@example.com") for i in range(3)]
+        session.add_all(users)
+        session.commit()
+        user_ids = [user.id for user in users]
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    with patch(
+        "src.modules.notifications.notification_preferences_methods.get_redis",
+        return_value=redis_client,
+    ):
+        with Session(engine) as session:
+            frequencies = get_email_frequencies(
+                session, {user_ids[0]: "mention", user_ids[1]: "like", user_ids[2]: "follow"}
+            )
+            assert frequencies == {
+                user_ids[0]: NotificationFrequency.IMMEDIATE,
+                user_ids[1]: NotificationFrequency.DAILY,
+                user_ids[2]: NotificationFrequency.NONE,
+            }
+            # Served from Redis the second time
+            queries = len(statements)
+            assert get_email_frequency_for_notification_type(session, user_ids[1], "like") == NotificationFrequency.DAILY
+            assert len(statements) == queries
+        assert not any(s.lstrip().upper().startswith("INSERT") for s in statements)
+
+        override_sessions(engine, async_engine)
+        app.dependency_overrides[get_current_user] = lambda: create_mock_user(user_ids[1])
+        try:
+            defaults = client.get("/api/notifications/preferences")
+            updated = client.put("/api/notifications/preferences", json={"like_email": "none"})
+        finally:
+            app.dependency_overrides.clear()
+        assert defaults.status_code == 200
+        assert defaults.json()["like_email"] == "daily"
+        assert updated.json()["like_email"] == "none"
+
+        # The update dropped the cached defaults
+        with Session(engine) as session:
+            assert get_email_frequency_for_notification_type(session, user_ids[1], "like") == NotificationFrequency.NONE
+            assert len(session.exec(select(NotificationPreferences)).all()) == 1
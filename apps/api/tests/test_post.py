@@ -6,6 +6,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 from src.main import app
+from src.database.engine import get_async_session as get_async_db
 from src.database.engine import get_session as get_db
 from src.database.models import Post, User
 from src.api.account.api import get_current_user
@@ -52,6 +53,7 @@ def create_mock_post(post_id="post123", title="Test Post", content="Test content
     mock_post.is_pinned = False
     mock_post.created_at = datetime.now()
     mock_post.updated_at = datetime.now()
+    mock_post.comment_count = 0
     mock_post.reaction_count = 0
     
     # Mock the user relationship
@@ -99,7 +101,7 @@ def test_get_post():
 def test_get_all_posts():
     mock_db = MagicMock()
     
-    with patch("src.api.post.api.get_all_posts", return_value=[]):
+    with patch("src.api.post.api.get_all_posts", return_value=([], None)):
         app.dependency_overrides[get_db] = lambda: mock_db
         
         response = client.get("/api/posts/")
@@ -136,4 +138,369 @@ def test_delete_post():
         response = client.delete("/api/posts/post123")
         
         app.dependency_overrides.clear()
-        assert response.status_code == 200
\ No newline at end of file
+        assert response.status_code == 200
+
+def seed_feed(session, post_count):
+    """Seed posts with nested replies and reactions into a real database"""
+    from src.modules.post.post_methods import create_post
+    from src.modules.reaction.reaction_methods import create_reaction
+
+    users = [
+        User(username=f"user{i}", email=f"user{i}@example.com", password=None)
+        for i in range(3)
+    ]
+    session.add_all(users)
+    session.commit()
+
+    posts = []
+    for i in range(post_count):
+        post = create_post(session, {"content": f"Post {i}", "user_id": users[0].id})
+        reply = create_post(session, {"content": "Reply", "user_id": users[1].id, "parent_id": post.id, "type": "comment"})
+        create_post(session, {"content": "Nested", "user_id": users[2].id, "parent_id": reply.id, "type": "comment"})
+        create_reaction(session, {"user_id": users[1].id, "post_id": post.id, "emoji": "👍"})
+        create_reaction(session, {"user_id": users[2].id, "post_id": post.id, "emoji": "🔥"})
+        posts.append(post)
+    return users, posts
+
+
+def count_feed_queries(create_test_engines, override_sessions, db_path, post_count):
+    """Count the SQL statements issued by GET /api/posts/ for a page of posts"""
+    from sqlalchemy import event
+    from sqlmodel import Session
+
+    engine, async_engine = create_test_engines(db_path)
+    with Session(engine) as session:
+        seed_feed(session, post_count)
+
+    statements = []
+    for target in (engine, async_engine.sync_engine):
+        event.listen(
+            target,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+    override_sessions(engine, async_engine)
+    try:
+        response = client.get("/api/posts/")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == post_count
+    for post in data:
+        assert post["comment_count"] == 2
+        assert post["reaction_count"] == 2
+        assert post["comment_summary"]["names"] == ["user1", "user2"]
+        assert {r["emoji"] for r in post["reactions"]["summary"]} == {"👍", "🔥"}
+    # Reply subtrees are prefix scans on the materialized path
+    assert not any("RECURSIVE" in statement.upper() for statement in statements)
+    return len(statements)
+
+
+def test_get_all_posts_query_count_is_constant(tmp_path, create_test_engines, override_sessions):
+    small = count_feed_queries(create_test_engines, override_sessions, tmp_path / "small.db", 2)
+    large = count_feed_queries(create_test_engines, override_sessions, tmp_path / "large.db", 25)
+    assert small == large
+
+
+def test_post_counters_follow_replies_and_reactions():
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine, select
+    from src.database.models import PostReactionCount
+    from src.modules.post.post_counter_methods import reconcile_post_counters
+    from src.modules.post.post_methods import delete_post
+    from src.modules.reaction.reaction_methods import create_reaction, delete_reaction
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        users, posts = seed_feed(session, 1)
+        post = posts[0]
+        session.refresh(post)
+        assert (post.comment_count, post.reaction_count) == (2, 2)
+
+        # Toggling the same emoji off, then switching emoji, keeps per-emoji counts exact
+        create_reaction(session, {"user_id": users[1].id, "post_id": post.id, "emoji": "👍"})
+        create_reaction(session, {"user_id": users[1].id, "post_id": post.id, "emoji": "👍"})
+        create_reaction(session, {"user_id": users[2].id, "post_id": post.id, "emoji": "👍"})
+        assert delete_reaction(session, users[2].id, post.id, "🔥") is False
+        counts = {
+            row.emoji: row.count
+            for row in session.exec(select(PostReactionCount).where(PostReactionCount.post_id == post.id))
+        }
+        assert counts == {"👍": 2, "🔥": 0}
+
+        reply = session.exec(select(Post).where(Post.parent_id == post.id)).one()
+        assert delete_post(session, reply.id) is True
+        assert delete_post(session, reply.id) is True
+        session.refresh(post)
+        assert (post.comment_count, post.reaction_count) == (0, 2)
+
+        assert reconcile_post_counters(session) == 0
+        post.comment_count = 7
+        session.add(post)
+        session.commit()
+        assert reconcile_post_counters(session) == 1
+        session.refresh(post)
+        assert post.comment_count == 0
+
+
+def test_get_all_posts_cursor_pages_through_feed(tmp_path, create_test_engines, override_sessions):
+    from sqlmodel import Session
+
+    engine, async_engine = create_test_engines(tmp_path / "feed.db")
+    with Session(engine) as session:
+        _, posts = seed_feed(session, 5)
+        posts[2].is_pinned = True
+        session.add(posts[2])
+        session.commit()
+        expected = [posts[2].id] + [post.id for post in reversed(posts) if post.id != posts[2].id]
+
+    override_sessions(engine, async_engine)
+    try:
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/posts/", params=params)
+            assert response.status_code == 200
+            seen.extend(post["id"] for post in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        bad_cursor_response = client.get("/api/posts/", params={"cursor": "not-a-cursor"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert seen == expected
+    assert bad_cursor_response.status_code == 400
+
+
+def test_get_all_posts_hides_private_channel_posts_in_sql():
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+    from src.database.models import Channel, ChannelMember, ChannelType, Role
+    from src.modules.post.post_methods import get_all_posts
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        users, posts = seed_feed(session, 3)
+        admin = User(username="admin", email="admin@example.com", password=None, role=Role.ADMIN)
+        channel = Channel(name="Private", slug="private", type=ChannelType.PRIVATE)
+        session.add_all([admin, channel])
+        session.commit()
+        session.add(ChannelMember(channel_id=channel.id, user_id=users[1].id))
+        for post in posts[1:]:
+            post.channel_id = channel.id
+            session.add(post)
+        session.commit()
+
+        outsider_posts, _ = get_all_posts(session, limit=1, current_user_id=users[2].id)
+        anonymous_posts, _ = get_all_posts(session)
+        member_posts, _ = get_all_posts(session, current_user_id=users[1].id)
+        admin_posts, _ = get_all_posts(session, current_user_id=admin.id)
+
+        # The newest posts are private, so a full page must come from further back
+        assert [post.id for post in outsider_posts] == [posts[0].id]
+        assert [post.id for post in anonymous_posts] == [posts[0].id]
+        assert len(member_posts) == 3
+        assert len(admin_posts) == 3
+
+
+def test_thread_replies_follow_materialized_path(tmp_path, create_test_engines, override_sessions):
+    from sqlmodel import Session, select
+    from src.modules.post.post_methods import create_post, update_post
+
+    engine, async_engine = create_test_engines(tmp_path / "thread.db")
+    with Session(engine) as session:
+        users, posts = seed_feed(session, 1)
+        root = posts[0]
+        first = create_post(session, {"content": "First", "user_id": users[1].id, "parent_id": root.id, "type": "comment"})
+        first_reply = create_post(session, {"content": "First reply", "user_id": users[2].id, "parent_id": first.id, "type": "comment"})
+        last = create_post(session, {"content": "Last", "user_id": users[2].id, "parent_id": root.id, "type": "comment"})
+        # Ids in a path need not share a length; a shorter one must still be its own thread
+        short = create_post(session, {"id": "short", "content": "Short", "user_id": users[1].id, "parent_id": root.id, "type": "comment"})
+        short_reply = create_post(session, {"content": "Short reply", "user_id": users[2].id, "parent_id": short.id, "type": "comment"})
+        update_post(session, first.id, {"is_pinned": True})
+        assert first_reply.path == f"{root.id}/{first.id}/{first_reply.id}"
+        assert (root.root_id, first.root_id, first_reply.root_id) == (root.id, root.id, root.id)
+        session.refresh(root)
+        assert root.comment_count == 7
+
+        # Seeded reply and its nested reply sit between the pinned thread and the newest one
+        seeded_reply, seeded_nested = [post.id for post in session.exec(
+            select(Post).where(Post.path.like(f"{root.id}/%"), Post.id.not_in([first.id, first_reply.id, last.id, short.id, short_reply.id])).order_by(Post.path)
+        )]
+        expected = [first.id, first_reply.id, short.id, short_reply.id, last.id, seeded_reply, seeded_nested]
+        root_id = root.id
+
+    override_sessions(engine, async_engine)
+    try:
+        full_thread = client.get("/api/posts/", params={"parent_id": root_id}).json()
+        paged = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(f"/api/posts/{root_id}/replies", params=params)
+            assert response.status_code == 200
+            paged.extend(post["id"] for post in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [post["id"] for post in full_thread] == expected
+    assert paged == expected
+
+
+def test_feeds_read_through_timeline_cache():
+    import fakeredis
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+    from src.database.models import Channel, ChannelType
+    from src.modules.post.post_methods import (
+        create_post,
+        delete_post,
+        get_all_posts,
+        get_posts_by_channel_slug,
+        get_posts_by_user,
+        update_post,
+    )
+    from src.modules.post.post_timeline_methods import (
+        GLOBAL_TIMELINE_KEY,
+        TIMELINE_REBUILD_LOCK_KEY,
+        TIMELINE_TTL_SECONDS,
+        USER_TIMELINE_KEY,
+        rebuild_timelines,
+    )
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+    def page_through(session, current_user_id=None):
+        ids, cursor = [], None
+        while True:
+            posts, cursor = get_all_posts(session, limit=2, current_user_id=current_user_id, cursor=cursor)
+            ids.extend(post.id for post in posts)
+            if not cursor:
+                return ids
+
+    with Session(engine) as session, patch(
+        "src.modules.post.post_timeline_methods.get_redis", return_value=redis_client
+    ), patch("src.modules.post.post_timeline_methods.engine", engine):
+        users, posts = seed_feed(session, 4)
+        channel = Channel(name="Private", slug="private", type=ChannelType.PRIVATE)
+        session.add(channel)
+        session.commit()
+        hidden = create_post(session, {"content": "Members only", "user_id": users[0].id, "channel_id": channel.id})
+
+        # While another reader holds the rebuild lock, reads fall back to SQL
+        lock_key = TIMELINE_REBUILD_LOCK_KEY.format(GLOBAL_TIMELINE_KEY)
+        redis_client.set(lock_key, 1)
+        sql_order = page_through(session)
+        assert not redis_client.exists(GLOBAL_TIMELINE_KEY)
+        # Otherwise the first read builds the missing timeline
+        redis_client.delete(lock_key)
+        assert page_through(session) == sql_order
+        assert redis_client.exists(GLOBAL_TIMELINE_KEY)
+        assert rebuild_timelines(session) == 5
+        # Only the per-user and per-channel timelines expire
+        assert redis_client.ttl(GLOBAL_TIMELINE_KEY) == -1
+        assert 0 < redis_client.ttl(USER_TIMELINE_KEY.format(users[0].id)) <= TIMELINE_TTL_SECONDS
+        assert page_through(session) == sql_order == [post.id for post in reversed(posts)]
+
+        newest = create_post(session, {"content": "Newest", "user_id": users[1].id})
+        update_post(session, posts[0].id, {"is_pinned": True})
+        delete_post(session, posts[2].id)
+        expected = [posts[0].id, newest.id, posts[3].id, posts[1].id]
+        assert page_through(session) == expected
+        assert page_through(session, users[0].id) == expected
+        assert redis_client.zrevrange(GLOBAL_TIMELINE_KEY, 0, 1) == [posts[0].id, newest.id]
+
+        # Reads are served from the cache, not from SQL
+        redis_client.zrem(GLOBAL_TIMELINE_KEY, posts[3].id)
+        assert page_through(session) == [posts[0].id, newest.id, posts[1].id]
+
+        assert [post.id for post in get_posts_by_channel_slug(session, "private")] == [hidden.id]
+        assert [post.id for post in get_posts_by_user(session, users[1].id)][0] == newest.id
+
+
+def test_full_timeline_without_a_limit_goes_straight_to_sql():
+    import fakeredis
+    from src.modules.post.post_timeline_methods import (
+        TIMELINE_MAX_LENGTH,
+        USER_TIMELINE_KEY,
+        get_timeline_posts,
+    )
+
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    key = USER_TIMELINE_KEY.format("user123")
+    redis_client.zadd(key, {f"post{i}": i for i in range(TIMELINE_MAX_LENGTH)})
+    mock_db = MagicMock()
+
+    with patch("src.modules.post.post_timeline_methods.get_redis", return_value=redis_client):
+        assert get_timeline_posts(mock_db, key) is None
+    mock_db.exec.assert_not_called()
+
+
+def test_timeline_rebuild_keeps_posts_written_during_the_swap():
+    import fakeredis
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+    from src.modules.post.post_methods import create_post, delete_post
+    from src.modules.post.post_timeline_methods import GLOBAL_TIMELINE_KEY, rebuild_timelines
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    pipeline = redis_client.pipeline
+
+    with Session(engine) as session, patch(
+        "src.modules.post.post_timeline_methods.get_redis", return_value=redis_client
+    ):
+        users, posts = seed_feed(session, 3)
+        rebuild_timelines(session)
+        written = []
+
+        def write_before_swap():
+            # Runs after the rebuild has read the database but before it swaps
+            if not written:
+                written.append(None)
+                written[0] = create_post(session, {"content": "Racing", "user_id": users[0].id})
+                delete_post(session, posts[0].id)
+            return pipeline()
+
+        with patch.object(redis_client, "pipeline", side_effect=write_before_swap):
+            rebuild_timelines(session)
+
+        assert redis_client.zrevrange(GLOBAL_TIMELINE_KEY, 0, -1) == [
+            written[0].id,
+            posts[2].id,
+            posts[1].id,
+        ]
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from src.main import app
+from src.database.models import User, UserPresence
+
+client = TestClient(app)
+
+
+def test_timeseries_is_bucketed_in_the_database(tmp_path, create_test_engines, override_sessions):
+    from sqlmodel import Session
+
+    engine, async_engine = create_test_engines(tmp_path / "presence.db")
+    monday = datetime(2026, 10, 12, tzinfo=timezone.utc)
+    with Session(engine) as session:
+        users = [User(username=f"user{i}", email=f"user{i}@example.com") for i in range(2)]
+        session.add_all(users)
+        session.flush()
+        sessions = [
+            (users[0], monday + timedelta(hours=9, minutes=5), 60),
+            (users[0], monday + timedelta(hours=9, minutes=40), 30),
+            (users[1], monday + timedelta(hours=9, minutes=50), None),
+            (users[1], monday + timedelta(days=1, hours=2), 90),
+            # Outside the requested range
+            (users[1], monday + timedelta(days=9), 10),
+        ]
+        for user, connected_at, duration in sessions:
+            session.add(
+                UserPresence(
+                    user_id=user.id,
+                    connection_id=f"conn-{connected_at.isoformat()}",
+                    connected_at=connected_at,
+                    duration_seconds=duration,
+                )
+            )
+        session.commit()
+
+    override_sessions(engine, async_engine)
+    try:
+        params = {"start_date": "2026-10-12T00:00:00Z", "end_date": "2026-10-18T23:59:59Z"}
+        hourly = client.get("/api/presence/timeseries", params={**params, "interval": "hour"})
+        daily = client.get("/api/presence/timeseries", params={**params, "interval": "day"})
+        weekly = client.get("/api/presence/timeseries", params={**params, "interval": "week"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert hourly.status_code == 200
+    assert hourly.json()["data"] == [
+        {
+            "timestamp": "2026-10-12T09:00:00+00:00",
+            "session_count": 3,
+            "unique_users": 2,
+            "total_duration_seconds": 90,
+            "average_duration_seconds": 30,
+        },
+        {
+            "timestamp": "2026-10-13T02:00:00+00:00",
+            "session_count": 1,
+            "unique_users": 1,
+            "total_duration_seconds": 90,
+            "average_duration_seconds": 90,
+        },
+    ]
+    assert [bucket["timestamp"] for bucket in daily.json()["data"]] == [
+        "2026-10-12T00:00:00+00:00",
+        "2026-10-13T00:00:00+00:00",
+    ]
+    assert weekly.json()["data"][0]["timestamp"] == "2026-10-12T00:00:00+00:00"
+    assert weekly.json()["data"][0]["session_count"] == 4
@@ -0,0 +1,333 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import multiprocessing
+import socket
+import threading
+from unittest.mock import patch
+
+
+class FakeWebSocket:
+    """Records what the ConnectionManager sends instead of writing to a socket"""
+
+    def __init__(self, stalled=False):
+        self.sent = []
+        self.stalled = stalled
+        self.close_code = None
+        self.client_state = type("State", (), {"name": "CONNECTED"})()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def run_worker(redis_url, worker_name, ready, start, results):
+    """One API worker holding a single socket subscribed to user-1"""
+    from src.api.websocket.connection_manager import ConnectionManager
+
+    async def main():
+        manager = ConnectionManager()
+        await manager.start_backplane(redis_url)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, f"{worker_name}-conn", f"{worker_name}-user")
+        await manager.subscribe_to_user(f"{worker_name}-conn", "user-1")
+        ready.put(worker_name)
+
+        # Only the first worker broadcasts; every worker's socket must receive it
+        await asyncio.get_running_loop().run_in_executor(None, start.wait)
+        if worker_name == "worker-a":
+            await manager.broadcast_to_user_subscribers(
+                "user-1", {"type": "post_created", "data": {"from": worker_name}}
+            )
+        for _ in range(100):
+            if websocket.sent:
+                break
+            await asyncio.sleep(0.05)
+        results.put((worker_name, websocket.sent))
+        await manager.stop_backplane()
+
+    asyncio.run(main())
+
+
+def test_broadcast_reaches_sockets_on_every_worker():
+    from fakeredis import TcpFakeServer
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = TcpFakeServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    context = multiprocessing.get_context("spawn")
+    ready, start, results = context.Queue(), context.Event(), context.Queue()
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(f"redis://127.0.0.1:{port}", name, ready, start, results),
+        )
+        for name in ("worker-a", "worker-b")
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        assert {ready.get(timeout=30), ready.get(timeout=30)} == {"worker-a", "worker-b"}
+        start.set()
+        received = dict(results.get(timeout=30) for _ in workers)
+    finally:
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        server.shutdown()
+        server.server_close()
+
+    expected = [{"type": "post_created", "data": {"from": "worker-a"}}]
+    assert received == {"worker-a": expected, "worker-b": expected}
+
+
+def test_broadcast_stays_local_without_redis():
+    from src.api.websocket.connection_manager import ConnectionManager
+
+    async def main():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "conn", "user-2")
+        await manager.subscribe_to_event("conn", "event-1")
+        await manager.broadcast_to_event_subscribers("event-1", {"type": "updated", "data": {}})
+        await asyncio.sleep(0.01)
+        return websocket.sent
+
+    assert asyncio.run(main()) == [{"type": "updated", "data": {}}]
+
+
+def test_slow_consumer_is_dropped_without_stalling_others():
+    from src.api.websocket.connection_manager import ConnectionManager
+
+    async def main():
+        manager = ConnectionManager()
+        fast, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+        manager.register(fast, "fast", "user-1")
+        manager.register(stalled, "stalled", "user-2")
+        for connection_id in ("fast", "stalled"):
+            await manager.subscribe_to_event(connection_id, "event-1")
+
+        for i in range(5):
+            await manager.deliver_to_event_subscribers("event-1", {"type": "tick", "data": {"i": i}})
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        return manager, fast, stalled
+
+    with patch("src.api.websocket.connection_manager.SEND_QUEUE_SIZE", 2):
+        manager, fast, stalled = asyncio.run(main())
+
+    assert [message["data"]["i"] for message in fast.sent] == [0, 1, 2, 3, 4]
+    assert stalled.close_code == 1013
+    assert "stalled" not in manager.active_connections
+    assert manager.event_subscriptions["event-1"] == {"fast"}
+
+
+def test_unregister_releases_only_channels_nobody_else_needs():
+    from src.api.websocket.connection_manager import ConnectionManager
+
+    async def main():
+        manager = ConnectionManager()
+        manager.register(FakeWebSocket(), "phone", "user-1")
+        manager.register(FakeWebSocket(), "laptop", "user-1")
+        for connection_id in ("phone", "laptop"):
+            await manager.subscribe_to_user(connection_id, "user-3")
+        await manager.subscribe_to_event("phone", "event-1")
+
+        assert sorted(manager.get_user_connections("user-1")) == ["laptop", "phone"]
+        _, released = manager.unregister("phone")
+        return manager, released
+
+    manager, released = asyncio.run(main())
+
+    assert released == ["event:event-1"]
+    assert manager.get_user_connections("user-1") == ["laptop"]
+    assert manager.user_subscriptions == {"user-3": {"laptop"}}
+    assert manager.event_subscriptions == {}
+
+
+def test_presence_is_written_in_batches_off_the_socket_path(tmp_path, create_test_engines):
+    from sqlmodel import Session, select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    from src.api.websocket.connection_manager import ConnectionManager
+    from src.database.models import User, UserPresence
+
+    engine, async_engine = create_test_engines(tmp_path / "presence.db")
+    with Session(engine) as session:
+        user = User(username="presence", email="presence@example.com")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+    session_maker = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def main():
+        manager = ConnectionManager()
+        manager.presence_writer.flush_interval = 60
+        for connection_id in ("first", "second", "third"):
+            await manager.connect(FakeWebSocket(), connection_id, user_id)
+        await manager.disconnect("first")
+        # Nothing reaches the database until the writer flushes
+        assert manager.presence_writer.pending() == 3
+        await manager.presence_writer.flush()
+
+        await manager.disconnect("second")
+        await manager.presence_writer.stop()
+        await async_engine.dispose()
+
+    with patch("src.api.websocket.presence_writer.async_session_maker", session_maker):
+        asyncio.run(main())
+
+    with Session(engine) as session:
+        presence = {row.connection_id: row for row in session.exec(select(UserPresence))}
+    assert set(presence) == {"first", "second", "third"}
+    assert presence["first"].disconnected_at and presence["second"].disconnected_at
+    assert presence["third"].disconnected_at is None
+
+
+def test_live_presence_is_shared_and_expires_without_heartbeats():
+    import fakeredis
+    from datetime import datetime, timedelta, timezone
+
+    from src.api.websocket.connection_manager import ConnectionManager
+    from src.api.websocket.live_presence import presence_member
+
+    server = fakeredis.FakeServer()
+
+    async def main():
+        workers = [ConnectionManager(), ConnectionManager()]
+        for worker in workers:
+            worker.live_presence.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        await workers[0].connect(FakeWebSocket(), "alive", "user-1")
+        await workers[1].connect(FakeWebSocket(), "crashed", "user-2")
+        await workers[0].update_heartbeat("alive")
+        online_before = await workers[0].get_live_connections()
+
+        # The second worker dies without disconnecting; its last heartbeat ages past the TTL
+        crashed = workers[1].active_connections["crashed"]
+        await workers[1].live_presence.touch(
+            presence_member("crashed", "user-2", crashed.connected_at),
+            datetime.now(timezone.utc) - timedelta(seconds=workers[1].live_presence.ttl + 1),
+        )
+        online_after = await workers[0].get_live_connections()
+
+        await workers[0].disconnect("alive")
+        online_at_end = await workers[1].get_live_connections()
+        return online_before, online_after, online_at_end
+
+    online_before, online_after, online_at_end = asyncio.run(main())
+
+    assert sorted(c["connection_id"] for c in online_before) == ["alive", "crashed"]
+    assert [c["connection_id"] for c in online_after] == ["alive"]
+    assert online_at_end == []
+
+
+def test_notifications_created_in_celery_reach_only_the_recipients_signed_in_sockets(tmp_path, create_test_engines):
+    import redis
+    from fakeredis import TcpFakeServer
+    from sqlmodel import Session
+
+    from src.api.websocket.connection_manager import ConnectionManager
+    from src.database.models import User
+    from src.modules.notifications.notification_tasks import create_notification_task
+
+    engine, async_engine = create_test_engines(tmp_path / "push.db")
+    with Session(engine) as session:
+        recipient = User(username="recipient", email="recipient@example.com")
+        sender = User(username="sender", email="sender@example.com")
+        session.add_all([recipient, sender])
+        session.commit()
+        recipient_id, sender_id = recipient.id, sender.id
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = TcpFakeServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    redis_url = f"redis://127.0.0.1:{port}"
+    sync_client = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    async def main():
+        manager = ConnectionManager()
+        await manager.start_backplane(redis_url)
+        signed_in, anonymous, follower = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(signed_in, "signed-in", recipient_id)
+        await manager.open_inbox("signed-in")
+        await manager.connect(anonymous, "anonymous", recipient_id)
+        await manager.connect(follower, "follower", sender_id)
+        await manager.subscribe_to_user("follower", recipient_id)
+
+        # The task runs in a Celery worker, with no access to this manager
+        with patch("src.modules.notifications.notification_tasks.engine", engine), \
+             patch("src.modules.notifications.notification_tasks.email_service"), \
+             patch("src.core.pubsub.get_redis", return_value=sync_client):
+            result = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: create_notification_task(
+                    recipient_id, sender_id, "like", {"post_id": "post-1", "content": "hi"}
+                ),
+            )
+        for _ in range(100):
+            if signed_in.sent:
+                break
+            await asyncio.sleep(0.05)
+        await manager.stop_backplane()
+        return result, signed_in.sent, anonymous.sent, follower.sent
+
+    try:
+        result, signed_in, anonymous, follower = asyncio.run(main())
+    finally:
+        sync_client.close()
+        server.shutdown()
+        server.server_close()
+
+    assert result["success"] is True
+    assert len(signed_in) == 1
+    assert signed_in[0]["type"] == "notification"
+    assert signed_in[0]["data"]["id"] == result["notification_id"]
+    assert signed_in[0]["data"]["sender_username"] == "sender"
+    assert signed_in[0]["data"]["unread_count"] == 1
+    assert anonymous == [] and follower == []
+
+
+def test_only_sockets_with_the_owners_token_open_an_inbox(tmp_path, create_test_engines):
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    from src.api.websocket.connection_manager import manager
+    from src.database.models import User
+    from src.main import app
+    from src.modules.auth.auth_methods import create_access_token
+    from src.modules.auth.principal_methods import access_token_claims
+
+    engine, async_engine = create_test_engines(tmp_path / "inbox.db")
+    with Session(engine) as session:
+        owner = User(username="owner", email="owner@example.com", is_active=True)
+        session.add(owner)
+        session.commit()
+        owner_id = owner.id
+        token = create_access_token(access_token_claims(owner))
+
+    client = TestClient(app)
+    with patch("src.api.websocket.api.engine", engine):
+        with client.websocket_connect(f"/api/ws?user_id={owner_id}&token={token}") as ws:
+            assert ws.receive_json()["data"]["notifications"] is True
+            assert len(manager.inboxes[owner_id]) == 1
+        with client.websocket_connect(f"/api/ws?user_id=someone-else&token={token}") as ws:
+            assert ws.receive_json()["data"]["notifications"] is False
+        with client.websocket_connect(f"/api/ws?user_id={owner_id}") as ws:
+            assert ws.receive_json()["data"]["notifications"] is False